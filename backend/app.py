@@ -5,9 +5,7 @@ import json
 import time
 import logging
 from dotenv import load_dotenv
-import praw
 from prawcore.exceptions import RequestException, ResponseException
-import threading
 import random
 from datetime import datetime
 import requests
@@ -17,6 +15,23 @@ import traceback
 
 # Import the scraper
 from scraper import scrape_reddit_multiple_subreddits, clean_cache
+from scraper import CACHE as scraper_cache, SCRAPE_FLIGHT
+
+# Import the shared HTTP client and upstream rate limiters
+import http_client
+import rate_limiter
+import reddit_api
+from cache import create_cache
+from singleflight import SingleFlight
+from refresh_scheduler import RefreshScheduler
+from crawl_state import get_crawl_state, merge_posts
+
+# Import Reddit post store modules
+import reddit_db
+from reddit_ingest import RedditIngestJob
+from pagination import InvalidCursor
+import feed
+import responses
 
 # Import Twitter modules
 import twitter_api
@@ -56,6 +71,7 @@ logger = logging.getLogger(__name__)
 # Import classification module
 try:
     from llm_classifier import get_classifier, CATEGORIES
+    import classification_jobs
     LLM_CLASSIFIER_AVAILABLE = True
 except ImportError:
     logger.warning("LLM classifier module not found. Classification endpoint will not be available.")
@@ -65,27 +81,11 @@ except ImportError:
 load_dotenv()
 
 app = Flask(__name__)
+# Encode every jsonify response with the fast encoder
+app.json = responses.FastJSONProvider(app)
 # Enable CORS for all routes
 CORS(app, resources={r"/*": {"origins": "*", "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"], "allow_headers": "*"}})
 
-# Run database schema update
-try:
-    from update_schema_classifications import add_classification_columns, verify_schema
-    
-    # Update database schema
-    logger.info("Updating database schema for classifications...")
-    success = add_classification_columns()
-    
-    if success:
-        logger.info("Database schema update successful")
-        verify_schema()
-    else:
-        logger.error("Failed to update database schema")
-except ImportError:
-    logger.warning("Could not import update_schema_classifications module. Schema update skipped.")
-except Exception as e:
-    logger.error(f"Error running database schema update: {e}")
-
 # Set up database
 if not os.path.exists('twitter_posts.db'):
     logger.info("Creating new Twitter database")
@@ -172,20 +172,28 @@ SEARCH_TERMS = [
     'coding tools'
 ]
 
-# Rate limiting configuration
-RATE_LIMIT_REQUESTS = 60  # Maximum requests per minute
-RATE_LIMIT_WINDOW = 60  # Window in seconds (1 minute)
-request_timestamps = []
-
 # Enhanced caching mechanism
-CACHE = {}
 CACHE_TIMEOUT = 600  # Cache timeout in seconds (10 minutes)
-CACHE_LAST_UPDATE = 0
-CACHE_LOCK = threading.RLock()  # Thread-safe cache access
+CACHE_MAX_ENTRIES = 256
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+CACHE_STALE_TIMEOUT = 3600  # Serve expired posts for up to 1 hour while they refresh
+CACHE = create_cache(
+    "posts",
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    default_ttl=CACHE_TIMEOUT,
+    stale_ttl=CACHE_STALE_TIMEOUT
+)
+
+# Concurrent cache misses for the same key share one fetch
+POSTS_FLIGHT = SingleFlight("posts")
 
 # Background refresh control
-BACKGROUND_REFRESH_ACTIVE = False
-BACKGROUND_REFRESH_INTERVAL = 300  # Refresh cache every 5 minutes
+BACKGROUND_REFRESH_IDLE_TIMEOUT = 1800  # Stop refreshing keys not requested for 30 minutes
+BACKGROUND_REFRESH_BUDGET = 6  # Background refreshes allowed per minute
+INCREMENTAL_REFRESH = os.getenv("INCREMENTAL_REFRESH", "true").lower() == "true"  # Refresh by merging crawl deltas
+CACHE_MAX_POSTS_PER_KEY = 500  # Posts kept per cached feed when merging deltas
+CACHE_WARM_START_KEYS = int(os.getenv("CACHE_WARM_START_KEYS", 20))  # Hottest keys kept warm from boot
 
 # API configurations
 API_CACHE_TIMEOUT = 3600  # Cache timeout in seconds (1 hour)
@@ -210,23 +218,15 @@ except Exception as e:
 
 def check_rate_limit():
     """
-    Check if we're within the rate limit and update the request timestamps.
+    Check that the Reddit API budget has a token available right now.
+    Each search takes its own token, so this only peeks at the budget.
     Returns True if we can make a request, False otherwise.
     """
-    global request_timestamps
-    current_time = time.time()
-    
-    # Remove timestamps older than the window
-    request_timestamps = [ts for ts in request_timestamps if current_time - ts < RATE_LIMIT_WINDOW]
-    
-    # Check if we've made too many requests
-    if len(request_timestamps) >= RATE_LIMIT_REQUESTS:
-        logger.warning(f"Rate limit exceeded: {len(request_timestamps)} requests in the last {RATE_LIMIT_WINDOW} seconds")
-        return False
+    if rate_limiter.get_limiter(reddit_api.RATE_LIMITER_NAME).stats()["available_tokens"] >= 1:
+        return True
     
-    # Add the current timestamp and allow the request
-    request_timestamps.append(current_time)
-    return True
+    logger.warning("Reddit API rate limit exceeded")
+    return False
 
 def generate_cache_key(subreddit, sort_by, time_filter, data_source):
     """Generate a unique cache key based on request parameters"""
@@ -234,90 +234,94 @@ def generate_cache_key(subreddit, sort_by, time_filter, data_source):
 
 def get_from_cache(cache_key):
     """Get data from cache if valid"""
-    with CACHE_LOCK:
-        if cache_key in CACHE:
-            timestamp, data = CACHE[cache_key]
-            if time.time() - timestamp < CACHE_TIMEOUT:
-                logger.info(f"Cache hit for {cache_key}")
-                return data
-    return None
+    data = CACHE.get(cache_key)
+    if data is not None:
+        logger.info(f"Cache hit for {cache_key}")
+    return data
 
 def store_in_cache(cache_key, data):
     """Store data in cache thread-safely"""
-    with CACHE_LOCK:
-        CACHE[cache_key] = (time.time(), data)
-        logger.info(f"Updated cache for {cache_key}")
+    CACHE.set(cache_key, data)
+    logger.info(f"Updated cache for {cache_key}")
 
 def clean_local_cache():
     """Remove expired cache entries"""
-    with CACHE_LOCK:
-        current_time = time.time()
-        expired_keys = [k for k, (timestamp, _) in CACHE.items() if current_time - timestamp > CACHE_TIMEOUT]
-        for key in expired_keys:
-            del CACHE[key]
-        
-        # Also clean the scraper's cache
-        clean_cache()
-        
-        logger.info(f"Cleaned {len(expired_keys)} expired cache entries")
-
-def background_refresh_cache():
-    """Background task to refresh cache periodically"""
-    global BACKGROUND_REFRESH_ACTIVE
+    removed = CACHE.purge_expired()
+    
+    # Also clean the scraper's cache
+    clean_cache()
     
-    if BACKGROUND_REFRESH_ACTIVE:
+    logger.info(f"Cleaned {removed} expired cache entries")
+
+def refresh_cache_key(key):
+    """Fetch fresh posts for a cache key and store them (used by the refresh scheduler)"""
+    parts = key.split(':')
+    if len(parts) < 4:
         return
+        
+    subreddit = None if parts[0] == 'all' else parts[0]
+    sort_by = parts[1]
+    time_filter = parts[2]
+    data_source = parts[3]
     
-    BACKGROUND_REFRESH_ACTIVE = True
+    if data_source == 'api':
+        fetch = fetch_windsurf_ai_posts
+    elif data_source == 'scraper':
+        fetch = fetch_windsurf_ai_posts_by_scraping
+    else:
+        return  # Skip mock data
     
-    try:
-        logger.info("Starting background cache refresh")
-        
-        # Get all existing cache keys
-        with CACHE_LOCK:
-            cache_keys = list(CACHE.keys())
-        
-        # Refresh each key
-        for key in cache_keys:
-            parts = key.split(':')
-            if len(parts) < 4:
-                continue
-                
-            subreddit = None if parts[0] == 'all' else parts[0]
-            sort_by = parts[1]
-            time_filter = parts[2]
-            data_source = parts[3]
-            
-            try:
-                logger.info(f"Background refreshing cache for {key}")
-                
-                if data_source == 'api':
-                    posts = fetch_windsurf_ai_posts(subreddit, sort_by, time_filter, background=True)
-                elif data_source == 'scraper':
-                    posts = fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, background=True)
-                else:
-                    continue  # Skip mock data
-                
-                # Only update if we got actual results
-                if posts and len(posts) > 0:
-                    store_in_cache(key, posts)
-                    
-                # Small delay between refreshes
-                time.sleep(random.uniform(1, 3))
-                
-            except Exception as e:
-                logger.error(f"Error during background refresh for {key}: {e}")
+    # With a copy to update, only crawl what changed since the last fetch
+    cached_entry = CACHE.get_entry(key, allow_stale=True) if INCREMENTAL_REFRESH else None
+    incremental = bool(cached_entry and cached_entry[0])
     
-    except Exception as e:
-        logger.error(f"Error in background refresh task: {e}")
+    def fetch_and_store():
+        posts = fetch(subreddit, sort_by, time_filter, background=True, incremental=incremental)
+        if incremental:
+            if posts is None:
+                return None  # Keep serving the stale copy
+            posts = merge_posts(cached_entry[0], posts, max_posts=CACHE_MAX_POSTS_PER_KEY)
+        # Only update if we got actual results
+        if posts and len(posts) > 0:
+            store_in_cache(key, posts)
+        return posts
     
-    finally:
-        BACKGROUND_REFRESH_ACTIVE = False
-        
-        # Schedule the next refresh
-        threading.Timer(BACKGROUND_REFRESH_INTERVAL, background_refresh_cache).start()
+    # Share the fetch with any foreground miss for the same key
+    POSTS_FLIGHT.do(key, fetch_and_store)
 
-def fetch_windsurf_ai_posts(subreddit=None, sort_by='new', time_filter='all', limit=50, background=False):
+# Single scheduler keeping popular keys warm; request handlers never refresh inline
+REFRESH_SCHEDULER = RefreshScheduler(
+    "posts",
+    CACHE,
+    refresh_cache_key,
+    refresh_ahead=0.5,
+    idle_timeout=BACKGROUND_REFRESH_IDLE_TIMEOUT,
+    refreshes_per_minute=BACKGROUND_REFRESH_BUDGET
+)
+
+def warm_start_cache():
+    """Hand the hottest persisted keys to the refresh scheduler so they stay warm from boot"""
+    hot_keys = [key for key in CACHE.hottest_keys(CACHE_WARM_START_KEYS) if not key.endswith(':mock')]
+    if not hot_keys:
+        return
+    for key in hot_keys:
+        REFRESH_SCHEDULER.record_access(key)
+    REFRESH_SCHEDULER.wake()
+    logger.info(f"Warm start: tracking {len(hot_keys)} cached keys for background refresh")
+
+warm_start_cache()
+
+# Classification runs as background jobs
+if LLM_CLASSIFIER_AVAILABLE:
+    CLASSIFICATION_JOBS = classification_jobs.ClassificationJobRunner(get_classifier)
+
+@app.before_request
+def resume_classification_jobs():
+    """Continue jobs cut short by a restart, from the process that serves requests (not the reloader's parent)"""
+    if LLM_CLASSIFIER_AVAILABLE:
+        CLASSIFICATION_JOBS.resume()
+
+def fetch_windsurf_ai_posts(subreddit=None, sort_by='new', time_filter='all', limit=50, background=False, incremental=False):
     """
     Fetch posts related to Windsurf IDE, Codeium and their extensions from Reddit using PRAW
     
@@ -327,14 +331,16 @@ def fetch_windsurf_ai_posts(subreddit=None, sort_by='new', time_filter='all', li
         time_filter (str): Time filter for 'top' sort - 'all', 'day', 'week', 'month', 'year'
         limit (int): Maximum number of posts to fetch per subreddit/search term
         background (bool): Whether this is a background refresh
+        incremental (bool): Return only new or changed posts and leave the cache untouched
         
     Returns:
-        list: List of formatted posts
+        list: List of formatted posts, or None if an incremental fetch failed
     """
     try:
+        cache_key = generate_cache_key(subreddit, sort_by, time_filter, 'api')
+        
         # Check cache first if not a background task
-        if not background:
-            cache_key = generate_cache_key(subreddit, sort_by, time_filter, 'api')
+        if not background and not incremental:
             cached_data = get_from_cache(cache_key)
             if cached_data:
                 return cached_data
@@ -343,30 +349,15 @@ def fetch_windsurf_ai_posts(subreddit=None, sort_by='new', time_filter='all', li
         if not check_rate_limit():
             logger.warning("Rate limit exceeded. Falling back to web scraping.")
             # Fall back to web scraping
-            return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background)
+            return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background, incremental)
             
-        # Reddit API credentials loaded from environment variables
-        client_id = os.getenv('REDDIT_CLIENT_ID')
-        client_secret = os.getenv('REDDIT_CLIENT_SECRET')
-        
         # If credentials are missing, fall back to web scraping
-        if not client_id or not client_secret:
+        if not reddit_api.credentials_available():
             logger.warning("Reddit API credentials missing. Falling back to web scraping.")
-            return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background)
-        
-        # Initialize the Reddit API client
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent="community-surf:v1.0.0 (by u/yourusername)"
-        )
-        
-        # Fetch posts containing relevant terms
-        all_posts = []
+            return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background, incremental)
         
         # Limit the number of API calls to avoid excessive wait times
         max_api_calls = 6 if background else 10
-        api_calls = 0
         
         # Define search terms focused on Windsurf IDE and Codeium
         search_terms = [
@@ -390,88 +381,38 @@ def fetch_windsurf_ai_posts(subreddit=None, sort_by='new', time_filter='all', li
             subreddits_to_search = [subreddit]
         else:
             subreddits_to_search = target_subreddits
-            
-        # For each subreddit, search for relevant terms
-        for current_subreddit in subreddits_to_search:
-            if api_calls >= max_api_calls:
-                break
-                
-            sub = reddit.subreddit(current_subreddit)
-            
-            # Combine all search terms with OR operator for more efficient searching
-            combined_search = " OR ".join([f'"{term}"' for term in search_terms])
-            
-            try:
-                # Get the appropriate function based on sort method
-                if sort_by == 'hot':
-                    posts = sub.search(combined_search, sort='hot', limit=limit)
-                elif sort_by == 'new':
-                    posts = sub.search(combined_search, sort='new', limit=limit)
-                elif sort_by == 'top':
-                    posts = sub.search(combined_search, sort='top', time_filter=time_filter, limit=limit)
-                else:  # default to relevance
-                    posts = sub.search(combined_search, sort='relevance', time_filter=time_filter, limit=limit)
-                
-                api_calls += 1
-                
-                # Process the posts
-                for post in posts:
-                    # Skip posts with no interaction (no score, comments, or awards)
-                    if post.score < 1 and post.num_comments < 1:
-                        continue
-                        
-                    # Calculate a relevance score for sorting
-                    relevance_score = (post.score * 1) + (post.num_comments * 2)
-                    
-                    # Format post data
-                    post_data = {
-                        "id": post.id,
-                        "title": post.title,
-                        "content": post.selftext[:500] + "..." if len(post.selftext) > 500 else post.selftext,
-                        "url": post.url,
-                        "permalink": "https://reddit.com" + post.permalink,
-                        "created_utc": post.created_utc,
-                        "score": post.score,
-                        "num_comments": post.num_comments,
-                        "subreddit": post.subreddit.display_name,
-                        "author": str(post.author) if post.author else "[deleted]",
-                        "is_video": post.is_video,
-                        "relevance_score": relevance_score,
-                        "source": "reddit"
-                    }
-                    
-                    # Add thumbnail if available and not a default one
-                    if hasattr(post, 'thumbnail') and post.thumbnail not in ['self', 'default', '']:
-                        post_data["image"] = post.thumbnail
-                    elif hasattr(post, 'preview') and 'images' in post.preview:
-                        post_data["image"] = post.preview['images'][0]['source']['url']
-                    else:
-                        post_data["image"] = None
-                        
-                    all_posts.append(post_data)
-            except Exception as e:
-                logger.error(f"Error searching subreddit {current_subreddit}: {str(e)}")
-                continue
-                
-        # Sort posts by recency first, then by relevance score
-        all_posts.sort(key=lambda x: (-x["created_utc"], -x.get("relevance_score", 0)))
         
-        # Update cache with the results
-        store_in_cache(cache_key, all_posts)
+        # Search every subreddit concurrently (or as multireddits) under the API budget
+        all_posts = reddit_api.search_subreddits(
+            subreddits_to_search,
+            search_terms,
+            sort_by=sort_by,
+            time_filter=time_filter,
+            limit=limit,
+            max_calls=max_api_calls,
+            incremental=incremental
+        )
+        if all_posts is None:
+            logger.warning("All Reddit API searches failed. Falling back to web scraping.")
+            return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background, incremental)
+        
+        # Update cache with the results; deltas are merged by the caller
+        if not incremental:
+            store_in_cache(cache_key, all_posts)
         
         return all_posts
     except RequestException as e:
         logger.error(f"Reddit API request error: {e}")
-        return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background)
+        return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background, incremental)
     except ResponseException as e:
         logger.error(f"Reddit API response error: {e}")
-        return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background)
+        return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background, incremental)
     except Exception as e:
         logger.error(f"General error when fetching posts: {e}")
         logger.exception(e)
-        return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background)
+        return fetch_windsurf_ai_posts_by_scraping(subreddit, sort_by, time_filter, limit, background, incremental)
 
-def fetch_windsurf_ai_posts_by_scraping(subreddit=None, sort_by='hot', time_filter='all', limit=50, background=False):
+def fetch_windsurf_ai_posts_by_scraping(subreddit=None, sort_by='hot', time_filter='all', limit=50, background=False, incremental=False):
     """
     Fetch posts related to Windsurf AI by web scraping (fallback method)
     
@@ -481,13 +422,14 @@ def fetch_windsurf_ai_posts_by_scraping(subreddit=None, sort_by='hot', time_filt
         time_filter (str): Time filter for 'top' sort - 'all', 'day', 'week', 'month', 'year'
         limit (int): Maximum number of posts to fetch
         background (bool): Whether this is a background refresh
+        incremental (bool): Return only new or changed posts and leave the cache untouched
         
     Returns:
-        list: List of formatted posts
+        list: List of formatted posts, or None if an incremental fetch failed
     """
     try:
         # Check cache first if not a background task
-        if not background:
+        if not background and not incremental:
             cache_key = generate_cache_key(subreddit, sort_by, time_filter, 'scraper')
             cached_data = get_from_cache(cache_key)
             if cached_data:
@@ -513,8 +455,12 @@ def fetch_windsurf_ai_posts_by_scraping(subreddit=None, sort_by='hot', time_filt
             search_terms,
             sort=sort_by,
             time_filter=time_filter,
-            limit=scrape_limit
+            limit=scrape_limit,
+            incremental=incremental
         )
+        if posts is None:
+            logger.warning("Incremental scrape failed for every search")
+            return None
         
         # Mark the source as scraper
         for post in posts:
@@ -523,7 +469,7 @@ def fetch_windsurf_ai_posts_by_scraping(subreddit=None, sort_by='hot', time_filt
         logger.info(f"Successfully scraped {len(posts)} posts via web scraping")
         
         # Cache the results if not a background task
-        if not background and posts:
+        if not background and not incremental and posts:
             cache_key = generate_cache_key(subreddit, sort_by, time_filter, 'scraper')
             store_in_cache(cache_key, posts)
             
@@ -532,7 +478,14 @@ def fetch_windsurf_ai_posts_by_scraping(subreddit=None, sort_by='hot', time_filt
         logger.error(f"Error during web scraping: {e}")
         # If all else fails, return empty list (no more mock data)
         logger.warning("Web scraping failed. Returning empty list.")
-        return []
+        return None if incremental else []
+
+def fetch_reddit_updates(sort_by):
+    """Crawl every monitored subreddit for posts that are new or changed since the last crawl"""
+    return fetch_windsurf_ai_posts(None, sort_by, 'all', incremental=True)
+
+# Fetching runs in the ingest job; requests read the post store
+REDDIT_INGEST = RedditIngestJob(fetch_reddit_updates)
 
 @app.route('/api/posts', methods=['GET'])
 def get_posts():
@@ -545,6 +498,8 @@ def get_posts():
     use_mock = request.args.get('mock', 'false').lower() == 'true'
     use_scraper = request.args.get('scraper', 'false').lower() == 'true'
     bypass_cache = request.args.get('refresh', 'false').lower() == 'true'
+    limit = request.args.get('limit', 100, type=int)
+    offset = request.args.get('offset', 0, type=int)
     
     # Validate sort_by parameter
     valid_sort_options = ['hot', 'new', 'top', 'relevance']
@@ -560,22 +515,54 @@ def get_posts():
     data_source = 'mock' if use_mock else 'scraper' if use_scraper else 'api'
     cache_key = generate_cache_key(subreddit, sort_by, time_filter, data_source)
     
-    # Check if we can use cached data
+    # Serve from the indexed post store once the ingest job has filled it
+    if data_source != 'mock':
+        REDDIT_INGEST.ensure_started()
+        if bypass_cache:
+            REDDIT_INGEST.trigger()
+        elif reddit_db.has_posts():
+            posts = reddit_db.get_posts(
+                subreddit=subreddit,
+                sort_by=sort_by,
+                time_filter=time_filter,
+                search=search_term,
+                limit=limit,
+                offset=offset
+            )
+            return jsonify({
+                "posts": posts,
+                "metadata": {
+                    "total_posts": reddit_db.get_post_count(subreddit=subreddit, time_filter=time_filter, search=search_term),
+                    "subreddit": subreddit if subreddit else "all",
+                    "search_term": search_term if search_term else None,
+                    "sort": sort_by,
+                    "time_filter": time_filter,
+                    "timestamp": time.time(),
+                    "from_cache": False,
+                    "from_store": True,
+                    "source": data_source
+                }
+            })
+    
+    # Until the store has posts, serve them from the cache, letting the
+    # refresh scheduler know this key is in demand
+    if data_source != 'mock':
+        REFRESH_SCHEDULER.record_access(cache_key)
+    
+    # Check if we can use cached data, serving a stale copy while it refreshes
+    from_cache = False
     if not bypass_cache:
-        cached_data = get_from_cache(cache_key)
-        if cached_data:
-            posts = cached_data
-            # Trigger a background refresh if the cache is older than half its lifetime
-            with CACHE_LOCK:
-                if cache_key in CACHE:
-                    cache_timestamp = CACHE[cache_key][0]
-                    if time.time() - cache_timestamp > CACHE_TIMEOUT / 2:
-                        threading.Thread(target=background_refresh_cache).start()
+        cached_entry = CACHE.get_entry(cache_key, allow_stale=True)
+        if cached_entry and cached_entry[0]:
+            from_cache = True
+            posts, cache_age = cached_entry
+            if cache_age > CACHE_TIMEOUT:
+                REFRESH_SCHEDULER.wake()
         else:
-            posts = get_fresh_posts(subreddit, sort_by, time_filter, use_mock, use_scraper)
+            posts = POSTS_FLIGHT.do(cache_key, get_fresh_posts, subreddit, sort_by, time_filter, use_mock, use_scraper)
     else:
         # Force refresh of data
-        posts = get_fresh_posts(subreddit, sort_by, time_filter, use_mock, use_scraper)
+        posts = POSTS_FLIGHT.do(cache_key, get_fresh_posts, subreddit, sort_by, time_filter, use_mock, use_scraper)
     
     # Filter by search term if provided
     if search_term:
@@ -597,7 +584,7 @@ def get_posts():
             "sort": sort_by,
             "time_filter": time_filter,
             "timestamp": time.time(),
-            "from_cache": not bypass_cache and get_from_cache(cache_key) is not None,
+            "from_cache": from_cache,
             "source": data_source
         }
     }
@@ -619,6 +606,10 @@ def get_fresh_posts(subreddit, sort_by, time_filter, use_mock, use_scraper):
         logger.info("Fetching posts from Reddit API with fallbacks")
         posts = fetch_windsurf_ai_posts(subreddit, sort_by, time_filter)
     
+    # Keep everything fetched on the request path in the post store as well
+    if posts:
+        reddit_db.save_posts(posts)
+    
     # Store in cache
     data_source = 'mock' if use_mock else 'scraper' if use_scraper else 'api'
     cache_key = generate_cache_key(subreddit, sort_by, time_filter, data_source)
@@ -639,17 +630,23 @@ def get_search_terms():
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get stats about the API usage"""
+    cache_stats = CACHE.stats()
     return jsonify({
-        "rate_limit": {
-            "max_requests": RATE_LIMIT_REQUESTS,
-            "window_seconds": RATE_LIMIT_WINDOW,
-            "current_requests": len(request_timestamps)
-        },
+        "rate_limit": rate_limiter.get_stats(),
         "cache": {
-            "entries": len(CACHE),
-            "timeout_seconds": CACHE_TIMEOUT,
-            "last_update": datetime.fromtimestamp(CACHE_LAST_UPDATE).isoformat() if CACHE_LAST_UPDATE else None
+            **cache_stats,
+            "last_update": datetime.fromtimestamp(cache_stats["last_update"]).isoformat() if cache_stats["last_update"] else None,
+            "scraper": scraper_cache.stats(),
+            "refresh_scheduler": REFRESH_SCHEDULER.stats(),
+            "incremental_crawl": get_crawl_state().stats(),
+            "coalescing": {
+                "posts": POSTS_FLIGHT.stats(),
+                "scraper": SCRAPE_FLIGHT.stats()
+            }
         },
+        "http": http_client.get_stats(),
+        "reddit_ingest": {**REDDIT_INGEST.stats(), "stored_posts": reddit_db.get_post_count()},
+        "classification": get_classifier().stats() if LLM_CLASSIFIER_AVAILABLE else None,
         "subreddits_count": len(SUBREDDITS),
         "search_terms_count": len(SEARCH_TERMS)
     })
@@ -657,8 +654,7 @@ def get_stats():
 @app.route('/api/clear_cache', methods=['POST'])
 def clear_cache():
     """Manually clear the cache (administrative endpoint)"""
-    with CACHE_LOCK:
-        CACHE.clear()
+    CACHE.clear()
     clean_local_cache()
     return jsonify({"status": "success", "message": "Cache cleared successfully"})
 
@@ -674,30 +670,23 @@ def search_tweets():
     """
     query = request.args.get('query', '')
     sort_by = request.args.get('sort', 'new')
+    limit = request.args.get('limit', 50, type=int)
     
     logger.info(f"Searching tweets for query: '{query}', sort: {sort_by}")
     
     try:
-        # Get all tweets from the local database
-        all_tweets = twitter_db.get_all_tweets(sort_by=sort_by)
-        
-        # If we have tweets and a query, filter them
-        if all_tweets and query:
-            filtered_tweets = [t for t in all_tweets if query.lower() in t.get('content', '').lower()]
-            logger.info(f"Found {len(filtered_tweets)} tweets in local database matching query: '{query}'")
-            return jsonify({
-                "posts": filtered_tweets,
-                "source": "local_db",
-                "total": len(filtered_tweets)
-            })
+        # Matching tweets come from the full-text index, not from filtering every tweet here
+        if query:
+            tweets = twitter_db.search_local_tweets(query, limit=limit, sort_by=sort_by)
+        else:
+            tweets = twitter_db.get_all_tweets(limit=limit, sort_by=sort_by)
         
-        # If we have tweets and no query, return all
-        elif all_tweets and not query:
-            logger.info(f"Returning all {len(all_tweets)} tweets from local database")
+        if tweets:
+            logger.info(f"Found {len(tweets)} tweets in local database matching query: '{query}'")
             return jsonify({
-                "posts": all_tweets,
+                "posts": tweets,
                 "source": "local_db",
-                "total": len(all_tweets)
+                "total": twitter_db.count_local_tweets(query)
             })
     except Exception as e:
         logger.error(f"Error retrieving tweets from local database: {e}")
@@ -710,6 +699,94 @@ def search_tweets():
         "message": f"No tweets found for query: '{query}'"
     })
 
+@app.route('/api/search', methods=['GET'])
+def search_all_sources():
+    """
+    Full-text search across Cursor Forum topics and tweets
+    Parameters:
+    - q (str): Search text
+    - source (str): 'all' (default), 'cursor_forum' or 'twitter'
+    - limit (int): Maximum number of results per source
+    - offset (int): Number of results to skip per source
+    Returns:
+    - JSON response with ranked results and highlighted snippets per source
+    """
+    query = request.args.get('q', '')
+    source = request.args.get('source', 'all')
+    # SQLite reads a negative LIMIT as no limit
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    
+    searches = {
+        "cursor_forum": cursor_forum_db.search_topics,
+        "twitter": twitter_db.search_tweets,
+    }
+    if source != 'all' and source not in searches:
+        return jsonify({"error": f"Unknown source: {source}"}), 400
+    
+    results = {}
+    totals = {}
+    for name, search in searches.items():
+        if source in ('all', name):
+            results[name], totals[name] = search(query, limit=limit, offset=offset)
+    
+    return jsonify({
+        "query": query,
+        "results": results,
+        "total": totals
+    })
+
+@app.route('/api/feed', methods=['GET'])
+def get_feed():
+    """
+    Newest-first feed merged from Reddit, Twitter and the Cursor Forum
+    Parameters:
+    - limit (int): Posts per page (max 100)
+    - cursor (str): next_cursor of the previous page
+    - sources (str): Comma-separated sources (reddit, twitter, cursor_forum), default all
+    - time (str): Time window (all, day, week, month, year)
+    - q (str): Text every post must match
+    - classification (str): Only Cursor Forum topics with this primary classification
+    - quota (str): Per-page limits per source, e.g. 'reddit:10,twitter:5'
+    Returns:
+    - JSON response with feed items and the cursor of the next page
+    """
+    limit = max(1, min(request.args.get('limit', feed.DEFAULT_FEED_LIMIT, type=int), feed.MAX_FEED_LIMIT))
+    sources = [source.strip() for source in request.args.get('sources', '').split(',') if source.strip()]
+    
+    quotas = {}
+    for entry in request.args.get('quota', '').split(','):
+        if not entry.strip():
+            continue
+        source, _, value = entry.partition(':')
+        try:
+            quotas[source.strip()] = int(value)
+        except ValueError:
+            return jsonify({"error": f"Invalid quota: {entry}"}), 400
+        if quotas[source.strip()] < 0:
+            return jsonify({"error": f"Quota must not be negative: {entry}"}), 400
+    
+    try:
+        items, next_cursor = feed.get_feed(
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            sources=sources,
+            time_filter=request.args.get('time', 'all'),
+            search=request.args.get('q'),
+            classification=request.args.get('classification'),
+            quotas=quotas
+        )
+    except InvalidCursor as e:
+        return jsonify({"items": [], "error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error building feed: {e}")
+        return jsonify({"items": [], "error": str(e)}), 500
+    
+    return jsonify({
+        "items": items,
+        "next_cursor": next_cursor
+    })
+
 @app.route('/api/tweets/recent', methods=['GET'])
 def get_recent_tweets():
     """Get recent tweets"""
@@ -747,31 +824,53 @@ def get_cursor_forum_posts():
 
 @app.route('/api/cursor-forum/topics', methods=['GET'])
 def get_cursor_forum_topics():
-    """Get topics from the Cursor Forum with filter and sort options"""
+    """
+    Get topics from the Cursor Forum with filter and sort options
+    Parameters:
+    - sort (str): Sort order (new, top, hot)
+    - limit (int): Topics per page
+    - cursor (str): next_cursor of the previous page
+    - offset (int): Topics to skip, for clients that do not use cursors
+    - count (bool): Include the total number of topics (default true); may be up to a minute old
+    - search (str), category (str): Filters
+    Returns:
+    - JSON response with topics and the cursor of the next page
+    """
     try:
         # Get parameters from request
         sort_by = request.args.get('sort', 'new')
         limit = request.args.get('limit', 20, type=int)
         offset = request.args.get('offset', 0, type=int)
+        cursor = request.args.get('cursor')
         search = request.args.get('search')
         category = request.args.get('category')
         refresh = request.args.get('refresh', 'false').lower() == 'true'
+        include_count = request.args.get('count', 'true').lower() == 'true'
         
         # Get topics from the database
-        posts = cursor_forum_db.get_recent_topics(
-            limit=limit, 
-            offset=offset, 
-            sort_by=sort_by, 
-            category=category, 
-            search=search
-        )
+        try:
+            posts, next_cursor = cursor_forum_db.get_topics_page(
+                limit=limit, 
+                sort_by=sort_by, 
+                category=category, 
+                search=search,
+                cursor=cursor,
+                offset=offset
+            )
+        except InvalidCursor as e:
+            return jsonify({
+                "posts": [],
+                "total": 0,
+                "error": str(e)
+            }), 400
         
         # Get total count for pagination
-        total = cursor_forum_db.get_topic_count(category=category, search=search)
+        total = cursor_forum_db.get_topic_count(category=category, search=search, cached=True) if include_count else None
         
         return jsonify({
             "posts": posts,
             "total": total,
+            "next_cursor": next_cursor,
             "metadata": {
                 "from_cache": not refresh,
                 "source": "cursor_forum"
@@ -898,6 +997,7 @@ def classify_posts():
         source = request_data.get('source', 'cursor_forum')
         save_to_db = request_data.get('save_to_db', True)
         api_key = request_data.get('api_key', os.environ.get('OPENAI_API_KEY'))
+        batch_size = request_data.get('batch_size')  # Posts per LLM request
         
         # Validate limit
         try:
@@ -907,6 +1007,12 @@ def classify_posts():
         except:
             limit = 100
         
+        if batch_size is not None:
+            try:
+                batch_size = max(1, min(int(batch_size), 50))
+            except (TypeError, ValueError):
+                batch_size = None
+        
         # Initialize classifier
         classifier = get_classifier(api_key)
         
@@ -940,46 +1046,15 @@ def classify_posts():
         
         # Classify posts
         logger.info(f"Classifying {len(posts)} posts from {source}...")
-        classified_posts = classifier.classify_posts(posts)
+        classified_posts = classifier.classify_posts(posts, batch_size=batch_size)
         
         # Save classifications to database if requested
         if save_to_db and source == 'cursor_forum':
             logger.info("Saving classifications to database...")
-            
-            # Create database session
-            from sqlalchemy.orm import sessionmaker
-            engine = cursor_forum_db.get_engine()
-            Session = sessionmaker(bind=engine)
-            session = Session()
-            
-            for post_data in classified_posts:
-                post_id = post_data.get('id')
-                if not post_id:
-                    continue
-                
-                # Get post from database
-                post = session.query(DiscoursePost).filter(DiscoursePost.id == post_id).first()
-                if not post:
-                    continue
-                
-                # Update post with classification data
-                try:
-                    # Use setattr for SQLAlchemy models to avoid linter errors
-                    setattr(post, 'classifications', post_data.get('classifications', []))
-                    setattr(post, 'primary_classification', post_data.get('primary_classification', 'neutral'))
-                    setattr(post, 'classified_at', datetime.utcnow())
-                except Exception as e:
-                    logger.error(f"Error updating post {post_id}: {e}")
-            
-            # Commit changes
             try:
-                session.commit()
-                logger.info("Classifications saved to database")
+                cursor_forum_db.save_classifications(classified_posts)
             except Exception as e:
-                session.rollback()
                 logger.error(f"Error committing classifications to database: {e}")
-            finally:
-                session.close()
         
         # Return classified posts
         return jsonify({
@@ -996,6 +1071,52 @@ def classify_posts():
             "message": str(e)
         }), 500
 
+@app.route('/api/classification-jobs', methods=['POST'])
+def create_classification_job():
+    """
+    Queue a background job classifying the unclassified Cursor Forum topics
+    Parameters (JSON body):
+    - limit (int): Maximum number of topics, all unclassified topics if omitted
+    - chunk_size (int): Topics classified and committed together
+    Returns:
+    - The queued job, with 202 Accepted
+    """
+    if not LLM_CLASSIFIER_AVAILABLE:
+        return jsonify({
+            "error": "LLM classifier is not available",
+            "message": "Please install the required packages: pip install openai"
+        }), 503
+    if not get_classifier().is_available():
+        return jsonify({
+            "error": "LLM classifier initialization failed",
+            "message": "Please check your API key and OpenAI package installation"
+        }), 503
+    
+    request_data = request.get_json(silent=True) or {}
+    try:
+        limit = request_data.get('limit')
+        limit = max(1, int(limit)) if limit is not None else None
+        chunk_size = int(request_data.get('chunk_size', classification_jobs.DEFAULT_CHUNK_SIZE))
+    except (TypeError, ValueError):
+        return jsonify({"error": "limit and chunk_size must be integers"}), 400
+    
+    job = CLASSIFICATION_JOBS.enqueue(max_posts=limit, chunk_size=chunk_size)
+    return jsonify({"job": job}), 202
+
+@app.route('/api/classification-jobs', methods=['GET'])
+def list_classification_jobs():
+    """Get the most recent classification jobs, newest first"""
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    return jsonify({"jobs": cursor_forum_db.get_classification_jobs(limit=limit)})
+
+@app.route('/api/classification-jobs/<int:job_id>', methods=['GET'])
+def get_classification_job(job_id):
+    """Get the status, progress, throughput and ETA of a classification job"""
+    job = cursor_forum_db.get_classification_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Classification job {job_id} not found"}), 404
+    return jsonify({"job": job})
+
 # Get classification categories
 @app.route('/api/classification-categories', methods=['GET'])
 def get_classification_categories():
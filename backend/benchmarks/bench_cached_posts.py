@@ -0,0 +1,94 @@
+"""
+Benchmark: stdlib vs orjson encoding of /api/posts pages
+
+Times building the response for a page of posts two ways: the previous path
+(posts encoded by the stdlib jsonify, plus the second cache lookup for
+from_cache) and the current one, where jsonify goes through
+responses.FastJSONProvider. Store-backed pages and cache hits are encoded
+the same way.
+
+Usage:
+    python benchmarks/bench_cached_posts.py [--posts 500]
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+import responses
+from cache import TTLCache
+
+REPEATS = 200
+KEY = "all:hot:all:api"
+
+def make_posts(count):
+    """Synthetic posts shaped like the Reddit feed"""
+    return [{
+        "id": f"post{i}",
+        "title": f"Windsurf question number {i} about the editor",
+        "content": "Some body text about Windsurf and Codeium. " * 10,
+        "author": f"user{i % 97}",
+        "subreddit": "Codeium",
+        "score": i % 500,
+        "num_comments": i % 50,
+        "created_utc": 1700000000.0 + i,
+        "url": f"https://reddit.com/r/Codeium/comments/post{i}",
+        "permalink": f"/r/Codeium/comments/post{i}",
+        "is_self": True,
+    } for i in range(count)]
+
+def metadata(count):
+    """Per-request metadata of a cache hit"""
+    return {"total_posts": count, "subreddit": "all", "search_term": None, "sort": "hot",
+            "time_filter": "all", "timestamp": time.time(), "from_cache": True, "source": "api"}
+
+def best_of(fn):
+    """Fastest of REPEATS runs in milliseconds"""
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=500, help="Posts in the cached list")
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    plain_cache = TTLCache("plain")
+    plain_cache.set(KEY, make_posts(args.posts))
+
+    stdlib_app = Flask("stdlib")
+    fast_app = Flask("fast")
+    fast_app.json = responses.FastJSONProvider(fast_app)
+
+    def before():
+        cached = plain_cache.get_entry(KEY, allow_stale=True)[0]
+        plain_cache.get(KEY)  # The second lookup that filled from_cache
+        with stdlib_app.app_context():
+            return jsonify({"posts": cached, "metadata": metadata(len(cached))}).get_data()
+
+    def fast_encoder():
+        cached = plain_cache.get_entry(KEY, allow_stale=True)[0]
+        with fast_app.app_context():
+            return jsonify({"posts": cached, "metadata": metadata(len(cached))}).get_data()
+
+    assert json.loads(before())["posts"] == json.loads(fast_encoder())["posts"]
+
+    before_ms = best_of(before)
+    fast_ms = best_of(fast_encoder)
+    print(f"orjson available: {responses.ORJSON_AVAILABLE}")
+    print(f"{args.posts} posts: stdlib {before_ms:7.3f} ms, fast provider {fast_ms:7.3f} ms "
+          f"({before_ms / fast_ms:5.1f}x faster than before)")
+
+if __name__ == "__main__":
+    main()
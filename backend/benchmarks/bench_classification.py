@@ -0,0 +1,84 @@
+"""
+Benchmark: sequential vs concurrent vs batched post classification
+
+Runs LLMClassifier.classify_posts against a local fake OpenAI server and
+reports posts per second, requests and prompt size for one request per post
+in sequence (the previous behavior), one request per post on several
+workers, and batched requests on several workers. A last run puts the fake
+server behind a request rate limit to show the 429 backoff at work.
+
+Usage:
+    python benchmarks/bench_classification.py [--posts 200] [--latency 0.2] [--workers 8]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rate_limiter
+from benchmarks.fake_openai_server import FakeOpenAIServer
+
+def make_posts(count):
+    """Synthetic forum topics"""
+    return [{
+        "id": i,
+        "title": f"How do I configure the editor for project {i}?",
+        "content": "I am trying to set up the editor and something goes wrong. " * 8,
+    } for i in range(count)]
+
+def run(server, posts, batch_size, workers, requests_per_minute=10000):
+    """Classify posts with a fresh classifier and budget, returning (seconds, requests, prompt chars)"""
+    import llm_classifier
+
+    rate_limiter.configure(llm_classifier.REQUEST_LIMITER_NAME, rate_per_minute=requests_per_minute)
+    rate_limiter.configure(llm_classifier.TOKEN_LIMITER_NAME, rate_per_minute=10 ** 8)
+    classifier = llm_classifier.LLMClassifier(api_key="benchmark")
+    start_requests, start_chars = server.request_count, server.prompt_chars
+    started = time.perf_counter()
+    classified = classifier.classify_posts(posts, batch_size=batch_size, workers=workers)
+    elapsed = time.perf_counter() - started
+    assert [post["id"] for post in classified] == [post["id"] for post in posts]
+    assert all(post["classifications"] == ["question"] for post in classified)
+    return elapsed, server.request_count - start_requests, server.prompt_chars - start_chars
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=200, help="Posts to classify")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake server latency in seconds")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent requests")
+    parser.add_argument("--batch-size", type=int, default=10, help="Posts per batched request")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    # Every request should reach the fake server, not the classification cache or the pre-classifier
+    os.environ["CLASSIFICATION_CACHE"] = "false"
+    os.environ["PRE_CLASSIFIER"] = "false"
+    # Size the classifier's connection pool for the workers
+    os.environ["CLASSIFICATION_WORKERS"] = str(args.workers)
+    posts = make_posts(args.posts)
+
+    with FakeOpenAIServer(latency=args.latency) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        runs = [
+            ("sequential", 1, 1),
+            ("concurrent", 1, args.workers),
+            ("batched", args.batch_size, args.workers),
+        ]
+        for name, batch_size, workers in runs:
+            elapsed, requests, prompt_chars = run(server, posts, batch_size, workers)
+            print(f"{name:>10}: {elapsed:6.2f}s, {args.posts / elapsed:7.1f} posts/s, "
+                  f"{requests:4d} requests, {prompt_chars // 1000:5d}k prompt chars")
+
+    # The server allows 10 requests a second, half the client's budget, so the client has to back off
+    with FakeOpenAIServer(latency=args.latency, rate_limit=10, window_seconds=1, retry_after=1) as server:
+        os.environ["OPENAI_BASE_URL"] = server.base_url
+        elapsed, requests, _ = run(server, posts[:40], 1, args.workers, requests_per_minute=1200)
+        print(f"{'limited':>10}: {elapsed:6.2f}s for 40 posts, {requests} requests, "
+              f"{server.rejected_count} answered with 429")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: sequential vs concurrent multi-subreddit scraping
+
+Runs scrape_reddit_multiple_subreddits against a local fake old.reddit server
+and compares it with the previous one-after-another loop.
+
+Usage:
+    python benchmarks/bench_concurrent_scrape.py [--latency 0.15]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client
+import rate_limiter
+import scraper
+from benchmarks.fake_reddit_server import FakeRedditServer
+
+SUBREDDITS = ["programming", "Python", "javascript", "webdev", "coding"]
+SEARCH_TERMS = ["windsurf IDE", "codeium"]
+
+def reset_scraper_state():
+    """Start every run from a cold cache and an empty request budget"""
+    scraper.CACHE.clear()
+    rate_limiter.configure(scraper.RATE_LIMITER_NAME, rate_per_minute=1000)
+
+def run_sequential():
+    reset_scraper_state()
+    posts = []
+    for term in SEARCH_TERMS:
+        for subreddit in SUBREDDITS:
+            posts.extend(scraper.scrape_reddit_subreddit(subreddit, term, sort="new", limit=25))
+    return posts
+
+def run_concurrent():
+    reset_scraper_state()
+    return scraper.scrape_reddit_multiple_subreddits(SUBREDDITS, SEARCH_TERMS, sort="new", limit=25)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.15, help="Fake server latency in seconds")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    with FakeRedditServer(latency=args.latency) as server:
+        scraper.OLD_REDDIT_BASE_URL = server.base_url
+        combinations = len(SUBREDDITS) * len(SEARCH_TERMS)
+
+        for name, runner in (("sequential", run_sequential), ("concurrent", run_concurrent)):
+            start = server.request_count
+            started = time.perf_counter()
+            posts = runner()
+            elapsed = time.perf_counter() - started
+            print(f"{name:>10}: {elapsed:6.2f}s for {server.request_count - start} requests "
+                  f"({combinations} combinations, {len(posts)} posts)")
+
+        stats = http_client.get_stats()
+        print(f"connections: {stats['new_connections']} opened, {stats['reused_connections']} reused")
+
+if __name__ == "__main__":
+    main()
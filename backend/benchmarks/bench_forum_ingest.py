@@ -0,0 +1,107 @@
+"""
+Benchmark: per-topic vs bulk upsert ingestion of Cursor Forum topics
+
+Saves synthetic Discourse topics into a temporary database twice, once as new
+topics and once as updates to them, with the previous query-per-topic
+save_topics and with the bulk upsert, and reports rows per second.
+
+Usage:
+    python benchmarks/bench_forum_ingest.py [--topics 100000] [--legacy-topics 10000]
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+import cursor_forum_db
+from models.discourse_post import Base, DiscoursePost
+
+def make_topics(count, views_offset=0):
+    """Build synthetic topics shaped like cursor_forum_api output"""
+    now = datetime.datetime(2025, 1, 1)
+    return [
+        {
+            "post_id": str(100000 + i),
+            "title": f"Synthetic topic {i} about Cursor rules",
+            "author": f"user{i % 500}",
+            "content": f"Body of synthetic topic {i}. " * 5,
+            "url": f"https://forum.cursor.com/t/topic-{i}/{100000 + i}",
+            "likes": i % 40,
+            "replies": i % 25,
+            "views": (i * 7) % 5000 + views_offset,
+            "category": ["Bug Report", "Feature Request", "Discussion", "How To"][i % 4],
+            "popular": i % 10 == 0,
+            "created_at": (now - datetime.timedelta(minutes=i)).isoformat() + "Z",
+        }
+        for i in range(count)
+    ]
+
+def legacy_save_topics(topics):
+    """The previous save_topics: one SELECT and one ORM add or update per topic"""
+    session = cursor_forum_db.SessionLocal()
+    new_count = 0
+    try:
+        for topic in topics:
+            existing = session.query(DiscoursePost).filter_by(post_id=topic["post_id"]).first()
+            if not existing:
+                session.add(DiscoursePost(**cursor_forum_db._topic_row(topic, datetime.datetime.utcnow())))
+                new_count += 1
+            else:
+                existing.views = topic.get("views", existing.views)
+                existing.replies = topic.get("replies", existing.replies)
+                existing.likes = topic.get("likes", existing.likes)
+                existing.popular = topic.get("popular", existing.popular)
+                existing.scraped_at = datetime.datetime.utcnow()
+        session.commit()
+        return new_count
+    finally:
+        session.close()
+
+def use_database(path, unique_index):
+    """Point cursor_forum_db at a fresh database file"""
+    engine = create_engine(f"sqlite:///{path}")
+    cursor_forum_db.engine = engine
+    cursor_forum_db.SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+    if unique_index:
+        Base.metadata.create_all(bind=engine)
+    else:
+        # The previous schema had no index on post_id
+        DiscoursePost.__table__.indexes.clear()
+        Base.metadata.create_all(bind=engine)
+
+def measure(name, save, count):
+    """Ingest count topics as inserts, then again as updates"""
+    for phase, topics in (("insert", make_topics(count)), ("update", make_topics(count, views_offset=1))):
+        started = time.perf_counter()
+        new_count = save(topics)
+        elapsed = time.perf_counter() - started
+        print(f"{name:>7} {phase}: {count:7d} topics in {elapsed:7.2f}s "
+              f"({count / elapsed:9.0f} rows/s, {new_count} new)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topics", type=int, default=100000, help="Topics ingested by the bulk upsert")
+    parser.add_argument("--legacy-topics", type=int, default=10000,
+                        help="Topics ingested by the per-topic path (it slows down quadratically)")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(os.path.join(tmp, "bulk.db"), unique_index=True)
+        measure("bulk", cursor_forum_db.save_topics, args.topics)
+
+        use_database(os.path.join(tmp, "legacy.db"), unique_index=False)
+        measure("legacy", legacy_save_topics, args.legacy_topics)
+
+if __name__ == "__main__":
+    main()
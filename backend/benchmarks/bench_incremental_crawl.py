@@ -0,0 +1,113 @@
+"""
+Benchmark: full re-crawls vs incremental crawls of a growing search feed
+
+Polls a sort=new search on a local fake old.reddit server whose feed gains new
+posts between polls, and compares re-downloading the first page every time
+with crawling incrementally from the stored high-water marks. A last check
+scrapes the search sorted by 'hot' between two 'new' crawls and makes sure
+the incremental crawl still returns every post published in between.
+
+Usage:
+    python benchmarks/bench_incremental_crawl.py [--feed-size 200]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import crawl_state
+import rate_limiter
+import scraper
+from benchmarks.fake_reddit_server import FakeRedditServer
+
+SUBREDDIT = "programming"
+SEARCH_TERM = "codeium"
+NEW_POSTS_PER_POLL = [3, 0, 10, 1, 40, 5]
+
+class ParseCounter:
+    """Wraps the scraper's parser to count parsed posts and parse time"""
+
+    def __init__(self, parse):
+        self.parse = parse
+        self.posts = 0
+        self.seconds = 0.0
+
+    def __call__(self, *args, **kwargs):
+        started = time.perf_counter()
+        posts = self.parse(*args, **kwargs)
+        self.seconds += time.perf_counter() - started
+        self.posts += len(posts)
+        return posts
+
+def run_polls(server, incremental, state_path, feed_size):
+    """Seed the crawl state, then poll once per feed update"""
+    crawl_state._crawl_state = crawl_state.CrawlState(state_path)
+    rate_limiter.configure(scraper.RATE_LIMITER_NAME, rate_per_minute=10000)
+    server.feed_size = feed_size
+
+    # Initial full crawl, as done by the first request for a feed
+    scraper.CACHE.clear()
+    scraper.scrape_reddit_subreddit(SUBREDDIT, SEARCH_TERM, sort="new", limit=25)
+
+    counter = ParseCounter(scraper.parse_search_results)
+    scraper.parse_search_results = counter
+    start_requests = server.request_count
+    emitted = 0
+    try:
+        for new_posts in NEW_POSTS_PER_POLL:
+            server.publish(new_posts)
+            scraper.CACHE.clear()
+            posts = scraper.scrape_reddit_subreddit(
+                SUBREDDIT, SEARCH_TERM, sort="new", limit=100 if incremental else 25, incremental=incremental
+            )
+            emitted += len(posts)
+    finally:
+        scraper.parse_search_results = counter.parse
+
+    return {
+        "requests": server.request_count - start_requests,
+        "parsed": counter.posts,
+        "parse_ms": counter.seconds * 1000,
+        "emitted": emitted,
+    }
+
+def check_hot_scrape_between(server, state_path, feed_size, published=5):
+    """A hot scrape of freshly published posts must not hide them from the next incremental 'new' crawl"""
+    crawl_state._crawl_state = crawl_state.CrawlState(state_path)
+    server.feed_size = feed_size
+    scraper.CACHE.clear()
+    scraper.scrape_reddit_subreddit(SUBREDDIT, SEARCH_TERM, sort="new", limit=25)
+
+    server.publish(published)
+    # The fake server ignores sort, so this page holds the new posts too
+    scraper.scrape_reddit_subreddit(SUBREDDIT, SEARCH_TERM, sort="hot", limit=25)
+    scraper.CACHE.clear()
+    posts = scraper.scrape_reddit_subreddit(SUBREDDIT, SEARCH_TERM, sort="new", limit=100, incremental=True)
+    assert len(posts) == published, f"incremental crawl after a hot scrape returned {len(posts)} of {published} new posts"
+    return len(posts)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--feed-size", type=int, default=200, help="Posts in the feed before polling")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    published = sum(NEW_POSTS_PER_POLL)
+
+    with tempfile.TemporaryDirectory() as tmp, FakeRedditServer(latency=0, feed_size=args.feed_size) as server:
+        scraper.OLD_REDDIT_BASE_URL = server.base_url
+        print(f"{len(NEW_POSTS_PER_POLL)} polls, {published} posts published between polls")
+        for name, incremental in (("full", False), ("incremental", True)):
+            result = run_polls(server, incremental, os.path.join(tmp, f"{name}.db"), args.feed_size)
+            print(f"{name:>12}: {result['requests']:3d} requests, {result['parsed']:4d} posts parsed "
+                  f"({result['parse_ms']:6.1f} ms), {result['emitted']:4d} posts emitted")
+        found = check_hot_scrape_between(server, os.path.join(tmp, "hot_then_new.db"), args.feed_size)
+        print(f"{'hot, new':>12}: {found} posts published before the hot scrape returned by the new crawl")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: local pre-classifier agreement, coverage and speed
+
+Trains pre_classifier.PreClassifier on synthetic topics labeled as the LLM
+would label them, then reports its holdout agreement with those labels, the
+share of posts it is confident enough to label without the LLM and its
+prediction throughput over batches of posts.
+
+Usage:
+    python benchmarks/bench_pre_classifier.py [--posts 5000] [--seed 0]
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pre_classifier
+
+# Words typical of each label; every topic also mixes in words of other labels and filler
+VOCABULARY = {
+    "question": ["how", "configure", "anyone", "know", "setting", "where", "docs", "possible", "way"],
+    "bug_report": ["crash", "error", "broken", "version", "stacktrace", "fails", "after", "update", "reproduce"],
+    "feature_suggestion": ["add", "support", "option", "would", "nice", "request", "ability", "integrate"],
+    "frustration": ["slow", "annoying", "again", "pay", "useless", "tired", "subscription", "worse"],
+    "positive_feedback": ["love", "great", "thanks", "team", "amazing", "productive", "best"],
+    "trending_topic": ["new", "model", "release", "announced", "claude", "gpt", "today", "launch"],
+    "neutral": ["share", "project", "blog", "wrote", "link", "post", "made"],
+}
+FILLER = "the a i it to and is of in for with this my editor cursor code file".split()
+
+def make_topics(count, seed):
+    """Synthetic labeled forum topics"""
+    rnd = random.Random(seed)
+    labels = list(VOCABULARY)
+    topics = []
+    for i in range(count):
+        label = rnd.choice(labels)
+        words = ([rnd.choice(VOCABULARY[label]) for _ in range(6)]
+                 + [rnd.choice(VOCABULARY[rnd.choice(labels)]) for _ in range(3)]
+                 + [rnd.choice(FILLER) for _ in range(25)])
+        rnd.shuffle(words)
+        topics.append({
+            "id": i,
+            "title": " ".join(words[:6]),
+            "content": " ".join(words[6:]),
+            "primary_classification": label,
+        })
+    return topics
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--posts", type=int, default=5000, help="Labeled topics to train on")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if not pre_classifier.NUMPY_AVAILABLE:
+        sys.exit("numpy is required to train the pre-classifier")
+    logging.disable(logging.WARNING)
+    classifier = pre_classifier.PreClassifier()
+
+    started = time.perf_counter()
+    result = classifier.train(make_topics(args.posts, args.seed))
+    print(f"training: {time.perf_counter() - started:6.2f}s on {args.posts} topics")
+    print(f"holdout: {result['holdout_agreement']:.1%} agreement, confident on "
+          f"{result['holdout_confident_share']:.1%} with {result['holdout_confident_agreement']:.1%} agreement")
+
+    # Unseen topics, classified the way classify_posts does it
+    topics = make_topics(2000, args.seed + 1)
+    started = time.perf_counter()
+    decisions = [decision for start in range(0, len(topics), 50)
+                 for decision in classifier.predict(topics[start:start + 50])]
+    elapsed = time.perf_counter() - started
+    confident = [(topic, label) for topic, (label, confidence) in zip(topics, decisions)
+                 if classifier.confident(confidence)]
+    agreement = sum(1 for topic, label in confident if label == topic["primary_classification"])
+    print(f"predict: {len(topics) / elapsed:8.0f} posts/s in batches of 50")
+    print(f"unseen: {len(confident) / len(topics):.1%} labeled locally (LLM calls avoided), "
+          f"{agreement / max(len(confident), 1):.1%} agreement")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Micro-benchmark: BeautifulSoup vs lxml XPath parsing of old.reddit search pages
+
+Parses every saved HTML fixture with both parsers, checks that they produce
+identical post dictionaries, and reports parse time and allocations per page.
+Allocations come from tracemalloc, which only sees Python-level memory
+(libxml2's own tree lives outside it for both parsers).
+
+Usage:
+    python benchmarks/bench_reddit_parser.py [--iterations 200]
+"""
+
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from reddit_parser import _format_post, parse_search_results
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def parse_search_results_soup(html, subreddit, limit=25, now=None):
+    """
+    Parse an old.reddit search results page with BeautifulSoup (the parser reddit_parser replaced)
+
+    Args:
+        html (str): Page HTML
+        subreddit (str): Subreddit the search was restricted to
+        limit (int): Maximum number of posts to return
+        now (int, optional): Timestamp used as created_utc, defaults to the current time
+
+    Returns:
+        list: List of formatted posts
+    """
+    now = int(time.time()) if now is None else now
+    soup = BeautifulSoup(html, 'lxml')
+
+    posts = soup.find_all('div', class_='thing')
+
+    formatted_posts = []
+    for post in posts[:limit]:
+        try:
+            post_id = post.get('data-fullname', '').replace('t3_', '')
+            if not post_id:
+                continue
+
+            title_elem = post.find('a', class_='title')
+            score_elem = post.find('div', class_='score unvoted')
+            snippet_elem = post.find('div', class_='search-result-snippet')
+            thumbnail_elem = post.find('a', class_='thumbnail')
+            img = thumbnail_elem.find('img') if thumbnail_elem else None
+            author_elem = post.find('a', class_='author')
+            comments_elem = post.find('a', class_='comments')
+
+            formatted_posts.append(_format_post(
+                subreddit,
+                post_id,
+                title=title_elem.text.strip() if title_elem else 'No title',
+                permalink=title_elem.get('href', '') if title_elem else '',
+                score_title=score_elem.get('title', '') if score_elem else '',
+                content_preview=snippet_elem.text.strip() if snippet_elem else '',
+                image_src=img.attrs.get('src') if img else None,
+                author=author_elem.text.strip() if author_elem else '[deleted]',
+                comments_text=comments_elem.text.strip() if comments_elem else '0 comments',
+                now=now,
+            ))
+        except Exception as e:
+            print(f"Error parsing post: {e}")
+
+    return formatted_posts
+
+PARSERS = (("soup", parse_search_results_soup), ("lxml", parse_search_results))
+
+def time_per_page(parser, html, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        parser(html, "programming", limit=100, now=0)
+    return (time.perf_counter() - started) / iterations
+
+def allocations_per_page(parser, html):
+    tracemalloc.start()
+    parser(html, "programming", limit=100, now=0)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return peak, blocks
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="Parses per fixture and parser")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    for path in sorted(glob.glob(os.path.join(FIXTURES_DIR, "old_reddit_search_*.html"))):
+        with open(path, encoding="utf-8") as f:
+            html = f.read()
+
+        expected = parse_search_results_soup(html, "programming", limit=100, now=0)
+        actual = parse_search_results(html, "programming", limit=100, now=0)
+        status = "identical" if actual == expected else "MISMATCH"
+        print(f"{os.path.basename(path)} ({len(html) / 1024:.1f} KiB, {len(expected)} posts, output {status})")
+
+        for name, parse in PARSERS:
+            seconds = time_per_page(parse, html, args.iterations)
+            peak, blocks = allocations_per_page(parse, html)
+            print(f"  {name:>5}: {seconds * 1000:7.3f} ms/page, peak {peak / 1024:8.1f} KiB, {blocks:6d} retained blocks")
+
+if __name__ == "__main__":
+    main()
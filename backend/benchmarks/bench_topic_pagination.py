@@ -0,0 +1,70 @@
+"""
+Benchmark: OFFSET vs keyset pagination of Cursor Forum topics
+
+Fills a temporary database with synthetic topics and times fetching a page at
+increasing depths, once by skipping rows with OFFSET and once by seeking from
+the cursor of the previous page.
+
+Usage:
+    python benchmarks/bench_topic_pagination.py [--topics 200000] [--page-size 20]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cursor_forum_db
+import migrations
+from benchmarks.bench_forum_ingest import make_topics, use_database
+
+DEPTHS = [1, 100, 1000, 5000]
+REPEATS = 5
+
+def cursor_at(depth, page_size, sort_by):
+    """Walk to the cursor that starts page `depth`, as a client paging forward would"""
+    cursor = None
+    for _ in range(depth - 1):
+        _, cursor = cursor_forum_db.get_topics_page(limit=page_size, sort_by=sort_by, cursor=cursor)
+    return cursor
+
+def best_of(fn):
+    """Fastest of REPEATS runs in milliseconds"""
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topics", type=int, default=200000, help="Topics in the database")
+    parser.add_argument("--page-size", type=int, default=20, help="Topics per page")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    depths = [depth for depth in DEPTHS if (depth - 1) * args.page_size < args.topics]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "topics.db")
+        use_database(path, unique_index=True)
+        migrations.migrate("cursor_forum", path)
+        cursor_forum_db.save_topics(make_topics(args.topics))
+
+        for sort_by in ("new", "top"):
+            for depth in depths:
+                offset = (depth - 1) * args.page_size
+                cursor = cursor_at(depth, args.page_size, sort_by)
+                offset_ms = best_of(lambda: cursor_forum_db.get_topics_page(
+                    limit=args.page_size, sort_by=sort_by, offset=offset))
+                cursor_ms = best_of(lambda: cursor_forum_db.get_topics_page(
+                    limit=args.page_size, sort_by=sort_by, cursor=cursor))
+                print(f"{sort_by:>4} page {depth:5d}: offset {offset_ms:7.2f} ms, cursor {cursor_ms:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark: ORM + to_dict vs lean Core reads of Cursor Forum topic pages
+
+Times reading 20-, 100- and 1000-topic pages three ways: the previous
+read path (ORM objects, to_dict, and INFO logs for the query, every topic and
+every conversion), the same ORM path without the logging, and the current
+get_topics_page, which selects plain rows. Logs are formatted and written to
+os.devnull, so their cost is counted without flooding the terminal.
+
+Usage:
+    python benchmarks/bench_topic_reads.py [--topics 20000]
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cursor_forum_db
+import migrations
+from benchmarks.bench_forum_ingest import make_topics, use_database
+from models.discourse_post import DiscoursePost
+
+PAGE_SIZES = [20, 100, 1000]
+REPEATS = 20
+
+logger = logging.getLogger("cursor_forum_db")
+
+def orm_read(limit, log):
+    """The previous get_recent_topics for sort_by='new'"""
+    session = cursor_forum_db.SessionLocal()
+    try:
+        query = session.query(DiscoursePost).order_by(DiscoursePost.created_at.desc())
+        if log:
+            logger.info(f"SQL Query: {query}")
+        topics = query.limit(limit).all()
+        if log:
+            logger.info(f"Found {len(topics)} topics in database")
+            for i, topic in enumerate(topics):
+                logger.info(f"Topic {i+1}: ID={topic.id}, Title={topic.title}, Created={topic.created_at}")
+        result = []
+        for topic in topics:
+            if log:
+                # The lines DiscoursePost.to_dict used to log on every call
+                logger.info(f"Converting DiscoursePost to dict: ID={topic.id}, Title={topic.title}")
+                logger.info(f"Formatted created_at: {topic.created_at}")
+            topic_dict = topic.to_dict()
+            result.append(topic_dict)
+            if log:
+                logger.info(f"Converted topic {topic.id} to dict: {topic_dict.get('title')}")
+        return result
+    finally:
+        session.close()
+
+def best_of(fn):
+    """Fastest of REPEATS runs in milliseconds"""
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--topics", type=int, default=20000, help="Topics in the database")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        logging.disable(logging.WARNING)
+        path = os.path.join(tmp, "topics.db")
+        use_database(path, unique_index=True)
+        migrations.migrate("cursor_forum", path)
+        cursor_forum_db.save_topics(make_topics(args.topics))
+
+        # Log at INFO as the app does, into a sink
+        logging.disable(logging.NOTSET)
+        logging.basicConfig(level=logging.INFO, stream=devnull, force=True,
+                            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+        for limit in PAGE_SIZES:
+            legacy_ms = best_of(lambda: orm_read(limit, log=True))
+            orm_ms = best_of(lambda: orm_read(limit, log=False))
+            core_ms = best_of(lambda: cursor_forum_db.get_topics_page(limit=limit, sort_by="new"))
+            print(f"{limit:5d} rows: ORM+logging {legacy_ms:8.2f} ms, ORM {orm_ms:8.2f} ms, "
+                  f"Core {core_ms:8.2f} ms ({legacy_ms / core_ms:4.1f}x faster than before)")
+
+if __name__ == "__main__":
+    main()
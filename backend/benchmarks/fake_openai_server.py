@@ -0,0 +1,121 @@
+"""
+Local fake OpenAI chat completion server used by the classification benchmarks
+
+Serves POST /v1/chat/completions with a configurable artificial latency. The
+reply classifies every post in the prompt as a question: a JSON array for
+single-post prompts, or a JSON object keyed by post ID for batch prompts.
+With rate_limit set, requests beyond that many per window_seconds (a sliding
+window, a minute by default) get a 429 with a Retry-After header, like the
+real API.
+"""
+
+import json
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BATCH_POSTS_PATTERN = re.compile(r"Posts \(JSON array\):\s*(\[.*\])")
+
+def classify_prompt(prompt):
+    """Reply text for a classification prompt"""
+    match = BATCH_POSTS_PATTERN.search(prompt)
+    if match is None:
+        return '["question"]'
+    posts = json.loads(match.group(1))
+    return json.dumps({post["id"]: ["question"] for post in posts})
+
+class FakeOpenAIServer:
+    """Threaded local HTTP server answering chat completion requests"""
+
+    def __init__(self, latency=0.2, rate_limit=None, window_seconds=60, retry_after=1):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.window_seconds = window_seconds
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.rejected_count = 0
+        self.prompt_chars = 0
+        self._accepted = deque()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def _admit(self):
+        """Count a request, returning False if it exceeds the rate limit"""
+        now = time.monotonic()
+        with self._lock:
+            self.request_count += 1
+            if self.rate_limit is not None:
+                while self._accepted and now - self._accepted[0] >= self.window_seconds:
+                    self._accepted.popleft()
+                if len(self._accepted) >= self.rate_limit:
+                    self.rejected_count += 1
+                    return False
+                self._accepted.append(now)
+            return True
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections alive like the real API
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                if not server._admit():
+                    self._send_json(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                    {"Retry-After": str(server.retry_after)})
+                    return
+                time.sleep(server.latency)
+                prompt = request["messages"][-1]["content"]
+                prompt_chars = sum(len(message["content"]) for message in request["messages"])
+                with server._lock:
+                    server.prompt_chars += prompt_chars
+                reply = classify_prompt(prompt)
+                self._send_json(200, {
+                    "id": "chatcmpl-fake",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [{
+                        "index": 0,
+                        "message": {"role": "assistant", "content": reply},
+                        "finish_reason": "stop"
+                    }],
+                    "usage": {
+                        "prompt_tokens": prompt_chars // 4,
+                        "completion_tokens": len(reply) // 4,
+                        "total_tokens": prompt_chars // 4 + len(reply) // 4
+                    }
+                })
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,140 @@
+"""
+Local fake old.reddit server used by the scraper benchmarks
+
+Serves search result pages shaped like old.reddit.com/r/<subreddit>/search,
+with a configurable artificial latency per request. With feed_size set, each
+subreddit serves a newest-first feed that grows via publish() and is paginated
+with the after parameter, like sort=new searches.
+"""
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+POST_TEMPLATE = """
+<div class="thing id-t3_{post_id} link" data-fullname="t3_{post_id}" data-subreddit="{subreddit}">
+  <p class="parent"></p>
+  <div class="midcol unvoted">
+    <div class="score unvoted" title="{score}">{score}</div>
+  </div>
+  <a class="thumbnail may-blank" href="/r/{subreddit}/comments/{post_id}/post_{index}/">
+    <img src="https://b.thumbs.redditmedia.com/thumbnail_{post_id}.jpg" width="70" height="52" alt="">
+  </a>
+  <div class="entry unvoted">
+    <div class="top-matter">
+      <p class="title"><a class="title may-blank" href="/r/{subreddit}/comments/{post_id}/post_{index}/">Windsurf post {index} in r/{subreddit}</a></p>
+      <p class="tagline">submitted by <a href="https://old.reddit.com/user/user{index}" class="author may-blank">user{index}</a></p>
+      <ul class="flat-list buttons">
+        <li class="first"><a href="/r/{subreddit}/comments/{post_id}/" class="comments may-blank">{comments} comments</a></li>
+      </ul>
+    </div>
+    <div class="search-result-snippet">Snippet about codeium and windsurf number {index} &amp; more</div>
+  </div>
+</div>
+"""
+
+def render_search_page(subreddit, count=25, seed=0):
+    """Render a fake old.reddit search page with count results"""
+    posts = []
+    for index in range(count):
+        posts.append(POST_TEMPLATE.format(
+            post_id=f"{subreddit[:3].lower()}{seed}{index:04d}",
+            subreddit=subreddit,
+            index=index,
+            score=(index * 7 + seed) % 50,
+            comments=(index * 3 + seed) % 20,
+        ))
+    return (
+        "<html><head><title>search results</title></head><body>"
+        "<div class='content'><div class='search-result-listing'>"
+        + "".join(posts)
+        + "</div></div></body></html>"
+    )
+
+def render_feed_page(subreddit, sequence_numbers):
+    """Render a fake search page holding the given feed posts, newest first"""
+    posts = []
+    for seq in sequence_numbers:
+        posts.append(POST_TEMPLATE.format(
+            post_id=f"{subreddit[:3].lower()}{seq:06d}",
+            subreddit=subreddit,
+            index=seq,
+            score=seq % 50,
+            comments=seq % 20 + 1,
+        ))
+    return (
+        "<html><head><title>search results</title></head><body>"
+        "<div class='content'><div class='search-result-listing'>"
+        + "".join(posts)
+        + "</div></div></body></html>"
+    )
+
+class FakeRedditServer:
+    """Threaded local HTTP server serving fake search pages"""
+
+    def __init__(self, latency=0.15, posts_per_page=25, feed_size=None):
+        self.latency = latency
+        self.posts_per_page = posts_per_page
+        self.feed_size = feed_size
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def publish(self, count):
+        """Add count new posts to the top of every feed"""
+        with self._lock:
+            self.feed_size += count
+
+    def _feed_page(self, subreddit, query):
+        """Render the feed page that follows the post named by the after parameter"""
+        with self._lock:
+            newest = self.feed_size - 1
+        after = parse_qs(query).get("after", [None])[0]
+        if after:
+            newest = int(after[-6:]) - 1
+        oldest = max(newest - self.posts_per_page, -1)
+        return render_feed_page(subreddit, range(newest, oldest, -1))
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections alive so client-side pooling can be measured
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                time.sleep(server.latency)
+                parts = urlparse(self.path).path.strip("/").split("/")
+                subreddit = parts[1] if len(parts) > 1 else "all"
+                if server.feed_size is None:
+                    page = render_search_page(subreddit, server.posts_per_page)
+                else:
+                    page = server._feed_page(subreddit, urlparse(self.path).query)
+                body = page.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,238 @@
+"""
+Bounded Cache for Community Surf
+
+This module provides a thread-safe in-memory cache with a per-entry TTL, LRU
+eviction and limits on both the number of entries and their total size, so
+long-running workers keep a flat memory footprint. Expired entries can be kept
+for a grace period and served as stale copies while they are refreshed.
+Post caches are built with create_cache, which can swap in the persistent
+SQLite backend; both backends share the TTLCache interface.
+"""
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # 32 MB
+DEFAULT_TTL = 600  # 10 minutes in seconds
+
+# 'memory' keeps caches per process, 'sqlite' persists them on disk (see persistent_cache.py)
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").lower()
+
+def estimate_size(value):
+    """Approximate the memory footprint of a cached value by its JSON length"""
+    try:
+        return len(json.dumps(value, default=str))
+    except (TypeError, ValueError):
+        return sys.getsizeof(value)
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a TTL
+    """
+
+    def __init__(self, name, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 default_ttl=DEFAULT_TTL, stale_ttl=0, sizeof=estimate_size):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        # Seconds an expired entry is kept around for stale reads
+        self.stale_ttl = stale_ttl
+        self._sizeof = sizeof
+        # key -> (stored_at, expires_at, size, value), least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._last_update = None
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _remove(self, key):
+        """Drop an entry and its size (caller holds the lock)"""
+        _, _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def get_entry(self, key, allow_stale=False):
+        """
+        Get a value along with its age
+
+        Args:
+            key (str): Cache key
+            allow_stale (bool): Also return expired entries still within stale_ttl
+
+        Returns:
+            tuple: (value, age_in_seconds), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is None:
+                self._misses += 1
+                return None
+            stored_at, expires_at, _, value = entry
+            if now >= expires_at:
+                if now >= expires_at + self.stale_ttl:
+                    self._remove(key)
+                    self._expirations += 1
+                    self._misses += 1
+                    return None
+                if not allow_stale:
+                    self._misses += 1
+                    return None
+                self._stale_hits += 1
+            else:
+                self._hits += 1
+            self._entries.move_to_end(key)
+            return value, now - stored_at
+
+    def age(self, key):
+        """
+        Seconds since key was stored, without counting as a read
+
+        Returns:
+            float: Age of the fresh or stale entry, or None if there is none
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is None or now >= entry[1] + self.stale_ttl:
+                return None
+            return now - entry[0]
+
+    def get(self, key):
+        """Get a fresh value, or None on a miss"""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value, evicting least recently used entries to stay within limits
+
+        Args:
+            key (str): Cache key
+            value: Value to store
+            ttl (float, optional): Seconds until the entry expires, defaults to default_ttl
+        """
+        size = self._sizeof(value)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key} in {self.name}: {size} bytes exceeds the cache size limit")
+            return
+
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (now, expires_at, size, value)
+            self._bytes += size
+            self._last_update = now
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._evictions += 1
+
+    def delete(self, key):
+        """Remove a key if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def purge_expired(self):
+        """
+        Remove entries past their expiry and stale grace period
+
+        Returns:
+            int: Number of entries removed
+        """
+        now = time.time()
+        with self._lock:
+            expired_keys = [
+                k for k, (_, expires_at, _, _) in self._entries.items()
+                if now >= expires_at + self.stale_ttl
+            ]
+            for key in expired_keys:
+                self._remove(key)
+            self._expirations += len(expired_keys)
+        return len(expired_keys)
+
+    def keys(self):
+        """Snapshot of the current keys, least recently used first"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def hottest_keys(self, limit):
+        """Most recently read keys still fresh or servable as stale, most recent first"""
+        now = time.time()
+        with self._lock:
+            keys = [
+                k for k, (_, expires_at, _, _) in reversed(self._entries.items())
+                if now < expires_at + self.stale_ttl
+            ]
+        return keys[:limit]
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.time() < entry[1]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        """Get size limits and hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self._hits + self._stale_hits + self._misses
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "timeout_seconds": self.default_ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale_hits": self._stale_hits,
+                "hit_rate": round((self._hits + self._stale_hits) / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "last_update": self._last_update,
+            }
+
+def create_cache(name, **kwargs):
+    """
+    Create a cache using the backend selected by the CACHE_BACKEND environment variable
+
+    Args:
+        name (str): Cache name, also the namespace of its entries on disk
+        **kwargs: Size, TTL and stale_ttl limits accepted by both backends
+
+    Returns:
+        TTLCache or SQLiteCache: The new cache
+    """
+    if CACHE_BACKEND == "sqlite":
+        from persistent_cache import SQLiteCache
+        return SQLiteCache(name, **kwargs)
+    if CACHE_BACKEND != "memory":
+        logger.warning(f"Unknown CACHE_BACKEND '{CACHE_BACKEND}', using the in-memory cache")
+    return TTLCache(name, **kwargs)
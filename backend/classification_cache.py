@@ -0,0 +1,199 @@
+"""
+Classification Cache for Community Surf
+
+This module remembers the LLM classification of every post text it has seen,
+so cross-posts, unchanged topics and reclassification runs are answered
+without an API call. Entries are keyed by a hash of the normalized title and
+content together with the prompt version and the model. The prompt version
+is a fingerprint of the rendered prompt templates, the category list and the
+system prompt in llm_classifier, so editing any of them invalidates the old
+entries; they are deleted when the cache is opened. Per-entry hit counts are
+gathered in memory and written every HIT_FLUSH_INTERVAL seconds, so lookups
+only read.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("CLASSIFICATION_CACHE_DB_PATH",
+                    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'classification_cache.db'))
+BUSY_TIMEOUT_SECONDS = 5
+LOOKUP_CHUNK_SIZE = 500  # Stays under SQLite's bound parameter limit
+HIT_FLUSH_INTERVAL = float(os.getenv("CLASSIFICATION_CACHE_HIT_FLUSH_INTERVAL", 30))  # Seconds between hit count writes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS classification_cache (
+    content_hash TEXT NOT NULL,
+    prompt_version TEXT NOT NULL,
+    model TEXT NOT NULL,
+    classifications TEXT NOT NULL,
+    stored_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (content_hash, prompt_version, model)
+) WITHOUT ROWID;
+"""
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _normalize(text):
+    """Case-fold and collapse whitespace, so trivially different copies share an entry"""
+    return _WHITESPACE.sub(" ", text or "").strip().casefold()
+
+def content_hash(title, content):
+    """
+    Hash the normalized text of a post
+
+    Returns:
+        str: Hex digest identifying the post text
+    """
+    payload = f"{_normalize(title)}\x00{_normalize(content)}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class ClassificationCache:
+    """
+    SQLite store of classifications by post text, prompt version and model
+    """
+
+    def __init__(self, prompt_version, model, path=DB_PATH):
+        self.prompt_version = prompt_version
+        self.model = model
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stores = 0
+        # Content hash -> hits not yet written to the database
+        self._pending_hits = {}
+        self._last_hit_flush = time.time()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+        removed = self.purge_stale()
+        if removed:
+            logger.info(f"Removed {removed} cached classifications from older prompt versions")
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, hashes):
+        """
+        Look up the classifications of several post texts
+
+        Args:
+            hashes (list): Content hashes from content_hash
+
+        Returns:
+            dict: Content hash -> classifications, for the hashes that are cached
+        """
+        unique_hashes = list(dict.fromkeys(hashes))
+        found = {}
+        conn = self._connect()
+        for start in range(0, len(unique_hashes), LOOKUP_CHUNK_SIZE):
+            chunk = unique_hashes[start:start + LOOKUP_CHUNK_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT content_hash, classifications FROM classification_cache "
+                f"WHERE prompt_version = ? AND model = ? AND content_hash IN ({placeholders})",
+                (self.prompt_version, self.model, *chunk)
+            ).fetchall()
+            found.update((row[0], json.loads(row[1])) for row in rows)
+
+        with self._lock:
+            self._hits += sum(1 for key in hashes if key in found)
+            self._misses += sum(1 for key in hashes if key not in found)
+            for key in found:
+                self._pending_hits[key] = self._pending_hits.get(key, 0) + 1
+            due = time.time() - self._last_hit_flush >= HIT_FLUSH_INTERVAL
+        if due:
+            self.flush_hits()
+        return found
+
+    def flush_hits(self):
+        """Write the hit counts gathered since the last flush"""
+        with self._lock:
+            pending, self._pending_hits = self._pending_hits, {}
+            self._last_hit_flush = time.time()
+        if pending:
+            self._connect().executemany(
+                "UPDATE classification_cache SET hits = hits + ? "
+                "WHERE content_hash = ? AND prompt_version = ? AND model = ?",
+                [(hits, key, self.prompt_version, self.model) for key, hits in pending.items()]
+            )
+
+    def put_many(self, entries):
+        """
+        Store classifications
+
+        Args:
+            entries (dict): Content hash -> list of classifications
+        """
+        if not entries:
+            return
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO classification_cache (content_hash, prompt_version, model, classifications, stored_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (content_hash, prompt_version, model) DO UPDATE SET "
+                "classifications = excluded.classifications, stored_at = excluded.stored_at",
+                [(key, self.prompt_version, self.model, json.dumps(classifications), now)
+                 for key, classifications in entries.items()]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._stores += len(entries)
+
+    def purge_stale(self):
+        """
+        Delete entries made with another prompt version
+
+        Returns:
+            int: Number of entries removed
+        """
+        cursor = self._connect().execute(
+            "DELETE FROM classification_cache WHERE prompt_version != ?", (self.prompt_version,)
+        )
+        return cursor.rowcount
+
+    def clear(self):
+        """Delete every entry, e.g. to reclassify everything with the same prompt"""
+        self._connect().execute("DELETE FROM classification_cache")
+
+    def stats(self):
+        """Get the entry count and this process's hit/miss counters"""
+        entries = self._connect().execute(
+            "SELECT COUNT(*) FROM classification_cache WHERE prompt_version = ? AND model = ?",
+            (self.prompt_version, self.model)
+        ).fetchone()[0]
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "prompt_version": self.prompt_version,
+                "model": self.model,
+                "entries": entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else None,
+                "stored": self._stores,
+            }
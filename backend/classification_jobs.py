@@ -0,0 +1,201 @@
+"""
+Classification Jobs for Community Surf
+
+This module classifies Cursor Forum topics in the background. A job is a row
+in the classification_jobs table; a worker thread takes queued jobs one at a
+time, pulls unclassified topics in chunks, classifies each chunk with the LLM
+classifier and commits its classifications together with the job's progress
+before moving on. Progress is therefore never lost with the process: a job
+that was running when the app stopped is picked up again and continues with
+the topics that are still unclassified, leaving out the ones it already
+counted as failed.
+
+Several processes may run a worker on the same database (gunicorn workers, or
+the Flask reloader's parent and child). A runner claims a job before working
+on it and holds it with a lease renewed on every chunk, so only one of them
+classifies a job at a time. A job whose runner died is taken over once its
+lease expires.
+
+Usage:
+    python classification_jobs.py  # Run every queued job and exit
+"""
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+import cursor_forum_db
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = int(os.getenv("CLASSIFICATION_JOB_CHUNK_SIZE", 50))  # Topics committed together
+MAX_CHUNK_SIZE = 500
+JOB_LEASE_SECONDS = int(os.getenv("CLASSIFICATION_JOB_LEASE_SECONDS", 600))  # Must outlast one chunk
+MAX_JOBS_CHECKED = 20  # Unfinished jobs looked at for one to claim
+
+class ClassificationJobRunner:
+    """
+    Runs queued classification jobs on a background thread
+    """
+
+    def __init__(self, get_classifier, lease_seconds=JOB_LEASE_SECONDS):
+        """
+        Args:
+            get_classifier (callable): Returns the LLMClassifier to classify with
+            lease_seconds (float): How long a claimed job stays with this runner without progress
+        """
+        self.get_classifier = get_classifier
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._thread = None
+        self._resumed = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._current_job_id = None
+
+    def enqueue(self, max_posts=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Queue a job over the topics that are unclassified now and wake the worker
+
+        Args:
+            max_posts (int): Classify at most this many topics, None for all of them
+            chunk_size (int): Topics classified and committed together
+
+        Returns:
+            dict: The new job
+        """
+        chunk_size = max(1, min(int(chunk_size), MAX_CHUNK_SIZE))
+        job = cursor_forum_db.create_classification_job(max_posts=max_posts, chunk_size=chunk_size)
+        logger.info(f"Queued classification job {job['id']} for {job['total']} topics")
+        self.ensure_started()
+        self._wake.set()
+        return job
+
+    def resume(self):
+        """Start the worker, on the first call only, if unfinished jobs were left by a previous process"""
+        with self._lock:
+            if self._resumed:
+                return
+            self._resumed = True
+        if cursor_forum_db.get_classification_jobs(limit=1, unfinished=True):
+            logger.info("Resuming unfinished classification jobs")
+            self.ensure_started()
+
+    def ensure_started(self):
+        """Start the worker thread if it is not running yet"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="classification-jobs", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Error in classification job worker: {e}")
+            # Jobs held by other runners are looked at again once their lease may have expired
+            held_elsewhere = cursor_forum_db.get_classification_jobs(limit=1, unfinished=True)
+            self._wake.wait(timeout=self.lease_seconds if held_elsewhere else None)
+            self._wake.clear()
+
+    def run_pending(self):
+        """
+        Run unfinished jobs this runner can claim, oldest first, until none is left
+
+        Returns:
+            int: Number of jobs run
+        """
+        runs = 0
+        while True:
+            for job in cursor_forum_db.get_classification_jobs(limit=MAX_JOBS_CHECKED, unfinished=True):
+                if self.run_job(job) is not None:
+                    runs += 1
+                    break
+            else:
+                return runs
+
+    def run_job(self, job):
+        """
+        Claim a job and classify its topics chunk by chunk, committing after every chunk
+
+        Args:
+            job (dict): Job as returned by cursor_forum_db
+
+        Returns:
+            dict: The job once it completed, failed or was taken over by another
+            runner, or None if it could not be claimed
+        """
+        job_id = job["id"]
+        job = cursor_forum_db.claim_classification_job(job_id, self.worker_id, self.lease_seconds)
+        if job is None:
+            return None
+        self._current_job_id = job_id
+        # Topics that got no classification are not pulled again by this job,
+        # also after a restart
+        skipped_ids = set(cursor_forum_db.get_classification_job_failed_ids(job_id))
+
+        try:
+            classifier = self.get_classifier()
+            if not classifier.is_available():
+                return self._finish(job_id, "failed", "LLM classifier is not available")
+
+            # Topics that became unclassified after the job was queued are left to the next job
+            while job["processed"] + job["failed"] < job["total"]:
+                limit = min(job["chunk_size"], job["total"] - job["processed"] - job["failed"])
+                posts = cursor_forum_db.get_unclassified_posts(limit=limit, exclude_ids=skipped_ids)
+                if not posts:
+                    break
+
+                started = time.time()
+                classified = classifier.classify_posts(posts)
+                # Fallback guesses are left unsaved so a later run can classify them properly
+                results = [post for post in classified if post.get("classification_method") != "fallback"]
+                failed_ids = [post["id"] for post in classified if post.get("classification_method") == "fallback"]
+                skipped_ids.update(failed_ids)
+                # Classifications and progress are committed together, so a crash cannot leave them apart
+                saved = cursor_forum_db.save_job_classifications(
+                    job_id, self.worker_id, self.lease_seconds, results,
+                    failed_ids=failed_ids, elapsed=time.time() - started
+                )
+                if saved is None:
+                    logger.warning(f"Classification job {job_id} was taken over by another runner")
+                    return cursor_forum_db.get_classification_job(job_id)
+                job = saved
+                logger.info(f"Classification job {job_id}: {job['processed']} of {job['total']} topics classified")
+
+                if not results:
+                    return self._finish(job_id, "failed", "No topic in the last chunk could be classified")
+
+            return self._finish(job_id, "completed")
+        except Exception as e:
+            logger.error(f"Classification job {job_id} failed: {e}")
+            return self._finish(job_id, "failed", str(e))
+        finally:
+            self._current_job_id = None
+
+    def _finish(self, job_id, status, error=None):
+        """Mark a job this runner holds as completed or failed"""
+        job = cursor_forum_db.finish_classification_job(job_id, self.worker_id, status, error)
+        if job is None:
+            logger.warning(f"Classification job {job_id} was taken over by another runner")
+            return cursor_forum_db.get_classification_job(job_id)
+        logger.info(f"Classification job {job_id} {status}: {job['processed']} topics classified, {job['failed']} failed")
+        return job
+
+    def stats(self):
+        """Get the worker state"""
+        return {
+            "running": self._thread is not None,
+            "worker_id": self.worker_id,
+            "current_job_id": self._current_job_id,
+        }
+
+if __name__ == "__main__":
+    from llm_classifier import get_classifier
+    ClassificationJobRunner(get_classifier).run_pending()
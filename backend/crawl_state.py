@@ -0,0 +1,225 @@
+"""
+Incremental Crawl State for Community Surf
+
+This module remembers what each Reddit search has already returned, so that
+later crawls can stop paginating at known posts and pass on only the posts
+that are new or whose score, comments or text changed. State is kept per
+(source, target, query, sort) in SQLite: a high-water mark with the newest post
+seen, and a signature of every post seen recently. Sorts never share seen
+posts, since a post returned by a 'hot' search says nothing about whether a
+'new' crawl has reached it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("CRAWL_STATE_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'crawl_state.db'))
+BUSY_TIMEOUT_SECONDS = 5
+SEEN_RETENTION_SECONDS = 7 * 24 * 60 * 60  # Forget posts not seen for a week
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS crawl_marks (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    query TEXT NOT NULL,
+    sort TEXT NOT NULL,
+    newest_id TEXT,
+    newest_created REAL,
+    last_crawl_at REAL NOT NULL,
+    PRIMARY KEY (source, target, query, sort)
+);
+CREATE TABLE IF NOT EXISTS crawl_seen (
+    source TEXT NOT NULL,
+    target TEXT NOT NULL,
+    query TEXT NOT NULL,
+    sort TEXT NOT NULL,
+    post_id TEXT NOT NULL,
+    signature TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (source, target, query, sort, post_id)
+);
+"""
+
+def post_signature(post):
+    """Fingerprint the parts of a post that change between crawls"""
+    payload = json.dumps(
+        [post.get("title"), post.get("content"), post.get("score"), post.get("num_comments")],
+        default=str
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+class CrawlState:
+    """
+    High-water marks and seen-post signatures for incremental Reddit crawls
+    """
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._crawls = 0
+        self._emitted = 0
+        self._unchanged = 0
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get_mark(self, source, target, query, sort):
+        """
+        Get the high-water mark of a search
+
+        Returns:
+            dict: newest_id, newest_created and last_crawl_at, or None if never crawled
+        """
+        row = self._connect().execute(
+            "SELECT newest_id, newest_created, last_crawl_at FROM crawl_marks "
+            "WHERE source = ? AND target = ? AND query = ? AND sort = ?",
+            (source, target, query, sort)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"newest_id": row[0], "newest_created": row[1], "last_crawl_at": row[2]}
+
+    def known_ids(self, source, target, query, sort):
+        """IDs of posts this search has returned with this sort within the retention window"""
+        rows = self._connect().execute(
+            "SELECT post_id FROM crawl_seen "
+            "WHERE source = ? AND target = ? AND query = ? AND sort = ? AND seen_at > ?",
+            (source, target, query, sort, time.time() - SEEN_RETENTION_SECONDS)
+        ).fetchall()
+        return {row[0] for row in rows}
+
+    def record(self, source, target, query, sort, posts):
+        """
+        Record the posts a crawl returned and advance the high-water mark
+
+        Args:
+            source (str): Fetch path, e.g. 'old_reddit' or 'reddit_api'
+            target (str): Subreddit, or several joined with '+'
+            query (str): Search query
+            sort (str): Sort method of the search
+            posts (list): Posts returned by the crawl, newest first for 'new'
+
+        Returns:
+            list: The posts that are new or changed since they were last seen
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = dict(conn.execute(
+                "SELECT post_id, signature FROM crawl_seen "
+                "WHERE source = ? AND target = ? AND query = ? AND sort = ?",
+                (source, target, query, sort)
+            ).fetchall())
+
+            changed = []
+            rows = []
+            for post in posts:
+                signature = post_signature(post)
+                if previous.get(post["id"]) != signature:
+                    changed.append(post)
+                rows.append((source, target, query, sort, post["id"], signature, now))
+            conn.executemany(
+                "INSERT INTO crawl_seen (source, target, query, sort, post_id, signature, seen_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, target, query, sort, post_id) DO UPDATE SET "
+                "signature = excluded.signature, seen_at = excluded.seen_at",
+                rows
+            )
+
+            newest = max(posts, key=lambda p: p.get("created_utc") or 0) if posts else None
+            conn.execute(
+                "INSERT INTO crawl_marks (source, target, query, sort, newest_id, newest_created, last_crawl_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (source, target, query, sort) DO UPDATE SET "
+                "newest_id = CASE WHEN COALESCE(excluded.newest_created, 0) >= COALESCE(newest_created, 0) "
+                "THEN COALESCE(excluded.newest_id, newest_id) ELSE newest_id END, "
+                "newest_created = MAX(COALESCE(excluded.newest_created, 0), COALESCE(newest_created, 0)), "
+                "last_crawl_at = excluded.last_crawl_at",
+                (source, target, query, sort,
+                 newest["id"] if newest else None,
+                 newest.get("created_utc") if newest else None,
+                 now)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        with self._lock:
+            self._crawls += 1
+            self._emitted += len(changed)
+            self._unchanged += len(posts) - len(changed)
+        return changed
+
+    def prune(self):
+        """
+        Forget posts not seen within the retention window
+
+        Returns:
+            int: Number of seen-post rows removed
+        """
+        cursor = self._connect().execute(
+            "DELETE FROM crawl_seen WHERE seen_at <= ?", (time.time() - SEEN_RETENTION_SECONDS,)
+        )
+        return cursor.rowcount
+
+    def stats(self):
+        """Get crawl counters for this process"""
+        with self._lock:
+            return {
+                "crawls": self._crawls,
+                "emitted_posts": self._emitted,
+                "unchanged_posts": self._unchanged,
+            }
+
+_crawl_state = None
+_crawl_state_lock = threading.Lock()
+
+def get_crawl_state():
+    """Return the shared crawl state, opening its database on first use"""
+    global _crawl_state
+    with _crawl_state_lock:
+        if _crawl_state is None:
+            _crawl_state = CrawlState()
+        return _crawl_state
+
+def merge_posts(existing, updates, max_posts=None):
+    """
+    Merge new or changed posts into a previously fetched list
+
+    Args:
+        existing (list): Posts from the previous full fetch
+        updates (list): New or changed posts from an incremental crawl
+        max_posts (int, optional): Keep only this many of the newest posts
+
+    Returns:
+        list: Posts sorted by recency, then relevance
+    """
+    merged = {post["id"]: post for post in existing}
+    for post in updates:
+        previous = merged.get(post["id"])
+        if previous is not None and "created_utc" in previous:
+            # Scraped posts carry the crawl time as created_utc; keep the first one seen
+            post = {**post, "created_utc": previous["created_utc"]}
+        merged[post["id"]] = post
+    posts = sorted(merged.values(), key=lambda x: (-x["created_utc"], -x.get("relevance_score", 0)))
+    return posts[:max_posts] if max_posts else posts
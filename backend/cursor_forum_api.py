@@ -1,4 +1,6 @@
-import requests
+import http_client
+import rate_limiter
+from cache import TTLCache
 import os
 import json
 import logging
@@ -15,6 +17,23 @@ load_dotenv()
 # Base URL for the Cursor forum
 DISCOURSE_BASE_URL = "https://forum.cursor.com"
 
+# Maximum seconds to queue for the Discourse request budget
+RATE_LIMIT_WAIT_TIMEOUT = 60.0
+
+def discourse_get(url, **kwargs):
+    """
+    Send a GET request to the forum once the Discourse request budget allows it
+    
+    Returns:
+        Response: The HTTP response
+    
+    Raises:
+        RuntimeError: If no request slot frees up within RATE_LIMIT_WAIT_TIMEOUT
+    """
+    if not rate_limiter.get_limiter("discourse").acquire(timeout=RATE_LIMIT_WAIT_TIMEOUT):
+        raise RuntimeError("Discourse request budget exhausted")
+    return http_client.get(url, **kwargs)
+
 def fetch_latest_topics(page=0, limit=30):
     """
     Fetch latest topics from the Cursor forum using Discourse API
@@ -34,7 +53,7 @@ def fetch_latest_topics(page=0, limit=30):
         logger.info(f"Fetching latest topics from {url}, page {page}")
         
         # Make the request
-        response = requests.get(url, params=params, timeout=30)
+        response = discourse_get(url, params=params, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -114,7 +133,7 @@ def fetch_topic_details(topic_id):
         
         logger.info(f"Fetching topic details for topic {topic_id}")
         
-        response = requests.get(url, timeout=30)
+        response = discourse_get(url, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -164,7 +183,7 @@ def fetch_categories():
         
         logger.info(f"Fetching categories from {url}")
         
-        response = requests.get(url, timeout=30)
+        response = discourse_get(url, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -185,7 +204,8 @@ def fetch_categories():
         return {}
 
 # Cache for categories
-category_cache = {}
+CATEGORY_CACHE_TIMEOUT = 60 * 60  # 1 hour in seconds
+category_cache = TTLCache("discourse_categories", max_entries=1, default_ttl=CATEGORY_CACHE_TIMEOUT)
 
 def get_category_name(category_id):
     """
@@ -197,12 +217,13 @@ def get_category_name(category_id):
     Returns:
         str: Category name or "Unknown"
     """
-    global category_cache
-    
-    if not category_cache:
-        category_cache = fetch_categories()
+    categories = category_cache.get("categories")
+    if not categories:
+        categories = fetch_categories()
+        if categories:
+            category_cache.set("categories", categories)
     
-    return category_cache.get(category_id, "Unknown")
+    return categories.get(category_id, "Unknown")
 
 def search_topics(query, page=0, limit=30):
     """
@@ -225,7 +246,7 @@ def search_topics(query, page=0, limit=30):
         
         logger.info(f"Searching for '{query}' at page {page}")
         
-        response = requests.get(url, params=params, timeout=30)
+        response = discourse_get(url, params=params, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
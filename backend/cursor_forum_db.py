@@ -1,8 +1,15 @@
 import logging
 import datetime
-from sqlalchemy import create_engine
+from sqlalchemy import bindparam, create_engine, func, literal, literal_column, select, text, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker, scoped_session
-from models.discourse_post import DiscoursePost, Base
+from models.discourse_post import DiscoursePost, Base, TOPIC_DICT_COLUMNS, topic_row_to_dict
+from models.classification_job import ClassificationJob
+import migrations
+import pagination
+import text_search
+from cache import TTLCache
+from hot_score import topic_hot_score
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,17 +20,93 @@ DATABASE_URL = "sqlite:///cursor_forum.db"
 engine = create_engine(DATABASE_URL)
 SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
 
+# Topics per upsert batch, kept under SQLite's bound-parameter limit
+SAVE_CHUNK_SIZE = 500
+
+# Topic counts per filter are reused for this many seconds, or until new topics are saved
+TOPIC_COUNT_TTL = 60
+TOPIC_COUNT_CACHE = TTLCache("topic_counts", max_entries=256, default_ttl=TOPIC_COUNT_TTL)
+
+# Columns selected by the topic read paths
+TOPIC_COLUMNS = [DiscoursePost.__table__.c[name] for name in TOPIC_DICT_COLUMNS]
+
 def init_db():
     """Initialize the database by creating tables if they don't exist"""
     try:
         Base.metadata.create_all(bind=engine)
+        migrations.migrate("cursor_forum", engine.url.database)
         logger.info("Cursor Forum database tables created successfully")
     except Exception as e:
         logger.error(f"Error initializing Cursor Forum database: {str(e)}")
 
+def _parse_created_at(created_at):
+    """Turn a Discourse created_at value into a datetime, defaulting to now"""
+    if isinstance(created_at, datetime.datetime):
+        return created_at
+    if isinstance(created_at, str):
+        try:
+            return datetime.datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except Exception as e:
+            logger.error(f"Error parsing created_at: {e}")
+    return datetime.datetime.utcnow()
+
+def _topic_row(topic, scraped_at, stored=None):
+    """
+    Map a topic dictionary from the Discourse API to cursor_posts columns
+    
+    Args:
+        topic (dict): Topic from the Discourse API
+        scraped_at (datetime): Time of this save
+        stored: The known topic's views, replies and created_at, None for a new topic
+        
+    Returns:
+        dict: Column values; for a known topic, counters the topic leaves out are
+        None so the upsert keeps the stored ones
+    """
+    created_at = _parse_created_at(topic.get("created_at"))
+    views = topic.get("views")
+    replies = topic.get("replies")
+    popular = topic.get("popular")
+    if stored is None:
+        views, replies, popular = views or 0, replies or 0, popular or False
+        score = topic_hot_score(views, replies, created_at)
+    else:
+        # created_at is never updated, so the stored one dates the score
+        score = topic_hot_score(
+            stored.views if views is None else views,
+            stored.replies if replies is None else replies,
+            stored.created_at
+        )
+    return {
+        "title": topic.get("title", ""),
+        "author": topic.get("author", "Unknown"),
+        "content": topic.get("content", ""),
+        "url": topic.get("url", ""),
+        "post_id": topic["post_id"],
+        "likes": topic.get("likes"),
+        "replies": replies,
+        "views": views,
+        "category": topic.get("category", "Unknown"),
+        "sentiment": topic.get("sentiment", 0.5),
+        "sentiment_label": topic.get("sentiment_label", "neutral"),
+        "popular": popular,
+        "created_at": created_at,
+        "scraped_at": scraped_at,
+        "hot_score": score
+    }
+
+def _existing_topics_query(post_ids):
+    """Build the statement reading what save_topics needs about already stored topics"""
+    table = DiscoursePost.__table__
+    return (select(table.c.post_id, table.c.views, table.c.replies, table.c.created_at)
+            .where(table.c.post_id.in_(post_ids)))
+
 def save_topics(topics):
     """
-    Save topics to the database
+    Save topics to the database, inserting new ones and refreshing the
+    engagement counters of known ones in one bulk upsert per chunk
+    
+    Counters a topic dictionary leaves out keep their stored values.
     
     Args:
         topics (list): List of topic dictionaries from the Discourse API
@@ -34,206 +117,298 @@ def save_topics(topics):
     if not topics:
         logger.warning("No topics to save to database")
         return 0
-        
-    logger.info(f"Attempting to save {len(topics)} topics to database")
-    session = SessionLocal()
-    new_count = 0
     
+    # Deduplicate on post_id, keeping the last copy of each topic
+    scraped_at = datetime.datetime.utcnow()
+    unique_topics = {}
+    for topic in topics:
+        if not topic.get("post_id"):
+            logger.warning(f"Topic missing required post_id field: {topic}")
+            continue
+        unique_topics[topic["post_id"]] = topic
+    unique_topics = list(unique_topics.values())
+    
+    table = DiscoursePost.__table__
+    new_count = 0
     try:
-        for topic in topics:
-            # Check required fields
-            if not topic.get("post_id"):
-                logger.warning(f"Topic missing required post_id field: {topic}")
-                continue
-            
-            # Check if topic already exists
-            existing = session.query(DiscoursePost).filter_by(post_id=topic["post_id"]).first()
-            
-            if not existing:
-                logger.info(f"Processing new topic: {topic['post_id']}")
-                
-                # Create datetime object from created_at if it's not already one
-                created_at = topic.get("created_at")
-                if not isinstance(created_at, datetime.datetime) and created_at is not None:
-                    try:
-                        if isinstance(created_at, str):
-                            created_at = datetime.datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                        else:
-                            created_at = datetime.datetime.utcnow()
-                    except Exception as e:
-                        logger.error(f"Error parsing created_at: {e}")
-                        created_at = datetime.datetime.utcnow()
-                elif created_at is None:
-                    created_at = datetime.datetime.utcnow()
+        with engine.begin() as conn:
+            for start in range(0, len(unique_topics), SAVE_CHUNK_SIZE):
+                chunk = unique_topics[start:start + SAVE_CHUNK_SIZE]
                 
-                # Create and add the new topic
-                topic_data = {
-                    "title": topic.get("title", ""),
-                    "author": topic.get("author", "Unknown"),
-                    "content": topic.get("content", ""),
-                    "url": topic.get("url", ""),
-                    "post_id": topic.get("post_id", ""),
-                    "likes": topic.get("likes"),
-                    "replies": topic.get("replies", 0),
-                    "views": topic.get("views", 0),
-                    "category": topic.get("category", "Unknown"),
-                    "sentiment": topic.get("sentiment", 0.5),
-                    "sentiment_label": topic.get("sentiment_label", "neutral"),
-                    "popular": topic.get("popular", False),
-                    "created_at": created_at,
-                    "scraped_at": datetime.datetime.utcnow()
+                # One IN query tells new topics from known ones and gets what their hot scores need
+                existing = {
+                    row.post_id: row for row in conn.execute(
+                        _existing_topics_query([topic["post_id"] for topic in chunk])
+                    )
                 }
+                new_count += len(chunk) - len(existing)
+                rows = [_topic_row(topic, scraped_at, existing.get(topic["post_id"])) for topic in chunk]
                 
-                try:
-                    discourse_post = DiscoursePost(**topic_data)
-                    session.add(discourse_post)
-                    new_count += 1
-                    logger.info(f"Topic {topic['post_id']} added successfully")
-                except Exception as e:
-                    logger.error(f"Error adding topic {topic.get('post_id')}: {e}")
-                    continue
-            else:
-                # Update existing topic with new data
-                existing.views = topic.get("views", existing.views)
-                existing.replies = topic.get("replies", existing.replies)
-                existing.likes = topic.get("likes", existing.likes)
-                existing.popular = topic.get("popular", existing.popular)
-                setattr(existing, "scraped_at", datetime.datetime.utcnow())
-                logger.info(f"Updated existing topic {topic['post_id']}")
-        
-        # Commit all changes at once
-        if new_count > 0 or len(topics) > 0:
-            session.commit()
-            logger.info(f"Saved {new_count} new topics to database, updated {len(topics) - new_count}")
+                stmt = sqlite_insert(table)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["post_id"],
+                    set_={
+                        "views": func.coalesce(stmt.excluded.views, table.c.views),
+                        "replies": func.coalesce(stmt.excluded.replies, table.c.replies),
+                        "likes": func.coalesce(stmt.excluded.likes, table.c.likes),
+                        "popular": func.coalesce(stmt.excluded.popular, table.c.popular),
+                        "hot_score": stmt.excluded.hot_score,
+                        "scraped_at": stmt.excluded.scraped_at,
+                    }
+                )
+                conn.execute(stmt, rows)
         
+        if new_count:
+            TOPIC_COUNT_CACHE.clear()
+        logger.info(f"Saved {new_count} new topics to database, updated {len(unique_topics) - new_count}")
         return new_count
     
     except Exception as e:
-        session.rollback()
         logger.error(f"Error saving topics to database: {str(e)}")
         return 0
+
+_search_index = None
+
+def _search_index_available():
+    """Check once whether the full-text index exists (it needs SQLite with FTS5)"""
+    global _search_index
+    if _search_index is None:
+        try:
+            with engine.connect() as conn:
+                _search_index = conn.exec_driver_sql(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                    (text_search.SOURCES["cursor_forum"]["fts_table"],)
+                ).first() is not None
+        except Exception as e:
+            logger.error(f"Error checking the Cursor Forum search index: {str(e)}")
+            return False
+    return _search_index
+
+def _search_filter(search):
+    """
+    Build the filter for topics whose title or content match a search term,
+    using the full-text index when there is one
+    """
+    expression = text_search.match_expression(search)
+    if expression is not None and _search_index_available():
+        matching_ids = text(text_search.matching_ids_sql("cursor_forum", ":match")).bindparams(match=expression)
+        return DiscoursePost.id.in_(matching_ids.columns(literal_column("rowid")))
     
-    finally:
-        session.close()
+    search_term = f"%{search}%"
+    return (DiscoursePost.title.like(search_term)) | (DiscoursePost.content.like(search_term))
 
-def get_recent_topics(limit=20, offset=0, sort_by='new', category=None, search=None):
+def search_topics(search, limit=20, offset=0):
     """
-    Get recent topics from the database
+    Full-text search of topics, best match first
+    
+    Args:
+        search (str): Search text as typed by the user
+        limit (int): Maximum number of results
+        offset (int): Number of results to skip
+        
+    Returns:
+        tuple: (list of result dictionaries with a highlighted snippet, total number of matches)
+    """
+    query = text_search.search_sql("cursor_forum", search, limit, offset)
+    if query is None or not _search_index_available():
+        return [], 0
+    try:
+        with engine.connect() as conn:
+            results = text_search.to_results("cursor_forum", conn.exec_driver_sql(*query).fetchall())
+            total = conn.exec_driver_sql(*text_search.count_sql("cursor_forum", search)).scalar()
+        return results, total
+    except Exception as e:
+        logger.error(f"Error searching Cursor Forum topics: {str(e)}")
+        return [], 0
+
+def _sort_keys(sort_by):
+    """
+    Get the columns a topic listing is ordered by, descending, ending with
+    the ID so that every row has a distinct position for keyset pagination
+    """
+    if sort_by == 'top':
+        # Sort by number of views (highest first)
+        return [DiscoursePost.views, DiscoursePost.id]
+    if sort_by == 'hot':
+        # Sort by the stored combination of views, replies and recency
+        return [DiscoursePost.hot_score, DiscoursePost.id]
+    # Default sorting is by date (most recent first)
+    return [DiscoursePost.created_at, DiscoursePost.id]
+
+def _topics_query(limit, sort_by='new', category=None, search=None, after=None, offset=0,
+                  since=None, classification=None):
+    """
+    Build the statement selecting topics in sort order, starting after the row
+    whose sort key values are `after`
+    
+    Returns:
+        Select: Statement whose rows end with the sort key values
+    """
+    sort_keys = _sort_keys(sort_by)
+    
+    # The sort key values are selected too, to build the next cursor from the last row
+    sort_labels = [key.label(f"sort_key_{i}") for i, key in enumerate(sort_keys)]
+    query = select(*TOPIC_COLUMNS, *sort_labels)
+    
+    # Apply category filter if provided
+    if category and category.lower() != 'all':
+        query = query.where(DiscoursePost.category == category)
+    
+    # Apply search filter if provided
+    if search:
+        query = query.where(_search_filter(search))
+    
+    if since is not None:
+        query = query.where(DiscoursePost.created_at >= since)
+    if classification:
+        query = query.where(DiscoursePost.primary_classification == classification)
+    
+    query = query.order_by(*[key.desc() for key in sort_keys])
+    
+    if after is not None:
+        query = query.where(tuple_(*sort_keys) < tuple_(*[literal(value) for value in after]))
+    elif offset:
+        query = query.offset(offset)
+    return query.limit(limit)
+
+def _fetch_topics(conn, limit, sort_by='new', category=None, search=None, after=None, offset=0,
+                  since=None, classification=None):
+    """
+    Query topics in sort order, starting after the row whose sort key values are `after`
+    
+    Selects plain rows with just the columns the response needs, instead of
+    loading ORM objects, and builds the dictionaries without per-row logging.
+    
+    Returns:
+        list: (topic dictionary, sort key values) tuples
+    """
+    query = _topics_query(limit, sort_by, category, search, after=after, offset=offset, since=since,
+                          classification=classification)
+    rows = conn.execute(query).all()
+    
+    key_count = len(_sort_keys(sort_by))
+    return [(topic_row_to_dict(row), list(row[-key_count:])) for row in rows]
+
+def get_topics_page(limit=20, sort_by='new', category=None, search=None, cursor=None, offset=0):
+    """
+    Get a page of topics from the database
+    
+    Pages after the first are fetched either with the cursor returned for the
+    previous page, which seeks straight to the next row, or with an offset,
+    which skips every earlier row and gets slower the deeper the page.
     
     Args:
         limit (int): Maximum number of topics to return
-        offset (int): Number of topics to skip
         sort_by (str): Sort method - 'new', 'top', 'hot'
         category (str): Filter by category
         search (str): Search term for filtering
+        cursor (str): Cursor token of the previous page; takes precedence over offset
+        offset (int): Number of topics to skip
         
     Returns:
-        list: List of topic dictionaries
+        tuple: (list of topic dictionaries, cursor token of the next page or None)
+        
+    Raises:
+        pagination.InvalidCursor: If the cursor is malformed or was issued for another sort
     """
-    session = SessionLocal()
+    after = pagination.decode_cursor(cursor, sort_by) if cursor else None
+    if after is not None and len(after) != len(_sort_keys(sort_by)):
+        raise pagination.InvalidCursor("Cursor does not match the sort key")
+    
     try:
-        logger.info(f"Fetching topics with params: limit={limit}, offset={offset}, sort_by={sort_by}, category={category}, search={search}")
-        
-        query = session.query(DiscoursePost)
+        # Fetch one extra row to know whether there is a next page
+        with engine.connect() as conn:
+            rows = _fetch_topics(conn, limit + 1, sort_by, category, search, after=after, offset=offset)
         
-        # Apply category filter if provided
-        if category and category.lower() != 'all':
-            query = query.filter(DiscoursePost.category == category)
-            logger.info(f"Applied category filter: {category}")
-        
-        # Apply search filter if provided
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                (DiscoursePost.title.like(search_term)) | 
-                (DiscoursePost.content.like(search_term))
-            )
-            logger.info(f"Applied search filter: {search}")
-        
-        # Apply sorting based on the sort_by parameter
-        if sort_by == 'top':
-            # Sort by number of views (highest first)
-            query = query.order_by(DiscoursePost.views.desc())
-            logger.info("Sorting by views (top)")
-        elif sort_by == 'hot':
-            # Sort by a combination of views, replies and recency
-            # This is a simple heuristic, can be improved
-            from sqlalchemy import desc
-            query = query.order_by(
-                desc((DiscoursePost.views * 0.5) + (DiscoursePost.replies * 2)),
-                DiscoursePost.created_at.desc()
-            )
-            logger.info("Sorting by hot algorithm")
-        else:
-            # Default sorting is by date (most recent first)
-            query = query.order_by(DiscoursePost.created_at.desc())
-            logger.info("Sorting by date (new)")
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = pagination.encode_cursor(sort_by, rows[-1][1])
         
-        # Log the SQL query
-        logger.info(f"SQL Query: {query}")
-        
-        # Apply pagination
-        topics = query.offset(offset).limit(limit).all()
-        logger.info(f"Found {len(topics)} topics in database")
-        
-        # Log each topic
-        for i, topic in enumerate(topics):
-            logger.info(f"Topic {i+1}: ID={topic.id}, Title={topic.title}, Created={topic.created_at}")
-        
-        # Convert to dictionaries
-        result = []
-        for topic in topics:
-            try:
-                topic_dict = topic.to_dict()
-                result.append(topic_dict)
-                logger.info(f"Converted topic {topic.id} to dict: {topic_dict.get('title')}")
-            except Exception as e:
-                logger.error(f"Error converting topic {topic.id} to dict: {str(e)}")
-        
-        return result
+        logger.info(f"Fetched {len(rows)} topics: sort_by={sort_by}, category={category}, search={search}, "
+                    f"offset={offset}, cursor={'yes' if cursor else 'no'}")
+        return [topic for topic, _ in rows], next_cursor
     
     except Exception as e:
         logger.error(f"Error fetching topics from database: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
-        return []
+        return [], None
+
+def get_feed_page(limit, after=None, since=None, search=None, classification=None):
+    """
+    Get newest-first topics for the cross-source feed
     
-    finally:
-        session.close()
+    Args:
+        limit (int): Maximum number of topics to return
+        after (list): (created_at, id) of the last topic already returned
+        since (datetime.datetime): Only topics created at or after this time
+        search (str): Search term for filtering
+        classification (str): Only topics with this primary classification
+        
+    Returns:
+        list: (topic dictionary, [created_at, id]) tuples
+    """
+    with engine.connect() as conn:
+        return _fetch_topics(conn, limit, 'new', search=search, after=after, since=since,
+                             classification=classification)
 
-def get_topic_count(category=None, search=None):
+def get_recent_topics(limit=20, offset=0, sort_by='new', category=None, search=None):
+    """
+    Get recent topics from the database
+    
+    Args:
+        limit (int): Maximum number of topics to return
+        offset (int): Number of topics to skip
+        sort_by (str): Sort method - 'new', 'top', 'hot'
+        category (str): Filter by category
+        search (str): Search term for filtering
+        
+    Returns:
+        list: List of topic dictionaries
+    """
+    topics, _ = get_topics_page(limit=limit, sort_by=sort_by, category=category, search=search, offset=offset)
+    return topics
+
+def _topic_count_query(category=None, search=None):
+    """Build the statement counting the topics of a listing"""
+    query = select(func.count()).select_from(DiscoursePost)
+    
+    # Apply category filter if provided
+    if category and category.lower() != 'all':
+        query = query.where(DiscoursePost.category == category)
+    
+    # Apply search filter if provided
+    if search:
+        query = query.where(_search_filter(search))
+    return query
+
+def get_topic_count(category=None, search=None, cached=False):
     """
     Get the total number of topics in the database
     
     Args:
         category (str): Filter by category
         search (str): Search term for filtering
+        cached (bool): Accept a count up to TOPIC_COUNT_TTL seconds old
         
     Returns:
         int: Total number of topics
     """
-    session = SessionLocal()
+    cache_key = f"{category or 'all'}:{search or ''}"
+    if cached:
+        count = TOPIC_COUNT_CACHE.get(cache_key)
+        if count is not None:
+            return count
+    
     try:
-        query = session.query(DiscoursePost)
-        
-        # Apply category filter if provided
-        if category and category.lower() != 'all':
-            query = query.filter(DiscoursePost.category == category)
-        
-        # Apply search filter if provided
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                (DiscoursePost.title.like(search_term)) | 
-                (DiscoursePost.content.like(search_term))
-            )
-        
-        return query.count()
+        with engine.connect() as conn:
+            count = conn.execute(_topic_count_query(category, search)).scalar()
+        TOPIC_COUNT_CACHE.set(cache_key, count)
+        return count
     except Exception as e:
         logger.error(f"Error counting topics: {str(e)}")
         return 0
-    finally:
-        session.close()
 
 def get_topic_categories():
     """
@@ -286,48 +461,299 @@ def get_topic_by_id(topic_id):
     finally:
         session.close()
 
-def get_unclassified_posts(limit=50):
+def _unclassified():
+    """Filter matching topics still waiting for a classification (see ix_cursor_posts_unclassified)"""
+    return (DiscoursePost.classifications.is_(None)) | (DiscoursePost.classified_at.is_(None))
+
+def _unclassified_query(limit=50, exclude_ids=None):
+    """Build the statement selecting the newest topics waiting for a classification"""
+    # Find posts where classifications is NULL or classified_at is NULL
+    query = select(*TOPIC_COLUMNS).where(_unclassified())
+    if exclude_ids:
+        query = query.where(DiscoursePost.id.not_in(list(exclude_ids)))
+    return query.order_by(DiscoursePost.created_at.desc()).limit(limit)
+
+def get_unclassified_posts(limit=50, exclude_ids=None):
     """
     Get posts that have not been classified yet
     
     Args:
         limit (int): Maximum number of posts to return
+        exclude_ids (iterable): Topic IDs to leave out, e.g. ones that already failed
         
     Returns:
         list: List of unclassified posts
     """
-    session = SessionLocal()
     try:
-        logger.info(f"Fetching up to {limit} unclassified posts")
-        
-        # Find posts where classifications is NULL or classified_at is NULL
-        query = session.query(DiscoursePost).filter(
-            (DiscoursePost.classifications.is_(None)) | 
-            (DiscoursePost.classified_at.is_(None))
-        ).order_by(DiscoursePost.created_at.desc()).limit(limit)
-        
-        posts = query.all()
-        logger.info(f"Found {len(posts)} unclassified posts")
-        
-        # Convert to dictionaries
-        result = []
-        for post in posts:
-            try:
-                post_dict = post.to_dict()
-                result.append(post_dict)
-                logger.info(f"Added unclassified post: ID={post.id}, Title={post.title}")
-            except Exception as e:
-                logger.error(f"Error converting post {post.id} to dict: {str(e)}")
-        
+        with engine.connect() as conn:
+            result = [topic_row_to_dict(row) for row in conn.execute(_unclassified_query(limit, exclude_ids))]
+        logger.info(f"Found {len(result)} unclassified posts")
         return result
     
     except Exception as e:
         logger.error(f"Error fetching unclassified posts: {str(e)}")
         return []
+
+def count_unclassified_posts():
+    """
+    Count posts that have not been classified yet
     
+    Returns:
+        int: Number of unclassified posts
+    """
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(DiscoursePost).where(_unclassified())).scalar()
+
+def _classification_rows(classified_posts):
+    """Bind parameters of the classification update for topics that have an ID"""
+    classified_at = datetime.datetime.utcnow()
+    return [
+        {
+            "topic_id": post["id"],
+            "classifications": post.get("classifications", []),
+            "primary_classification": post.get("primary_classification", "neutral"),
+            "classified_at": classified_at,
+            "classification_method": post.get("classification_method"),
+        }
+        for post in classified_posts if post.get("id")
+    ]
+
+def _update_classifications(conn, rows, only_unclassified=False):
+    """
+    Write classification rows to their topics on an open connection
+    
+    Args:
+        conn: Connection inside a transaction
+        rows (list): Rows from _classification_rows
+        only_unclassified (bool): Leave topics alone that got classified in the meantime
+        
+    Returns:
+        int: Number of topics updated
+    """
+    if not rows:
+        return 0
+    stmt = update(DiscoursePost.__table__).where(DiscoursePost.__table__.c.id == bindparam("topic_id"))
+    if only_unclassified:
+        stmt = stmt.where(_unclassified())
+    stmt = stmt.values(
+        classifications=bindparam("classifications"),
+        primary_classification=bindparam("primary_classification"),
+        classified_at=bindparam("classified_at"),
+        classification_method=bindparam("classification_method"),
+    )
+    return conn.execute(stmt, rows).rowcount
+
+def save_classifications(classified_posts):
+    """
+    Write classifications back to their topics in one transaction
+    
+    Args:
+        classified_posts (list): Topic dictionaries with id, classifications and primary_classification
+        
+    Returns:
+        int: Number of topics updated
+    """
+    rows = _classification_rows(classified_posts)
+    if not rows:
+        return 0
+    
+    with engine.begin() as conn:
+        updated = _update_classifications(conn, rows)
+    logger.info(f"Saved classifications of {updated} topics")
+    return updated
+
+def get_classified_posts(limit=10000):
+    """
+    Get the title, content and primary classification of topics labeled by the LLM
+    
+    Only topics whose classification_method says the LLM labeled them, directly
+    or through the classification cache, are returned, so they can serve as
+    the pre-classifier's training data. Topics classified before the column
+    existed are left out, since they may hold fallback sentiment guesses.
+    
+    Args:
+        limit (int): Maximum number of topics to return, newest classifications first
+        
+    Returns:
+        list: Dictionaries with id, title, content and primary_classification
+    """
+    query = (
+        select(DiscoursePost.id, DiscoursePost.title, DiscoursePost.content, DiscoursePost.primary_classification)
+        .where(DiscoursePost.classified_at.is_not(None))
+        .where(DiscoursePost.classification_method.in_(["llm", "cache"]))
+        .order_by(DiscoursePost.classified_at.desc())
+        .limit(limit)
+    )
+    with engine.connect() as conn:
+        return [dict(row._mapping) for row in conn.execute(query)]
+
+def create_classification_job(max_posts=None, chunk_size=50):
+    """
+    Queue a classification job over the topics that are unclassified now
+    
+    Args:
+        max_posts (int): Classify at most this many topics, None for all of them
+        chunk_size (int): Topics classified and committed together
+        
+    Returns:
+        dict: The new job
+    """
+    total = count_unclassified_posts()
+    if max_posts is not None:
+        total = min(total, max_posts)
+    session = SessionLocal()
+    try:
+        job = ClassificationJob(status="queued", total=total, max_posts=max_posts, chunk_size=chunk_size)
+        session.add(job)
+        session.commit()
+        return job.to_dict()
+    finally:
+        session.close()
+
+def get_classification_job(job_id):
+    """
+    Get a classification job by ID
+    
+    Returns:
+        dict: The job, or None if there is none with that ID
+    """
+    session = SessionLocal()
+    try:
+        job = session.get(ClassificationJob, job_id)
+        return job.to_dict() if job else None
+    finally:
+        session.close()
+
+def get_classification_jobs(limit=20, unfinished=False):
+    """
+    Get classification jobs
+    
+    Args:
+        limit (int): Maximum number of jobs to return
+        unfinished (bool): Only queued and running jobs, oldest first; otherwise newest first
+        
+    Returns:
+        list: List of jobs
+    """
+    session = SessionLocal()
+    try:
+        query = session.query(ClassificationJob)
+        if unfinished:
+            query = query.filter(ClassificationJob.status.in_(["queued", "running"])).order_by(ClassificationJob.id)
+        else:
+            query = query.order_by(ClassificationJob.id.desc())
+        return [job.to_dict() for job in query.limit(limit).all()]
     finally:
         session.close()
 
+def claim_classification_job(job_id, worker_id, lease_seconds):
+    """
+    Take a classification job for one runner
+    
+    A queued job can be claimed by any runner; a running one only by the
+    runner holding it or, once its lease has expired, by another runner. The
+    check and the claim are one UPDATE, so two runners never both get a job.
+    
+    Args:
+        job_id (int): Job ID
+        worker_id (str): ID of the claiming runner
+        lease_seconds (float): How long the claim holds without being renewed
+        
+    Returns:
+        dict: The claimed job, or None if another runner holds it or it is finished
+    """
+    jobs = ClassificationJob.__table__
+    now = datetime.datetime.utcnow()
+    claimable = (jobs.c.status == "queued") | (
+        (jobs.c.status == "running")
+        & ((jobs.c.worker_id == worker_id) | jobs.c.lease_expires_at.is_(None) | (jobs.c.lease_expires_at < now))
+    )
+    with engine.begin() as conn:
+        claimed = conn.execute(
+            update(jobs).where(jobs.c.id == job_id).where(claimable).values(
+                status="running",
+                worker_id=worker_id,
+                lease_expires_at=now + datetime.timedelta(seconds=lease_seconds),
+                started_at=func.coalesce(jobs.c.started_at, now),
+                updated_at=now,
+            )
+        ).rowcount
+    return get_classification_job(job_id) if claimed else None
+
+def save_job_classifications(job_id, worker_id, lease_seconds, classified_posts, failed_ids=(), elapsed=0.0):
+    """
+    Write a chunk's classifications and the job's progress in one transaction,
+    renewing the runner's lease on the job
+    
+    Only topics that are still unclassified are written, so processed counts
+    the topics this chunk actually classified. A topic counts as failed at
+    most once per job, however often it is retried.
+    
+    Args:
+        job_id (int): Job ID
+        worker_id (str): ID of the runner holding the job
+        lease_seconds (float): How long the renewed lease holds
+        classified_posts (list): Topic dictionaries with id, classifications and primary_classification
+        failed_ids (iterable): IDs of the chunk's topics that got no classification
+        elapsed (float): Seconds spent on the chunk
+        
+    Returns:
+        dict: The updated job, or None if the runner no longer holds it, in
+        which case nothing is written
+    """
+    rows = _classification_rows(classified_posts)
+    jobs = ClassificationJob.__table__
+    now = datetime.datetime.utcnow()
+    held = (jobs.c.id == job_id) & (jobs.c.worker_id == worker_id) & (jobs.c.status == "running")
+    with engine.begin() as conn:
+        # Renewing the lease first also takes the write lock for the rest of the transaction
+        renewed = conn.execute(
+            update(jobs).where(held).values(lease_expires_at=now + datetime.timedelta(seconds=lease_seconds))
+        ).rowcount
+        if not renewed:
+            return None
+        processed = _update_classifications(conn, rows, only_unclassified=True)
+        known_failed = conn.execute(select(jobs.c.failed_ids).where(jobs.c.id == job_id)).scalar() or []
+        already_failed = set(known_failed)
+        newly_failed = [topic_id for topic_id in dict.fromkeys(failed_ids) if topic_id not in already_failed]
+        conn.execute(
+            update(jobs).where(held).values(
+                processed=jobs.c.processed + processed,
+                failed=jobs.c.failed + len(newly_failed),
+                failed_ids=known_failed + newly_failed,
+                elapsed_seconds=jobs.c.elapsed_seconds + elapsed,
+                updated_at=now,
+            )
+        )
+    return get_classification_job(job_id)
+
+def finish_classification_job(job_id, worker_id, status, error=None):
+    """
+    Mark a job held by a runner as completed or failed and release it
+    
+    Returns:
+        dict: The finished job, or None if the runner no longer holds it
+    """
+    jobs = ClassificationJob.__table__
+    now = datetime.datetime.utcnow()
+    with engine.begin() as conn:
+        finished = conn.execute(
+            update(jobs).where(jobs.c.id == job_id).where(jobs.c.worker_id == worker_id).where(jobs.c.status == "running")
+            .values(status=status, error=error, finished_at=now, updated_at=now, lease_expires_at=None)
+        ).rowcount
+    return get_classification_job(job_id) if finished else None
+
+def get_classification_job_failed_ids(job_id):
+    """
+    Get the IDs of the topics a classification job could not classify
+    
+    Returns:
+        list: Topic IDs
+    """
+    jobs = ClassificationJob.__table__
+    with engine.connect() as conn:
+        return conn.execute(select(jobs.c.failed_ids).where(jobs.c.id == job_id)).scalar() or []
+
 def get_engine():
     """
     Get the SQLAlchemy engine
@@ -0,0 +1,151 @@
+"""
+Cross-Source Feed for Community Surf
+
+This module merges Reddit posts, tweets and Cursor Forum topics into one
+newest-first feed. Each source is read lazily in small keyset pages through
+its database module, and the heads of the sources are merged with a heap, so
+a feed page reads at most a page or so per source no matter how large the
+tables grow. The feed cursor remembers the position of every source
+separately, which makes per-source quotas possible: a source that filled its
+quota for a page resumes from its own position on the next one.
+"""
+
+import calendar
+import datetime
+import heapq
+import logging
+import time
+
+import cursor_forum_db
+import pagination
+import reddit_db
+import twitter_db
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+FEED_SOURCES = ["reddit", "twitter", "cursor_forum"]
+FEED_SORT = "feed"  # Sort name stored in feed cursors
+DEFAULT_FEED_LIMIT = 30
+MAX_FEED_LIMIT = 100
+
+def _timestamp(value):
+    """Get Unix seconds from a created time as stored by any source (naive datetimes are UTC)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return float(calendar.timegm(value.utctimetuple()))
+
+def _fetch_page(source, limit, after, since, search, classification):
+    """Read the next newest-first page of one source"""
+    since_datetime = None
+    if since is not None:
+        since_datetime = datetime.datetime.fromtimestamp(since, datetime.timezone.utc).replace(tzinfo=None)
+    if source == "reddit":
+        return reddit_db.get_feed_page(limit, after=after, since=since, search=search)
+    if source == "twitter":
+        return twitter_db.get_feed_page(limit, after=after, since=since_datetime, search=search)
+    return cursor_forum_db.get_feed_page(limit, after=after, since=since_datetime, search=search,
+                                         classification=classification)
+
+def _read_source(source, page_size, after, since, search, classification):
+    """
+    Yield a source's posts newest first, fetching one page at a time
+
+    Yields:
+        tuple: (post dictionary, sort key values)
+    """
+    while True:
+        rows = _fetch_page(source, page_size, after, since, search, classification)
+        yield from rows
+        if len(rows) < page_size:
+            return
+        after = rows[-1][1]
+
+def get_feed(limit=DEFAULT_FEED_LIMIT, cursor=None, sources=None, time_filter='all', search=None,
+             classification=None, quotas=None):
+    """
+    Get a page of the merged feed
+
+    Args:
+        limit (int): Maximum number of posts in the page
+        cursor (str): next_cursor of the previous page
+        sources (list): Sources to include, defaults to FEED_SOURCES
+        time_filter (str): 'all', 'day', 'week', 'month' or 'year'
+        search (str): Text every post must match
+        classification (str): Only posts with this primary classification; only
+            Cursor Forum topics are classified, so other sources are left out
+        quotas (dict): Maximum posts per source in one page
+
+    Returns:
+        tuple: (list of feed items, cursor token of the next page or None). Each
+        item has the source, the created time in Unix seconds and the post as
+        returned by the source's own endpoints.
+
+    Raises:
+        pagination.InvalidCursor: If the cursor is malformed
+        ValueError: If a quota is negative
+    """
+    # SQLite reads a negative LIMIT as no limit, so page sizes are kept at 1 or more
+    limit = max(1, min(limit, MAX_FEED_LIMIT))
+    quotas = quotas or {}
+    if any(quota < 0 for quota in quotas.values()):
+        raise ValueError("Feed quotas must not be negative")
+    sources = [source for source in (sources or FEED_SOURCES) if source in FEED_SOURCES and quotas.get(source) != 0]
+    if classification:
+        sources = [source for source in sources if source == "cursor_forum"]
+
+    # Position of each source: None before its first post, the sort key of the
+    # last post served, or "done" once it has nothing left
+    positions = {source: None for source in sources}
+    if cursor:
+        saved = pagination.decode_cursor(cursor, FEED_SORT)[0]
+        if not isinstance(saved, dict):
+            raise pagination.InvalidCursor("Feed cursor has no source positions")
+        positions.update({source: saved.get(source) for source in sources})
+
+    since = None
+    if time_filter in reddit_db.TIME_FILTER_SECONDS:
+        since = time.time() - reddit_db.TIME_FILTER_SECONDS[time_filter]
+
+    # Sources never need to read past the page size or their quota
+    readers = {}
+    heap = []
+    for source in sources:
+        if positions[source] == "done":
+            continue
+        page_size = min(limit, quotas.get(source, limit)) + 1
+        readers[source] = _read_source(source, page_size, positions[source], since, search, classification)
+        _push_next(heap, readers, source)
+
+    items = []
+    served = {source: 0 for source in sources}
+    while heap and len(items) < limit:
+        _, source, _, post, keys = heapq.heappop(heap)
+        items.append({"source": source, "created_utc": _timestamp(keys[0]), "post": post})
+        positions[source] = keys
+        served[source] += 1
+        # A source that filled its quota stays where it is until the next page
+        if served[source] < quotas.get(source, limit):
+            _push_next(heap, readers, source)
+
+    # Sources whose reader ran dry have nothing after their position
+    for source, reader in readers.items():
+        if reader is None:
+            positions[source] = "done"
+
+    if all(position == "done" for position in positions.values()):
+        return items, None
+    return items, pagination.encode_cursor(FEED_SORT, [positions])
+
+def _push_next(heap, readers, source):
+    """Push a source's next post onto the merge heap, or mark the source finished"""
+    try:
+        post, keys = next(readers[source])
+    except StopIteration:
+        readers[source] = None
+        return
+    # heapq pops the smallest entry: newest first, then by source and ID for a stable order
+    heapq.heappush(heap, (-_timestamp(keys[0]), source, -keys[1], post, keys))
@@ -0,0 +1,77 @@
+"""
+Concurrent Fetch Engine for Community Surf
+
+This module runs independent upstream fetches (scraper pages, API searches) on a
+shared, bounded thread pool, so a batch of fetches completes when its slowest
+fetch completes instead of after the sum of all of them.
+"""
+
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Global limit on upstream fetches in flight, shared by every caller in the process
+MAX_CONCURRENT_FETCHES = int(os.getenv("MAX_CONCURRENT_FETCHES", "10"))
+THREAD_NAME_PREFIX = "fetch-engine"
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Return the shared fetch thread pool, creating it on first use"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=MAX_CONCURRENT_FETCHES,
+                thread_name_prefix=THREAD_NAME_PREFIX
+            )
+        return _executor
+
+def _in_worker_thread():
+    """Check whether the current thread already belongs to the fetch pool"""
+    return threading.current_thread().name.startswith(THREAD_NAME_PREFIX)
+
+def _run_safely(fetch_fn, args, kwargs):
+    """Run a single fetch, logging and swallowing its errors"""
+    try:
+        return fetch_fn(*args, **kwargs)
+    except Exception as e:
+        logger.error(f"Fetch {getattr(fetch_fn, '__name__', fetch_fn)}{args} failed: {e}")
+        return None
+
+def fetch_all(fetch_fn, calls, timeout=None):
+    """
+    Run fetch_fn once per call concurrently on the shared fetch pool
+
+    Args:
+        fetch_fn (callable): Function performing a single fetch
+        calls (list): List of (args, kwargs) tuples, one per fetch
+        timeout (float, optional): Maximum seconds to wait for the whole batch
+
+    Returns:
+        list: Results in the same order as calls; failed or timed-out fetches yield None
+    """
+    if not calls:
+        return []
+
+    # Fetches started from inside the pool run inline, so nested batches
+    # can never wait on workers that are all busy waiting themselves
+    if _in_worker_thread():
+        return [_run_safely(fetch_fn, args, kwargs) for args, kwargs in calls]
+
+    executor = get_executor()
+    futures = [executor.submit(_run_safely, fetch_fn, args, kwargs) for args, kwargs in calls]
+    done, not_done = wait(futures, timeout=timeout)
+
+    if not_done:
+        logger.warning(f"{len(not_done)} of {len(futures)} fetches did not finish within {timeout}s")
+        for future in not_done:
+            future.cancel()
+
+    return [future.result() if future in done else None for future in futures]
@@ -0,0 +1,118 @@
+"""
+Hot Score for Community Surf
+
+This module computes the stored hot score that the 'hot' sorts order by. The
+score is log10 of a post's engagement plus its age bonus: creation time in
+seconds divided by HOT_DECAY_SECONDS. Every HOT_DECAY_SECONDS of recency are
+worth ten times the engagement, so older posts sink as newer ones arrive.
+
+Because time enters through the creation time rather than the current time,
+a score only changes when engagement does. It is written together with the
+engagement counters on every save and can be kept in an ordinary index. The
+batch rescore below backfills new columns and applies formula changes; it
+does not have to run on a timer.
+
+Usage:
+    python hot_score.py  # Rescore every topic and tweet in batches
+"""
+
+import calendar
+import datetime
+import logging
+import math
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+HOT_DECAY_SECONDS = 45000  # 12.5 hours of recency outweigh 10x the engagement
+HOT_EPOCH = 1577836800  # 2020-01-01 UTC, keeps scores small
+RESCORE_BATCH_SIZE = 1000
+
+def _timestamp(created_at):
+    """Get Unix seconds from a datetime (naive means UTC), a stored datetime string or a number"""
+    if created_at is None:
+        return HOT_EPOCH
+    if isinstance(created_at, (int, float)):
+        return float(created_at)
+    if isinstance(created_at, str):
+        try:
+            created_at = datetime.datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        except ValueError:
+            logger.warning(f"Unparseable created_at for hot score: {created_at}")
+            return HOT_EPOCH
+    return float(calendar.timegm(created_at.utctimetuple()))
+
+def hot_score(engagement, created_at):
+    """
+    Compute the hot score of a post
+
+    Args:
+        engagement (float): Weighted engagement count
+        created_at: Creation time as a datetime, a stored datetime string or Unix seconds
+
+    Returns:
+        float: Hot score, higher is hotter
+    """
+    return round(math.log10(max(engagement or 0, 1)) + (_timestamp(created_at) - HOT_EPOCH) / HOT_DECAY_SECONDS, 7)
+
+def topic_hot_score(views, replies, created_at):
+    """Hot score of a Cursor Forum topic, from its views and replies"""
+    return hot_score((views or 0) * 0.5 + (replies or 0) * 2, created_at)
+
+def tweet_hot_score(likes, retweets, created_at):
+    """Hot score of a tweet, from its likes and retweets"""
+    return hot_score((likes or 0) + (retweets or 0), created_at)
+
+# Table, engagement columns and score function per source
+RESCORE_SOURCES = {
+    "cursor_forum": ("cursor_posts", ("views", "replies"), topic_hot_score),
+    "twitter": ("twitter_posts", ("likes", "retweets"), tweet_hot_score),
+}
+
+def rescore(conn, source, batch_size=RESCORE_BATCH_SIZE, commit=False):
+    """
+    Recompute the hot score of every row of a source, in batches of rows
+
+    Args:
+        conn: DB-API connection to the source's database
+        source (str): Key of RESCORE_SOURCES
+        batch_size (int): Rows read and updated per batch
+        commit (bool): Commit after each batch, so writers are never blocked for
+            long; leave False when running inside a caller's transaction
+
+    Returns:
+        int: Number of rows rescored
+    """
+    table, columns, score = RESCORE_SOURCES[source]
+    cursor = conn.cursor()
+    last_id = 0
+    rescored = 0
+    while True:
+        cursor.execute(
+            f"SELECT id, {', '.join(columns)}, created_at FROM {table} WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size)
+        )
+        rows = [tuple(row) for row in cursor.fetchall()]
+        if not rows:
+            break
+        cursor.executemany(
+            f"UPDATE {table} SET hot_score = ? WHERE id = ?",
+            [(score(*row[1:]), row[0]) for row in rows]
+        )
+        if commit:
+            conn.commit()
+        last_id = rows[-1][0]
+        rescored += len(rows)
+    return rescored
+
+if __name__ == "__main__":
+    import cursor_forum_db
+    import twitter_db
+
+    forum_connection = cursor_forum_db.engine.raw_connection()
+    try:
+        logger.info(f"Rescored {rescore(forum_connection, 'cursor_forum', commit=True)} Cursor Forum topics")
+    finally:
+        forum_connection.close()
+    logger.info(f"Rescored {rescore(twitter_db.get_connection(), 'twitter', commit=True)} tweets")
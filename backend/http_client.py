@@ -0,0 +1,135 @@
+"""
+Shared HTTP Client Layer for Community Surf
+
+This module provides a single pooled requests session used by every outbound
+client (Reddit scraper, Cursor forum, Twitter). Connections are kept alive and
+reused per host, idempotent requests are retried on transient server errors,
+and connection reuse is counted so it can be reported in /api/stats.
+"""
+
+import logging
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Keep-alive connections kept open per upstream host
+HOST_POOL_SIZES = {
+    "old.reddit.com": 10,
+    "forum.cursor.com": 4,
+    "api.twitter.com": 2,
+}
+DEFAULT_POOL_SIZE = 4
+
+# Retry transient server errors on idempotent requests; 429s are left to the callers
+RETRY_TOTAL = 2
+RETRY_BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# Connection counters per host
+_stats = {}
+_stats_lock = threading.Lock()
+
+_session = None
+_session_lock = threading.Lock()
+
+def _record(host, field):
+    """Increment a per-host connection counter"""
+    with _stats_lock:
+        host_stats = _stats.setdefault(host, {"requests": 0, "new_connections": 0})
+        host_stats[field] += 1
+
+class CountingHTTPConnectionPool(HTTPConnectionPool):
+    """HTTP connection pool that counts newly opened connections"""
+
+    def _new_conn(self):
+        _record(self.host, "new_connections")
+        return super()._new_conn()
+
+class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS connection pool that counts newly opened connections"""
+
+    def _new_conn(self):
+        _record(self.host, "new_connections")
+        return super()._new_conn()
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Transport adapter with counting connection pools"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool,
+        }
+
+    def send(self, request, **kwargs):
+        _record(urlparse(request.url).hostname, "requests")
+        return super().send(request, **kwargs)
+
+def _build_adapter(pool_size):
+    """Create a pooled adapter with the shared retry policy"""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF_FACTOR,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+        respect_retry_after_header=True,
+    )
+    return PooledHTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+def create_session():
+    """
+    Create a requests session with per-host connection pools
+
+    Returns:
+        requests.Session: Session with keep-alive pools and retry adapters mounted
+    """
+    session = requests.Session()
+    session.mount("http://", _build_adapter(DEFAULT_POOL_SIZE))
+    session.mount("https://", _build_adapter(DEFAULT_POOL_SIZE))
+    for host, pool_size in HOST_POOL_SIZES.items():
+        session.mount(f"https://{host}/", _build_adapter(pool_size))
+    return session
+
+def get_session():
+    """Return the process-wide shared session, creating it on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+def get(url, **kwargs):
+    """Send a GET request through the shared session (same arguments as requests.get)"""
+    return get_session().get(url, **kwargs)
+
+def get_stats():
+    """
+    Get connection reuse counters
+
+    Returns:
+        dict: Per-host and total request, new connection and reused connection counts
+    """
+    with _stats_lock:
+        hosts = {host: dict(counts) for host, counts in _stats.items()}
+
+    for counts in hosts.values():
+        counts["reused_connections"] = max(0, counts["requests"] - counts["new_connections"])
+
+    total_requests = sum(c["requests"] for c in hosts.values())
+    total_new = sum(c["new_connections"] for c in hosts.values())
+    return {
+        "requests": total_requests,
+        "new_connections": total_new,
+        "reused_connections": max(0, total_requests - total_new),
+        "hosts": hosts,
+    }
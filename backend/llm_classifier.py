@@ -1,10 +1,18 @@
 import os
 import json
+import hashlib
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any, Optional, Union
 import traceback
 
+import pre_classifier
+import rate_limiter
+from classification_cache import ClassificationCache, content_hash
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,6 +23,8 @@ try:
     openai_version = getattr(openai, "__version__", "unknown")
     logger.info(f"OpenAI package is available (version: {openai_version})")
     OPENAI_AVAILABLE = True
+    if hasattr(openai, "OpenAI"):
+        import httpx
 except ImportError:
     logger.warning("OpenAI package not installed. Run 'pip install openai' to enable classification.")
     OPENAI_AVAILABLE = False
@@ -30,6 +40,40 @@ CATEGORIES = {
     "neutral": "⚪ Neutral"
 }
 
+# Model and batching settings
+CLASSIFICATION_MODEL = os.getenv("CLASSIFICATION_MODEL", "gpt-3.5-turbo")
+CLASSIFICATION_BATCH_SIZE = int(os.getenv("CLASSIFICATION_BATCH_SIZE", 10))  # Posts per request, 1 disables batching
+MAX_BATCH_CONTENT_CHARS = 1500  # Keeps a full batch within the model's context
+BATCH_TOKENS_PER_POST = 40  # Response budget per post in a batch
+
+# Concurrency and upstream budgets; the per-minute limits live in rate_limiter.UPSTREAM_LIMITS
+CLASSIFICATION_WORKERS = int(os.getenv("CLASSIFICATION_WORKERS", 4))  # Requests in flight per classify_posts call
+REQUEST_LIMITER_NAME = "openai"
+TOKEN_LIMITER_NAME = "openai_tokens"
+CHARS_PER_TOKEN = 4  # Rough prompt size estimate for the token budget
+MAX_RATE_LIMIT_RETRIES = 5
+INITIAL_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+REQUEST_TIMEOUT_SECONDS = 60
+
+# Reuse classifications of post texts seen before, see classification_cache.py
+CLASSIFICATION_CACHE_ENABLED = os.getenv("CLASSIFICATION_CACHE", "true").lower() == "true"
+
+# Label obvious posts locally instead of calling the API, see pre_classifier.py
+PRE_CLASSIFIER_ENABLED = os.getenv("PRE_CLASSIFIER", "true").lower() == "true"
+
+SYSTEM_PROMPT = "You are a helpful assistant that analyzes and classifies community posts."
+
+CATEGORY_INSTRUCTIONS = """
+        - positive_feedback: Post contains positive feedback about the product/service
+        - frustration: Post expresses frustration or negative sentiment
+        - bug_report: Post describes a bug or technical issue
+        - feature_suggestion: Post suggests a new feature or improvement
+        - trending_topic: Post discusses a trending topic in the community
+        - question: Post asks a question seeking help or information
+        - neutral: Post doesn't fit into any of the above categories
+"""
+
 class LLMClassifier:
     """
     Classifies posts using LLM API (GPT-4 or equivalent)
@@ -41,10 +85,32 @@ class LLMClassifier:
         """
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         
+        self._client = None
+        self._lock = threading.Lock()
+        self._api_calls = 0
+        self._batch_calls = 0
+        self._resent_posts = 0
+        self._prompt_tokens = 0
+        self._completion_tokens = 0
+        self._rate_limited = 0
+        self._backoff = INITIAL_BACKOFF_SECONDS
+        
         if OPENAI_AVAILABLE and self.api_key:
             try:
-                # Set API key for older OpenAI API versions
-                openai.api_key = self.api_key
+                if hasattr(openai, "OpenAI"):
+                    # openai>=1.0 client; 429s are retried by _complete against the
+                    # shared budgets, and the connection pool fits the workers
+                    self._client = openai.OpenAI(
+                        api_key=self.api_key,
+                        max_retries=0,
+                        http_client=httpx.Client(
+                            timeout=REQUEST_TIMEOUT_SECONDS,
+                            limits=httpx.Limits(max_connections=max(CLASSIFICATION_WORKERS, 1))
+                        )
+                    )
+                else:
+                    # Set API key for older OpenAI API versions
+                    openai.api_key = self.api_key
                 logger.info("OpenAI initialized successfully")
             except Exception as e:
                 logger.error(f"Error initializing OpenAI: {e}")
@@ -91,85 +157,305 @@ class LLMClassifier:
             prompt = self._build_classification_prompt(title, content)
             
             # Call OpenAI API
-            try:
-                logger.info(f"Calling OpenAI API for post {post_id}")
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",  # Use an available model
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that analyzes and classifies community posts."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1,  # Low temperature for consistent classification
-                    max_tokens=500
-                )
-                
-                # Parse the response
-                classification_text = response.choices[0].message.content
-                classifications = self._parse_classification_response(classification_text)
-                
-                logger.info(f"Successfully classified post {post_id} as: {classifications}")
-                
-                # Add classifications to post
-                return {
-                    **post,
-                    "classifications": classifications,
-                    "primary_classification": classifications[0] if classifications else "neutral",
-                    "classified_at": datetime.utcnow().isoformat()
-                }
-            except AttributeError:
-                # Try alternative API (older OpenAI versions)
-                logger.info(f"Trying alternative OpenAI API call for post {post_id}")
-                response = openai.Completion.create(
-                    model="text-davinci-003",
-                    prompt=prompt,
-                    temperature=0.1,
-                    max_tokens=500
-                )
-                
-                classification_text = response.choices[0].text
-                classifications = self._parse_classification_response(classification_text)
-                
-                logger.info(f"Successfully classified post {post_id} with alternative API: {classifications}")
-                
-                return {
-                    **post,
-                    "classifications": classifications,
-                    "primary_classification": classifications[0] if classifications else "neutral",
-                    "classified_at": datetime.utcnow().isoformat()
-                }
+            logger.info(f"Calling OpenAI API for post {post_id}")
+            classification_text = self._complete(prompt, max_tokens=500)
+            classifications = self._parse_classification_response(classification_text)
+            if not classifications:
+                # A guess must not pass for an LLM label, which would be saved, cached and trained on
+                logger.warning(f"No valid classification for post {post_id}, using the fallback")
+                return self._generate_fallback_classification(post)
+            
+            logger.info(f"Successfully classified post {post_id} as: {classifications}")
+            
+            # Add classifications to post
+            return self._with_classifications(post, classifications)
             
         except Exception as e:
             logger.error(f"Error classifying post {post_id}: {e}")
             logger.error(traceback.format_exc())
             return self._generate_fallback_classification(post)
     
-    def classify_posts(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def classify_posts(self, posts: List[Dict[str, Any]], batch_size: Optional[int] = None,
+                       workers: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Classify a batch of posts
+        Classify a list of posts, several posts per API request and several requests at once
+        
+        Posts are sent in batches of batch_size (CLASSIFICATION_BATCH_SIZE by
+        default) and the model answers with a JSON object keyed by post ID.
+        Posts whose entries are missing or invalid are sent once more in a
+        batch of their own, and those still failing are classified one by one.
+        Posts of a batch whose request fails get the fallback classification.
+        
+        Up to workers requests (CLASSIFICATION_WORKERS by default) run
+        concurrently, each waiting for the shared request and token budgets.
+        Texts found in the classification cache, posts the trained
+        pre-classifier is confident about (except its audit sample) and repeats
+        of a text within posts are not sent at all.
+        
+        Returns:
+            List of classified posts, in the order of the input
         """
-        classified_posts = []
+        batch_size = CLASSIFICATION_BATCH_SIZE if batch_size is None else batch_size
+        workers = CLASSIFICATION_WORKERS if workers is None else workers
+        if not self.is_available():
+            return [self.classify_post(post) for post in posts]
         
-        for post in posts:
-            classified_post = self.classify_post(post)
-            classified_posts.append(classified_post)
+        classified_posts = list(posts)
+        # Posts that still need a classification, by position
+        pending = [
+            i for i, post in enumerate(posts)
+            if not (isinstance(post.get('classifications'), list) and post.get('classifications'))
+        ]
+        hashes = {}
+        cache = get_classification_cache()
+        if cache is not None and pending:
+            hashes = {i: content_hash(posts[i].get('title'), posts[i].get('content')) for i in pending}
+            cached = cache.get_many([hashes[i] for i in pending])
+            for i in pending:
+                if hashes[i] in cached:
+                    classified_posts[i] = {
+                        **self._with_classifications(posts[i], cached[hashes[i]]),
+                        "classification_method": "cache"
+                    }
+            pending = [i for i in pending if hashes[i] not in cached]
+        
+        # Confident local labels skip the API; the audit sample is sent anyway to measure agreement
+        audits = {}
+        pre = pre_classifier.get_pre_classifier() if PRE_CLASSIFIER_ENABLED and pending else None
+        if pre is not None:
+            labeled_locally = set()
+            # Rules without a trained model are never trusted, every confident guess is audited
+            rules_only = not pre.trained
+            for i, (label, confidence) in zip(pending, pre.predict([posts[i] for i in pending])):
+                if not pre.confident(confidence):
+                    continue
+                if rules_only or pre.in_audit(posts[i]):
+                    audits[i] = label
+                else:
+                    classified_posts[i] = {
+                        **self._with_classifications(posts[i], [label]),
+                        "classification_method": "local"
+                    }
+                    labeled_locally.add(i)
+            pre.record(accepted=len(labeled_locally))
+            pending = [i for i in pending if i not in labeled_locally]
+        
+        # Only the first post with a given text is sent
+        repeats = {}
+        if hashes:
+            first_position = {}
+            for i in pending:
+                first_position.setdefault(hashes[i], i)
+            repeats = {i: first_position[hashes[i]] for i in pending if first_position[hashes[i]] != i}
+            pending = [i for i in pending if i not in repeats]
+        
+        step = max(batch_size, 1)
+        units = [pending[start:start + step] for start in range(0, len(pending), step)]
+        if not units:
+            return classified_posts
+        
+        # Each unit fills its own positions, so results keep the input order
+        def classify_unit(positions):
+            if batch_size <= 1:
+                classified_posts[positions[0]] = self.classify_post(posts[positions[0]])
+            else:
+                self._classify_unit(posts, positions, classified_posts)
+        
+        if workers <= 1 or len(units) == 1:
+            for positions in units:
+                classify_unit(positions)
+        else:
+            with ThreadPoolExecutor(max_workers=min(workers, len(units)), thread_name_prefix="classifier") as executor:
+                list(executor.map(classify_unit, units))
+        
+        if cache is not None:
+            # Fallback classifications are guesses and are not kept
+            cache.put_many({
+                hashes[i]: classified_posts[i]["classifications"] for i in pending
+                if classified_posts[i].get("classification_method") == "llm"
+            })
+        for i, first in repeats.items():
+            if classified_posts[first].get("classification_method") == "fallback":
+                classified_posts[i] = self._generate_fallback_classification(posts[i])
+            else:
+                classified_posts[i] = self._with_classifications(posts[i], classified_posts[first]["classifications"])
+        if audits:
+            pre.record(audits=[
+                classified_posts[i]["primary_classification"] == label for i, label in audits.items()
+                if classified_posts[i].get("classification_method") != "fallback"
+            ])
         
         return classified_posts
     
+    def _classify_unit(self, posts: List[Dict[str, Any]], positions: List[int],
+                       classified_posts: List[Dict[str, Any]]):
+        """
+        Classify one batch of posts, re-sending the ones whose entries failed
+        """
+        failed = self._classify_batch(posts, positions, classified_posts)
+        if failed:
+            logger.info(f"Re-sending {len(failed)} posts whose classifications failed to parse")
+            with self._lock:
+                self._resent_posts += len(failed)
+            failed = self._classify_batch(posts, failed, classified_posts)
+        if failed is None:
+            for i in positions:
+                if classified_posts[i] is posts[i]:
+                    classified_posts[i] = self._generate_fallback_classification(posts[i])
+            return
+        for i in failed:
+            classified_posts[i] = self.classify_post(posts[i])
+    
+    def _classify_batch(self, posts: List[Dict[str, Any]], positions: List[int],
+                        classified_posts: List[Dict[str, Any]]) -> List[int]:
+        """
+        Classify the posts at the given positions with one request
+        
+        Returns:
+            Positions of the posts that got no valid classification, or None if
+            the request failed
+        """
+        keys = [self._post_key(posts[i], i) for i in positions]
+        prompt = self._build_batch_prompt([(key, posts[i]) for key, i in zip(keys, positions)])
+        try:
+            response_text = self._complete(prompt, max_tokens=BATCH_TOKENS_PER_POST * len(positions) + 100)
+        except Exception as e:
+            logger.error(f"Error classifying a batch of {len(positions)} posts: {e}")
+            return None
+        with self._lock:
+            self._batch_calls += 1
+        
+        parsed = self._parse_batch_response(response_text)
+        failed = []
+        for key, i in zip(keys, positions):
+            classifications = parsed.get(key)
+            if classifications:
+                classified_posts[i] = self._with_classifications(posts[i], classifications)
+            else:
+                failed.append(i)
+        logger.info(f"Classified {len(positions) - len(failed)} of {len(positions)} posts in one request")
+        return failed
+    
+    def _complete(self, prompt: str, max_tokens: int) -> str:
+        """
+        Send a prompt to the chat completion API and return the reply text
+        
+        Waits for the shared request and token budgets first. A 429 response
+        pauses the request budget for every worker with exponential backoff
+        (or the server's Retry-After) before the request is retried.
+        """
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ]
+        # Rate limits count the prompt and the largest possible completion
+        estimated_tokens = (len(SYSTEM_PROMPT) + len(prompt)) // CHARS_PER_TOKEN + max_tokens
+        
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            rate_limiter.get_limiter(REQUEST_LIMITER_NAME).acquire()
+            rate_limiter.get_limiter(TOKEN_LIMITER_NAME).acquire(estimated_tokens)
+            try:
+                response = self._create_completion(messages, max_tokens)
+                break
+            except Exception as e:
+                if getattr(e, "status_code", None) != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                    raise
+                self._handle_rate_limit(e)
+        
+        with self._lock:
+            self._backoff = INITIAL_BACKOFF_SECONDS
+        
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            # Charge the budget for tokens beyond the estimate
+            used_tokens = (usage.prompt_tokens or 0) + (usage.completion_tokens or 0)
+            if used_tokens > estimated_tokens:
+                rate_limiter.get_limiter(TOKEN_LIMITER_NAME).reserve(used_tokens - estimated_tokens)
+        with self._lock:
+            self._api_calls += 1
+            if usage is not None:
+                self._prompt_tokens += usage.prompt_tokens or 0
+                self._completion_tokens += usage.completion_tokens or 0
+        return response.choices[0].message.content or ""
+    
+    def _create_completion(self, messages: List[Dict[str, str]], max_tokens: int):
+        """
+        Make one chat completion request with whichever OpenAI API is installed
+        """
+        if self._client is not None:
+            return self._client.chat.completions.create(
+                model=CLASSIFICATION_MODEL,
+                messages=messages,
+                temperature=0.1,  # Low temperature for consistent classification
+                max_tokens=max_tokens
+            )
+        return openai.ChatCompletion.create(
+            model=CLASSIFICATION_MODEL,
+            messages=messages,
+            temperature=0.1,
+            max_tokens=max_tokens
+        )
+    
+    def _handle_rate_limit(self, error: Exception):
+        """
+        Pause the shared request budget after a 429, doubling the pause on each consecutive one
+        """
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                retry_after = float(response.headers.get("retry-after"))
+            except (TypeError, ValueError):
+                retry_after = None
+        with self._lock:
+            self._rate_limited += 1
+            backoff = retry_after if retry_after is not None else self._backoff
+            self._backoff = min(self._backoff * 2, MAX_BACKOFF_SECONDS)
+        # Workers hitting the limit together extend one pause instead of stacking theirs
+        limiter = rate_limiter.get_limiter(REQUEST_LIMITER_NAME)
+        if limiter.penalize_until(time.monotonic() + backoff):
+            logger.warning(f"OpenAI rate limit hit, backing off for {backoff:.1f} seconds")
+    
+    def _with_classifications(self, post: Dict[str, Any], classifications: List[str]) -> Dict[str, Any]:
+        """
+        Copy a post with its classifications added, marked as made by the LLM
+        """
+        return {
+            **post,
+            "classifications": classifications,
+            "primary_classification": classifications[0] if classifications else "neutral",
+            "classified_at": datetime.utcnow().isoformat(),
+            "classification_method": "llm"
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get API call, token, cache and pre-classifier counters
+        """
+        cache = _classification_cache
+        pre = pre_classifier._pre_classifier
+        with self._lock:
+            return {
+                "model": CLASSIFICATION_MODEL,
+                "batch_size": CLASSIFICATION_BATCH_SIZE,
+                "workers": CLASSIFICATION_WORKERS,
+                "api_calls": self._api_calls,
+                "batch_calls": self._batch_calls,
+                "resent_posts": self._resent_posts,
+                "prompt_tokens": self._prompt_tokens,
+                "completion_tokens": self._completion_tokens,
+                "rate_limited": self._rate_limited,
+                "cache": cache.stats() if cache is not None else None,
+                "pre_classifier": pre.stats() if pre is not None else None
+            }
+    
     def _build_classification_prompt(self, title: str, content: str) -> str:
         """
         Build a prompt for classifying the post
         """
         return f"""
         Please analyze the following post and classify it into one or more of these categories:
-        
-        - positive_feedback: Post contains positive feedback about the product/service
-        - frustration: Post expresses frustration or negative sentiment
-        - bug_report: Post describes a bug or technical issue
-        - feature_suggestion: Post suggests a new feature or improvement
-        - trending_topic: Post discusses a trending topic in the community
-        - question: Post asks a question seeking help or information
-        - neutral: Post doesn't fit into any of the above categories
-        
+        {CATEGORY_INSTRUCTIONS}
         Post title: {title}
         
         Post content: {content}
@@ -183,6 +469,10 @@ class LLMClassifier:
     def _parse_classification_response(self, response_text: str) -> List[str]:
         """
         Parse the classification response from the LLM
+        
+        Returns:
+            Valid classifications, or an empty list if the response is not a
+            JSON array naming at least one known category (e.g. a refusal)
         """
         try:
             # Extract JSON array from response
@@ -195,18 +485,83 @@ class LLMClassifier:
                 classifications = json.loads(json_str)
                 
                 # Validate classifications
-                valid_classifications = [c for c in classifications if c in CATEGORIES]
-                
-                return valid_classifications if valid_classifications else ["neutral"]
+                return [c for c in classifications if isinstance(c, str) and c in CATEGORIES]
             else:
                 logger.warning("Invalid classification response format")
-                return ["neutral"]
+                return []
         except json.JSONDecodeError:
             logger.error(f"Failed to parse classification response: {response_text}")
-            return ["neutral"]
+            return []
         except Exception as e:
             logger.error(f"Error parsing classification: {e}")
-            return ["neutral"]
+            return []
+    
+    def _post_key(self, post: Dict[str, Any], position: int) -> str:
+        """
+        Key identifying a post in a batch prompt and its response
+        """
+        post_id = post.get('id')
+        return str(post_id) if post_id is not None else f"post_{position}"
+    
+    def _build_batch_prompt(self, keyed_posts: List[tuple]) -> str:
+        """
+        Build a prompt for classifying several posts at once
+        
+        Args:
+            keyed_posts: (key, post) pairs
+        """
+        batch = [
+            {
+                "id": key,
+                "title": post.get('title', ''),
+                "content": (post.get('content') or '')[:MAX_BATCH_CONTENT_CHARS]
+            }
+            for key, post in keyed_posts
+        ]
+        return f"""
+        Please analyze each of the following posts and classify it into one or more of these categories:
+        {CATEGORY_INSTRUCTIONS}
+        Posts (JSON array):
+        {json.dumps(batch, ensure_ascii=False)}
+        
+        Respond with a single JSON object mapping every post id to a JSON array of classification
+        strings, with the most relevant classification first.
+        Example: {{"123": ["bug_report", "frustration"], "124": ["question"]}}
+        
+        Only include categories that clearly apply to each post.
+        """
+    
+    def _parse_batch_response(self, response_text: str) -> Dict[str, List[str]]:
+        """
+        Parse a batch classification response from the LLM
+        
+        Returns:
+            Post key -> valid classifications, for the entries that parsed and
+            named at least one known category
+        """
+        start_idx = response_text.find("{")
+        end_idx = response_text.rfind("}") + 1
+        if start_idx < 0 or end_idx <= start_idx:
+            logger.warning("Invalid batch classification response format")
+            return {}
+        try:
+            entries = json.loads(response_text[start_idx:end_idx])
+        except json.JSONDecodeError:
+            logger.error(f"Failed to parse batch classification response: {response_text}")
+            return {}
+        if not isinstance(entries, dict):
+            return {}
+        
+        parsed = {}
+        for key, classifications in entries.items():
+            if isinstance(classifications, str):
+                classifications = [classifications]
+            if not isinstance(classifications, list):
+                continue
+            valid_classifications = [c for c in classifications if isinstance(c, str) and c in CATEGORIES]
+            if valid_classifications:
+                parsed[str(key)] = valid_classifications
+        return parsed
     
     def _generate_fallback_classification(self, post: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -231,6 +586,38 @@ class LLMClassifier:
             "classification_method": "fallback"
         }
 
+def prompt_version() -> str:
+    """
+    Fingerprint everything that shapes a classification: the rendered prompt
+    templates, the categories and the system prompt
+    """
+    # Placeholders stand in for the posts, so only the template text is hashed
+    placeholder = {"title": "{title}", "content": "{content}"}
+    parts = [
+        SYSTEM_PROMPT,
+        json.dumps(CATEGORIES, sort_keys=True),
+        LLMClassifier._build_classification_prompt(None, "{title}", "{content}"),
+        LLMClassifier._build_batch_prompt(None, [("{id}", placeholder)]),
+        str(MAX_BATCH_CONTENT_CHARS),
+    ]
+    return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()[:16]
+
+_classification_cache = None
+_classification_cache_lock = threading.Lock()
+
+def get_classification_cache() -> Optional[ClassificationCache]:
+    """
+    Return the shared classification cache for the current prompt and model,
+    opening it on first use, or None if the cache is disabled
+    """
+    global _classification_cache
+    if not CLASSIFICATION_CACHE_ENABLED:
+        return None
+    with _classification_cache_lock:
+        if _classification_cache is None:
+            _classification_cache = ClassificationCache(prompt_version(), CLASSIFICATION_MODEL)
+        return _classification_cache
+
 # Create a singleton instance
 classifier = LLMClassifier()
 
@@ -0,0 +1,320 @@
+"""
+Schema Migrations for Community Surf
+
+This module keeps the SQLite schemas of the Cursor Forum and Twitter databases
+up to date. Each migration has a version number per database; the versions
+already applied are recorded in a schema_migrations table, so every migration
+runs exactly once per database file, in order, inside its own transaction.
+Migrations must tolerate databases that were patched by hand before this
+runner existed (e.g. by the old update_schema scripts).
+
+It also holds the query plan check: the queries the app runs are explained on
+a freshly migrated database, and any full table scan or temporary sort fails
+the check.
+
+Usage:
+    python migrations.py                # Migrate the databases in the current directory
+    python migrations.py --check-plans  # Exit non-zero if a query lost its index
+"""
+
+import argparse
+import datetime
+import logging
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+
+import hot_score
+import text_search
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Registered migrations: database name -> list of (version, name, function)
+MIGRATIONS = {}
+
+def migration(database, version, name):
+    """
+    Register a migration function for a database
+
+    Args:
+        database (str): Database the migration belongs to, e.g. 'cursor_forum'
+        version (int): Version number, unique and increasing within the database
+        name (str): Short description recorded in schema_migrations
+    """
+    def register(fn):
+        MIGRATIONS.setdefault(database, []).append((version, name, fn))
+        MIGRATIONS[database].sort(key=lambda m: m[0])
+        return fn
+    return register
+
+def _columns(conn, table):
+    """Get the column names of a table"""
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+def _add_column(conn, table, column, definition):
+    """Add a column unless it is already there"""
+    if column not in _columns(conn, table):
+        logger.info(f"Adding column {table}.{column}")
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+# Cursor Forum database
+
+@migration("cursor_forum", 1, "add classification columns")
+def _forum_classification_columns(conn):
+    _add_column(conn, "cursor_posts", "classifications", "TEXT")
+    _add_column(conn, "cursor_posts", "primary_classification", "TEXT DEFAULT 'neutral'")
+    _add_column(conn, "cursor_posts", "classified_at", "TIMESTAMP")
+
+@migration("cursor_forum", 2, "unique post_id")
+def _forum_unique_post_id(conn):
+    # Databases created before the index may hold duplicates; keep the oldest row
+    removed = conn.execute(
+        "DELETE FROM cursor_posts WHERE post_id IS NOT NULL AND id NOT IN "
+        "(SELECT MIN(id) FROM cursor_posts WHERE post_id IS NOT NULL GROUP BY post_id)"
+    ).rowcount
+    if removed:
+        logger.warning(f"Removed {removed} duplicate Cursor Forum topics before indexing post_id")
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS ux_cursor_posts_post_id ON cursor_posts (post_id)")
+
+@migration("cursor_forum", 3, "indexes for topic listing and classification")
+def _forum_query_indexes(conn):
+    # sort_by='new', with and without a category filter
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cursor_posts_created_at ON cursor_posts (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cursor_posts_category_created_at ON cursor_posts (category, created_at)")
+    # sort_by='top', with and without a category filter; also covers category counts
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cursor_posts_views ON cursor_posts (views)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cursor_posts_category_views ON cursor_posts (category, views)")
+    # get_unclassified_posts: only the posts still waiting for a classification
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS ix_cursor_posts_unclassified ON cursor_posts (created_at) "
+        "WHERE classifications IS NULL OR classified_at IS NULL"
+    )
+
+@migration("cursor_forum", 4, "full-text search index")
+def _forum_search_index(conn):
+    _create_search_index(conn, "cursor_forum")
+
+@migration("cursor_forum", 5, "fill null sort keys")
+def _forum_sort_keys_not_null(conn):
+    # Keyset pagination compares (key, id) row values, which never match a NULL key
+    conn.execute("UPDATE cursor_posts SET views = 0 WHERE views IS NULL")
+    conn.execute("UPDATE cursor_posts SET replies = 0 WHERE replies IS NULL")
+    conn.execute("UPDATE cursor_posts SET created_at = COALESCE(scraped_at, CURRENT_TIMESTAMP) WHERE created_at IS NULL")
+
+@migration("cursor_forum", 6, "stored hot score")
+def _forum_hot_score(conn):
+    _add_column(conn, "cursor_posts", "hot_score", "FLOAT DEFAULT 0.0")
+    hot_score.rescore(conn, "cursor_forum")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cursor_posts_hot_score ON cursor_posts (hot_score)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_cursor_posts_category_hot_score ON cursor_posts (category, hot_score)")
+
+@migration("cursor_forum", 7, "classification method")
+def _forum_classification_method(conn):
+    # Lets pre_classifier train on LLM labels only
+    _add_column(conn, "cursor_posts", "classification_method", "VARCHAR(20)")
+
+# Twitter database
+
+@migration("twitter", 1, "add media_url column")
+def _twitter_media_url(conn):
+    _add_column(conn, "twitter_posts", "media_url", "VARCHAR(255)")
+
+@migration("twitter", 2, "indexes for tweet listing")
+def _twitter_query_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_twitter_posts_created_at ON twitter_posts (created_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_twitter_posts_likes ON twitter_posts (likes)")
+
+@migration("twitter", 3, "full-text search index")
+def _twitter_search_index(conn):
+    _create_search_index(conn, "twitter")
+
+@migration("twitter", 4, "stored hot score")
+def _twitter_hot_score(conn):
+    _add_column(conn, "twitter_posts", "hot_score", "FLOAT DEFAULT 0.0")
+    hot_score.rescore(conn, "twitter")
+    conn.execute("CREATE INDEX IF NOT EXISTS ix_twitter_posts_hot_score ON twitter_posts (hot_score)")
+
+def _create_search_index(conn, source):
+    """Create a source's FTS5 table, or leave search on LIKE if FTS5 is missing"""
+    if not text_search.fts5_available(conn):
+        logger.warning(f"SQLite was built without FTS5; {source} search falls back to LIKE")
+        return
+    for statement in text_search.create_index_sql(source):
+        conn.execute(statement)
+
+def get_version(conn):
+    """Get the highest migration version applied to a database"""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version INTEGER PRIMARY KEY, name TEXT NOT NULL, applied_at REAL NOT NULL)"
+    )
+    return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations").fetchone()[0]
+
+def migrate(database, path):
+    """
+    Apply the pending migrations of a database
+
+    Args:
+        database (str): Database name the migrations are registered under
+        path (str): Path of the SQLite file; its tables must already exist
+
+    Returns:
+        list: Versions applied by this call
+    """
+    conn = sqlite3.connect(path, isolation_level=None, timeout=30)
+    applied = []
+    try:
+        current = get_version(conn)
+        for version, name, fn in MIGRATIONS.get(database, []):
+            if version <= current:
+                continue
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Another process may have applied it while we waited for the lock
+                if conn.execute("SELECT 1 FROM schema_migrations WHERE version = ?", (version,)).fetchone():
+                    conn.execute("COMMIT")
+                    continue
+                fn(conn)
+                conn.execute(
+                    "INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)",
+                    (version, name, time.time())
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            logger.info(f"Applied {database} migration {version}: {name}")
+            applied.append(version)
+        return applied
+    finally:
+        conn.close()
+
+def _compiled(statement):
+    """SQL of a SQLAlchemy statement with its parameters inlined, as SQLite would receive it"""
+    from sqlalchemy.dialects import sqlite
+    return str(statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True})), ()
+
+def plan_checks():
+    """
+    Build the queries whose plans must use an index, with the same builders
+    cursor_forum_db and twitter_db run them with
+
+    Returns:
+        list: (database, description, SQL, parameters) tuples
+    """
+    # The database modules import this one, so they are imported only when checking
+    import cursor_forum_db
+    import twitter_db
+    after = datetime.datetime(2025, 1, 1)
+    topics = cursor_forum_db._topics_query
+    statements = [
+        ("cursor_forum", "recent topics", topics(21)),
+        ("cursor_forum", "recent topics after a cursor", topics(21, after=[after, 100])),
+        ("cursor_forum", "recent topics in a category", topics(21, category="Bug Report", offset=20)),
+        ("cursor_forum", "recent topics in a category after a cursor",
+         topics(21, category="Bug Report", after=[after, 100])),
+        ("cursor_forum", "top topics", topics(21, "top")),
+        ("cursor_forum", "top topics after a cursor", topics(21, "top", after=[50, 100])),
+        ("cursor_forum", "top topics in a category", topics(21, "top", category="Bug Report")),
+        ("cursor_forum", "hot topics", topics(21, "hot")),
+        ("cursor_forum", "hot topics in a category after a cursor",
+         topics(21, "hot", category="Bug Report", after=[3000.5, 100])),
+        ("cursor_forum", "topic count in a category", cursor_forum_db._topic_count_query("Bug Report")),
+        ("cursor_forum", "topic by post_id", cursor_forum_db._existing_topics_query(["1", "2"])),
+        ("cursor_forum", "unclassified posts", cursor_forum_db._unclassified_query(50)),
+        ("cursor_forum", "topic search", topics(21, search="cursor")),
+        ("twitter", "recent tweets", twitter_db._tweets_query(None, 50, "new")),
+        ("twitter", "top tweets", twitter_db._tweets_query(None, 50, "top")),
+        ("twitter", "hot tweets", twitter_db._tweets_query(None, 50, "hot")),
+        ("twitter", "tweets by external_id", twitter_db._existing_tweets_query(["1", "2"])),
+    ]
+    checks = [(database, description, *_compiled(statement)) for database, description, statement in statements]
+    # Ranked searches are raw SQL, built by text_search
+    checks += [
+        ("cursor_forum", "ranked topic search", *text_search.search_sql("cursor_forum", "cursor rules")),
+        ("twitter", "ranked tweet search", *text_search.search_sql("twitter", "windsurf")),
+    ]
+    return checks
+
+# Plan steps reading a whole table without an index, or sorting in a temporary b-tree
+_FULL_SCAN = r"^SCAN \w+$"
+_TEMP_SORT = "USE TEMP B-TREE"
+
+def _create_tables(database, path):
+    """Create a database's tables from the models, as the app does on first start"""
+    from sqlalchemy import create_engine
+    if database == "cursor_forum":
+        from models.discourse_post import Base
+    else:
+        from models.twitter_post import Base
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+def check_query_plans(checks):
+    """
+    Explain every query on freshly migrated databases
+
+    Args:
+        checks (list): Queries from plan_checks
+
+    Returns:
+        list: (database, description, plan step) for each step that scans or sorts
+    """
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for database in MIGRATIONS:
+            path = os.path.join(tmp, f"{database}.db")
+            _create_tables(database, path)
+            migrate(database, path)
+
+            conn = sqlite3.connect(path)
+            try:
+                # Let the planner see realistic table statistics
+                conn.execute("ANALYZE")
+                for check_db, description, sql, params in checks:
+                    if check_db != database:
+                        continue
+                    steps = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+                    # Full-text searches sort only their matches, which is expected
+                    searches = any("VIRTUAL TABLE" in step for step in steps)
+                    for step in steps:
+                        if re.match(_FULL_SCAN, step) or (_TEMP_SORT in step and not searches):
+                            failures.append((database, description, step))
+            finally:
+                conn.close()
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Community Surf schema migrations")
+    parser.add_argument("--check-plans", action="store_true",
+                        help="Check that the app's queries use indexes and exit non-zero if not")
+    args = parser.parse_args()
+
+    if args.check_plans:
+        checks = plan_checks()
+        failures = check_query_plans(checks)
+        for database, description, step in failures:
+            logger.error(f"{database}: '{description}' query plan regressed: {step}")
+        if failures:
+            sys.exit(1)
+        logger.info(f"All {len(checks)} query plans use indexes")
+        return
+
+    # Importing the database modules creates their tables and applies pending migrations
+    import cursor_forum_db
+    import twitter_db
+    for database, path in (("cursor_forum", cursor_forum_db.engine.url.database), ("twitter", twitter_db.DB_PATH)):
+        conn = sqlite3.connect(path)
+        try:
+            logger.info(f"{database} database at {path} is at version {get_version(conn)}")
+        finally:
+            conn.close()
+
+if __name__ == "__main__":
+    main()
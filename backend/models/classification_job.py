@@ -0,0 +1,56 @@
+from sqlalchemy import Column, String, Text, Integer, DateTime, Float, JSON
+import datetime
+
+from models.discourse_post import Base
+
+class ClassificationJob(Base):
+    """
+    Model for storing background classification jobs over Cursor Forum topics
+    """
+    __tablename__ = "classification_jobs"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed or failed
+    total = Column(Integer, nullable=False, default=0)  # Topics to classify, as counted when queued
+    max_posts = Column(Integer, nullable=True)  # Requested limit, None for every unclassified topic
+    chunk_size = Column(Integer, nullable=False)
+    processed = Column(Integer, nullable=False, default=0)  # Topics classified and saved
+    failed = Column(Integer, nullable=False, default=0)  # Topics that got no classification
+    failed_ids = Column(JSON, nullable=True)  # IDs of those topics, so a resumed job neither retries nor recounts them
+    elapsed_seconds = Column(Float, nullable=False, default=0.0)  # Time spent working, across restarts
+    error = Column(Text, nullable=True)
+    worker_id = Column(String(100), nullable=True)  # Runner holding the job while it is running
+    lease_expires_at = Column(DateTime, nullable=True)  # Another runner may take the job over after this
+    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    updated_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    def to_dict(self):
+        """
+        Convert model to dictionary for API responses, with throughput and ETA
+        """
+        done = self.processed + self.failed
+        throughput = done / self.elapsed_seconds if self.elapsed_seconds else None
+        remaining = max(self.total - done, 0)
+        eta_seconds = None
+        if self.status in ("queued", "running"):
+            eta_seconds = round(remaining / throughput, 1) if throughput else None
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "failed": self.failed,
+            "remaining": remaining,
+            "progress": round(done / self.total, 3) if self.total else (1.0 if self.status == "completed" else 0.0),
+            "posts_per_second": round(throughput, 2) if throughput else None,
+            "eta_seconds": eta_seconds,
+            "chunk_size": self.chunk_size,
+            "max_posts": self.max_posts,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(timespec="seconds") if self.created_at else None,
+            "started_at": self.started_at.isoformat(timespec="seconds") if self.started_at else None,
+            "updated_at": self.updated_at.isoformat(timespec="seconds") if self.updated_at else None,
+            "finished_at": self.finished_at.isoformat(timespec="seconds") if self.finished_at else None,
+        }
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, Float, JSON
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, Float, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 import datetime
+import json
 import logging
 
 # Configure logging
@@ -14,6 +15,9 @@ class DiscoursePost(Base):
     Model for storing Discourse forum posts in the database
     """
     __tablename__ = "cursor_posts"
+    __table_args__ = (
+        Index("ux_cursor_posts_post_id", "post_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     title = Column(String(500), nullable=True)
@@ -28,6 +32,7 @@ class DiscoursePost(Base):
     sentiment = Column(Float, nullable=True, default=0.0)
     sentiment_label = Column(String(20), nullable=True, default="neutral")
     popular = Column(Boolean, nullable=True, default=False)
+    hot_score = Column(Float, nullable=True, default=0.0)  # See hot_score.py
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
     scraped_at = Column(DateTime, default=datetime.datetime.utcnow)
     
@@ -35,89 +40,70 @@ class DiscoursePost(Base):
     classifications = Column(JSON, nullable=True)
     primary_classification = Column(String(50), nullable=True, default="neutral")
     classified_at = Column(DateTime, nullable=True)
+    classification_method = Column(String(20), nullable=True)  # llm, cache, fallback or local; None if classified before it was recorded
 
     def to_dict(self):
         """
         Convert model to dictionary for API responses
         """
+        return topic_to_dict(self)
+
+# Columns topic_to_dict reads; lean read paths select just these
+TOPIC_DICT_COLUMNS = [
+    "id", "post_id", "title", "author", "content", "url", "likes", "replies", "views", "category",
+    "sentiment", "sentiment_label", "popular", "created_at", "scraped_at",
+    "classifications", "primary_classification", "classified_at",
+]
+
+def _format_datetime(value):
+    """Format a stored datetime without microseconds, passing strings through"""
+    if isinstance(value, datetime.datetime):
+        return value.isoformat(timespec="seconds")
+    if isinstance(value, str):
+        return value
+    return None
+
+def _parse_classifications(value):
+    """Read the classifications column, which older rows may hold as a JSON string"""
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str):
         try:
-            logger.info(f"Converting DiscoursePost to dict: ID={self.id}, Title={self.title}")
-            
-            # Corrigir o formato de data para evitar erros com timezones
-            created_at_str = None
-            scraped_at_str = None
-            classified_at_str = None
-            
-            # Verificar se created_at tem valor
-            try:
-                if isinstance(self.created_at, datetime.datetime):
-                    created_at_str = self.created_at.replace(microsecond=0).isoformat()
-                elif isinstance(self.created_at, str):
-                    created_at_str = self.created_at
-                logger.info(f"Formatted created_at: {created_at_str}")
-            except Exception as e:
-                logger.error(f"Error formatting created_at: {e}")
-            
-            # Verificar se scraped_at tem valor
-            try:
-                if isinstance(self.scraped_at, datetime.datetime):
-                    scraped_at_str = self.scraped_at.replace(microsecond=0).isoformat()
-                elif isinstance(self.scraped_at, str):
-                    scraped_at_str = self.scraped_at
-            except Exception as e:
-                logger.error(f"Error formatting scraped_at: {e}")
-                
-            # Format classified_at
-            try:
-                if isinstance(self.classified_at, datetime.datetime):
-                    classified_at_str = self.classified_at.replace(microsecond=0).isoformat()
-                elif isinstance(self.classified_at, str):
-                    classified_at_str = self.classified_at
-            except Exception as e:
-                logger.error(f"Error formatting classified_at: {e}")
-            
-            # Parse classifications
-            classifications_list = []
-            classifications_value = getattr(self, 'classifications', None)
-            if classifications_value is not None:
-                if isinstance(classifications_value, list):
-                    classifications_list = classifications_value
-                elif isinstance(classifications_value, str):
-                    try:
-                        import json
-                        classifications_list = json.loads(classifications_value)
-                    except:
-                        classifications_list = [classifications_value]
-            
-            # Get primary classification
-            primary_class = getattr(self, 'primary_classification', 'neutral') or 'neutral'
-            
-            return {
-                "id": self.id,
-                "post_id": self.post_id,
-                "title": self.title,
-                "author": self.author,
-                "content": self.content,
-                "url": self.url,
-                "likes": self.likes,
-                "replies": self.replies,
-                "views": self.views,
-                "category": self.category,
-                "sentiment": self.sentiment,
-                "sentiment_label": self.sentiment_label,
-                "popular": self.popular,
-                "created_at": created_at_str,
-                "scraped_at": scraped_at_str,
-                "source": "cursor_forum",
-                
-                # Add classification fields
-                "classifications": classifications_list,
-                "primary_classification": primary_class,
-                "classified_at": classified_at_str
-            }
-        except Exception as e:
-            logger.error(f"Error converting DiscoursePost to dict: {e}")
-            return {
-                "error": "Error converting post to dict",
-                "source": "cursor_forum"
-            } 
\ No newline at end of file
+            return json.loads(value)
+        except ValueError:
+            return [value]
+    return []
+
+def topic_row_to_dict(row):
+    """
+    Convert a row of TOPIC_DICT_COLUMNS values to a dictionary for API responses
+
+    Args:
+        row: Core row or tuple starting with the TOPIC_DICT_COLUMNS values, in order
+
+    Returns:
+        dict: Topic fields, with dates as ISO strings
+    """
+    topic = dict(zip(TOPIC_DICT_COLUMNS, row))
+    topic["created_at"] = _format_datetime(topic["created_at"])
+    topic["scraped_at"] = _format_datetime(topic["scraped_at"])
+    topic["classified_at"] = _format_datetime(topic["classified_at"])
+    topic["classifications"] = _parse_classifications(topic["classifications"])
+    topic["primary_classification"] = topic["primary_classification"] or 'neutral'
+    topic["source"] = "cursor_forum"
+    return topic
+
+def topic_to_dict(topic):
+    """
+    Convert a DiscoursePost to a dictionary for API responses
+    """
+    try:
+        return topic_row_to_dict([getattr(topic, name) for name in TOPIC_DICT_COLUMNS])
+    except Exception as e:
+        logger.error(f"Error converting DiscoursePost to dict: {e}")
+        return {
+            "error": "Error converting post to dict",
+            "source": "cursor_forum"
+        }
@@ -0,0 +1,57 @@
+from sqlalchemy import Column, String, Text, Integer, Boolean, DateTime, Float, Index
+from sqlalchemy.ext.declarative import declarative_base
+import datetime
+
+Base = declarative_base()
+
+class RedditPost(Base):
+    """
+    Model for storing Reddit posts in the database
+    """
+    __tablename__ = "reddit_posts"
+    __table_args__ = (
+        Index("ix_reddit_posts_created_utc", "created_utc"),
+        Index("ix_reddit_posts_subreddit_created_utc", "subreddit", "created_utc"),
+        Index("ix_reddit_posts_relevance_score", "relevance_score", "created_utc"),
+        Index("ix_reddit_posts_score", "score"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    post_id = Column(String(20), unique=True, nullable=False)
+    title = Column(String(500), nullable=True)
+    content = Column(Text, nullable=True)
+    url = Column(String(500), nullable=True)
+    permalink = Column(String(500), nullable=True)
+    image = Column(String(500), nullable=True)
+    subreddit = Column(String(100), nullable=True)
+    author = Column(String(100), nullable=True)
+    score = Column(Integer, default=0)
+    num_comments = Column(Integer, default=0)
+    relevance_score = Column(Integer, default=0)
+    is_video = Column(Boolean, default=False)
+    source = Column(String(20), default="reddit")  # 'reddit' for the API, 'scraper' for old.reddit
+    created_utc = Column(Float, nullable=False)  # Unix timestamp, first-seen time for scraped posts
+
+    first_seen_at = Column(DateTime, default=datetime.datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
+    def to_dict(self):
+        """
+        Convert model to dictionary for API responses
+        """
+        return {
+            "id": self.post_id,
+            "title": self.title,
+            "content": self.content,
+            "url": self.url,
+            "permalink": self.permalink,
+            "image": self.image,
+            "subreddit": self.subreddit,
+            "author": self.author,
+            "score": self.score,
+            "num_comments": self.num_comments,
+            "relevance_score": self.relevance_score,
+            "is_video": self.is_video,
+            "created_utc": self.created_utc,
+            "source": self.source
+        }
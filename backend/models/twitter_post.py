@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, DateTime
+from sqlalchemy import Column, String, Text, Integer, DateTime, Float
 from sqlalchemy.ext.declarative import declarative_base
 import datetime
 
@@ -23,6 +23,7 @@ class TwitterPost(Base):
     likes = Column(Integer, default=0)
     retweets = Column(Integer, default=0)
     replies = Column(Integer, default=0)
+    hot_score = Column(Float, default=0.0)  # See hot_score.py
     subreddit = Column(String(50), default="twitter")  # For compatibility with existing posts
     source = Column(String(20), default="twitter")     # For compatibility with existing posts
 
@@ -0,0 +1,72 @@
+"""
+Keyset Pagination for Community Surf
+
+This module encodes and decodes the opaque cursor tokens used to page through
+sorted listings. A cursor holds the sort key and ID of the last row of a page;
+the next page starts right after it with a WHERE (key, id) < (?, ?) condition,
+which an index can seek to directly, so page 1000 costs the same as page 1.
+"""
+
+import base64
+import binascii
+import datetime
+import json
+import logging
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class InvalidCursor(ValueError):
+    """Raised for a cursor token that is malformed or belongs to another sort"""
+
+def _encode_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+def _decode_value(obj):
+    if set(obj) == {"dt"}:
+        return datetime.datetime.fromisoformat(obj["dt"])
+    return obj
+
+def encode_cursor(sort_by, values):
+    """
+    Build the cursor token pointing after a row
+
+    Args:
+        sort_by (str): Sort the cursor belongs to
+        values (list): The row's sort key values, ending with its ID
+
+    Returns:
+        str: URL-safe opaque token
+    """
+    payload = json.dumps({"s": sort_by, "k": list(values)}, default=_encode_value, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(token, sort_by):
+    """
+    Read the sort key values back from a cursor token
+
+    Args:
+        token (str): Token from encode_cursor
+        sort_by (str): Sort of the current request; it must match the token's
+
+    Returns:
+        list: Sort key values, ending with the row ID
+
+    Raises:
+        InvalidCursor: If the token is malformed or was issued for another sort
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")), object_hook=_decode_value)
+        values = payload["k"]
+        cursor_sort = payload["s"]
+    except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if cursor_sort != sort_by:
+        raise InvalidCursor(f"Cursor was issued for sort '{cursor_sort}', not '{sort_by}'")
+    if not isinstance(values, list) or not values:
+        raise InvalidCursor("Cursor has no sort key")
+    return values
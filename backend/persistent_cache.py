@@ -0,0 +1,312 @@
+"""
+Persistent SQLite Cache for Community Surf
+
+This module provides SQLiteCache, an on-disk drop-in for TTLCache. Entries live
+in a WAL-mode SQLite database, so they survive restarts and are shared by every
+worker process on the host. Per-key read counts are kept alongside the values
+so the hottest keys can be found again at boot. Reads are counted in memory
+and written in one batch every ACCESS_FLUSH_INTERVAL seconds (or before
+anything that orders by them), so a cache hit is a single SELECT.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from cache import DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES, DEFAULT_TTL
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv("CACHE_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache.db'))
+BUSY_TIMEOUT_SECONDS = 5
+ACCESS_FLUSH_INTERVAL = float(os.getenv("CACHE_ACCESS_FLUSH_INTERVAL", 5))  # Seconds between read count writes
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    access_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cache_entries_lru ON cache_entries (namespace, last_access);
+"""
+
+class SQLiteCache:
+    """
+    LRU cache with per-entry TTL stored in SQLite, with the same interface as TTLCache
+    """
+
+    def __init__(self, name, path=DB_PATH, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 default_ttl=DEFAULT_TTL, stale_ttl=0):
+        self.name = name
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.stale_ttl = stale_ttl
+        # One connection per thread; SQLite handles locking across processes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._last_update = None
+        # Key -> (last read time, reads) not yet written to the database
+        self._pending_access = {}
+        self._last_access_flush = time.time()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        """Get this thread's connection, opening it on first use"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, counter, amount=1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def get_entry(self, key, allow_stale=False):
+        """
+        Get a value along with its age
+
+        Args:
+            key (str): Cache key
+            allow_stale (bool): Also return expired entries still within stale_ttl
+
+        Returns:
+            tuple: (value, age_in_seconds), or None on a miss
+        """
+        now = time.time()
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, stored_at, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.name, key)
+        ).fetchone()
+        if row is None:
+            self._count("_misses")
+            return None
+        value, stored_at, expires_at = row
+        if now >= expires_at:
+            if now >= expires_at + self.stale_ttl:
+                self.delete(key)
+                self._count("_expirations")
+                self._count("_misses")
+                return None
+            if not allow_stale:
+                self._count("_misses")
+                return None
+            self._count("_stale_hits")
+        else:
+            self._count("_hits")
+        with self._lock:
+            reads = self._pending_access.get(key, (now, 0))[1]
+            self._pending_access[key] = (now, reads + 1)
+            due = now - self._last_access_flush >= ACCESS_FLUSH_INTERVAL
+        if due:
+            self.flush_access()
+        return json.loads(value), now - stored_at
+
+    def flush_access(self, conn=None):
+        """
+        Write the read times and counts gathered since the last flush
+
+        Args:
+            conn (sqlite3.Connection, optional): Connection to write with, e.g.
+                one holding a write transaction; defaults to this thread's
+        """
+        with self._lock:
+            pending, self._pending_access = self._pending_access, {}
+            self._last_access_flush = time.time()
+        if not pending:
+            return
+        (conn or self._connect()).executemany(
+            "UPDATE cache_entries SET last_access = MAX(last_access, ?), access_count = access_count + ? "
+            "WHERE namespace = ? AND key = ?",
+            [(last_access, reads, self.name, key) for key, (last_access, reads) in pending.items()]
+        )
+
+    def age(self, key):
+        """
+        Seconds since key was stored, without counting as a read
+
+        Returns:
+            float: Age of the fresh or stale entry, or None if there is none
+        """
+        now = time.time()
+        row = self._connect().execute(
+            "SELECT stored_at, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (self.name, key)
+        ).fetchone()
+        if row is None or now >= row[1] + self.stale_ttl:
+            return None
+        return now - row[0]
+
+    def get(self, key):
+        """Get a fresh value, or None on a miss"""
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        """
+        Store a value, evicting least recently used entries to stay within limits
+
+        Args:
+            key (str): Cache key
+            value: JSON-serializable value to store
+            ttl (float, optional): Seconds until the entry expires, defaults to default_ttl
+        """
+        payload = json.dumps(value, default=str)
+        size = len(payload)
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {key} in {self.name}: {size} bytes exceeds the cache size limit")
+            return
+
+        now = time.time()
+        expires_at = now + (self.default_ttl if ttl is None else ttl)
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO cache_entries (namespace, key, value, size, stored_at, expires_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value, size = excluded.size, "
+                "stored_at = excluded.stored_at, expires_at = excluded.expires_at, last_access = excluded.last_access",
+                (self.name, key, payload, size, now, expires_at, now)
+            )
+            # Eviction goes by last_access, so recent reads must be in the table
+            self.flush_access(conn)
+            evicted = self._evict(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._evictions += evicted
+            self._last_update = now
+
+    def _evict(self, conn):
+        """Drop least recently used entries until within limits (caller holds a write transaction)"""
+        count, total_bytes = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.name,)
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return 0
+
+        evicted = 0
+        rows = conn.execute(
+            "SELECT key, size FROM cache_entries WHERE namespace = ? ORDER BY last_access",
+            (self.name,)
+        ).fetchall()
+        for key, size in rows:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key))
+            count -= 1
+            total_bytes -= size
+            evicted += 1
+        return evicted
+
+    def delete(self, key):
+        """Remove a key if present"""
+        self._connect().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key)
+        )
+
+    def clear(self):
+        """Remove every entry"""
+        self._connect().execute("DELETE FROM cache_entries WHERE namespace = ?", (self.name,))
+
+    def purge_expired(self):
+        """
+        Remove entries past their expiry and stale grace period
+
+        Returns:
+            int: Number of entries removed
+        """
+        cursor = self._connect().execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at + ? <= ?",
+            (self.name, self.stale_ttl, time.time())
+        )
+        self._count("_expirations", cursor.rowcount)
+        return cursor.rowcount
+
+    def keys(self):
+        """Snapshot of the current keys, least recently used first"""
+        self.flush_access()
+        rows = self._connect().execute(
+            "SELECT key FROM cache_entries WHERE namespace = ? ORDER BY last_access", (self.name,)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def hottest_keys(self, limit):
+        """
+        Most frequently read keys that are still fresh or servable as stale
+
+        Args:
+            limit (int): Maximum number of keys to return
+
+        Returns:
+            list: Keys, most read first
+        """
+        self.flush_access()
+        rows = self._connect().execute(
+            "SELECT key FROM cache_entries WHERE namespace = ? AND expires_at + ? > ? "
+            "ORDER BY access_count DESC, last_access DESC LIMIT ?",
+            (self.name, self.stale_ttl, time.time(), limit)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def __contains__(self, key):
+        row = self._connect().execute(
+            "SELECT expires_at FROM cache_entries WHERE namespace = ? AND key = ?", (self.name, key)
+        ).fetchone()
+        return row is not None and time.time() < row[0]
+
+    def __len__(self):
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.name,)
+        ).fetchone()[0]
+
+    def stats(self):
+        """Get size limits and hit/miss/eviction counters"""
+        entries, total_bytes = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries WHERE namespace = ?",
+            (self.name,)
+        ).fetchone()
+        with self._lock:
+            lookups = self._hits + self._stale_hits + self._misses
+            return {
+                "backend": "sqlite",
+                "path": self.path,
+                "entries": entries,
+                "bytes": total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "timeout_seconds": self.default_ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "stale_hits": self._stale_hits,
+                "hit_rate": round((self._hits + self._stale_hits) / lookups, 3) if lookups else None,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "last_update": self._last_update,
+            }
@@ -0,0 +1,367 @@
+"""
+Local Pre-Classifier for Community Surf
+
+This module labels the obvious posts locally so only the uncertain ones go to
+the LLM. Two signals are blended: keyword/regex rules over the CATEGORIES
+labels, and a small multinomial logistic regression over hashed word
+features, trained on the topics the LLM has already labeled. Prediction is
+vectorized over a whole batch of posts. A post whose blended confidence
+reaches PRE_CLASSIFIER_THRESHOLD is labeled locally; the rest are left to
+the LLM.
+
+To keep an honest measure of quality, a fixed share of the confident posts is
+still sent to the LLM (the audit sample), and the agreement between the two
+is reported with the fraction of LLM calls avoided. The linear model needs
+numpy. Until a model has been trained, or without numpy, nothing is labeled
+locally: the rules' confident guesses are all sent to the LLM as audits, so
+their agreement is measured before any label is trusted.
+
+Usage:
+    python pre_classifier.py  # Train on the labeled topics and report holdout agreement
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+if not NUMPY_AVAILABLE:
+    logger.info("numpy not installed, the pre-classifier uses its rules only")
+
+# The keys of llm_classifier.CATEGORIES, in a fixed order for the model's columns
+LABELS = ["positive_feedback", "frustration", "bug_report", "feature_suggestion", "trending_topic", "question", "neutral"]
+
+PRE_CLASSIFIER_THRESHOLD = float(os.getenv("PRE_CLASSIFIER_THRESHOLD", 0.8))  # Confidence needed to skip the LLM
+AUDIT_PERCENT = int(os.getenv("PRE_CLASSIFIER_AUDIT_PERCENT", 10))  # Confident posts still checked by the LLM
+MIN_TRAINING_SAMPLES = 200
+RETRAIN_INTERVAL = 6 * 60 * 60  # Seconds before the model is refit on newer labels
+MAX_TRAINING_SAMPLES = 10000
+HOLDOUT_FRACTION = 0.2
+HASH_FEATURES = 2 ** 14
+TRAINING_EPOCHS = 100
+LEARNING_RATE = 50.0
+L2_PENALTY = 1e-4
+RULE_WEIGHT = 0.35  # Share of the blended confidence that comes from the rules
+
+# Label -> (field, pattern) pairs; every matching pattern is one vote for the label.
+# 'title' patterns look at the title only, 'text' patterns at the title and content.
+RULES = {
+    "question": [
+        ("title", r"\?\s*$"),
+        ("text", r"^\s*(how|what|why|where|when|which|is there|are there|can i|can you|does|do i|should i|anyone)\b"),
+        ("text", r"\b(how do i|how to|any idea|is it possible|help me)\b"),
+    ],
+    "bug_report": [
+        ("text", r"\b(bug|crash(es|ed|ing)?|freez(es|ing)|exception|stack ?trace|regression)\b"),
+        ("text", r"\b(not working|doesn'?t work|stopped working|broken|fails? to|error)\b"),
+    ],
+    "feature_suggestion": [
+        ("text", r"\b(feature request|please add|would be (nice|great|helpful)|it would be great|suggestion)\b"),
+        ("text", r"\b(add support for|option to|ability to|wish (it|there))\b"),
+    ],
+    "frustration": [
+        ("text", r"\b(frustrat\w*|annoy\w*|terrible|unusable|waste of|disappoint\w*|fed up|ridiculous)\b"),
+        ("text", r"\b(cancel(l?ing)? my subscription|switching to|worst)\b"),
+    ],
+    "positive_feedback": [
+        ("text", r"\b(love|amazing|awesome|fantastic|great job|well done|game ?changer)\b"),
+        ("text", r"\b(thank you|thanks to the team|impressed)\b"),
+    ],
+}
+_COMPILED_RULES = {
+    label: [(field, re.compile(pattern, re.IGNORECASE | re.MULTILINE)) for field, pattern in patterns]
+    for label, patterns in RULES.items()
+}
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+def _text(post):
+    return f"{post.get('title') or ''}\n{post.get('content') or ''}"
+
+def rule_votes(posts):
+    """
+    Count the rule matches of every label for a batch of posts
+
+    Returns:
+        list: One {label: matches} dictionary per post
+    """
+    votes = []
+    for post in posts:
+        fields = {"title": post.get("title") or "", "text": _text(post)}
+        post_votes = {}
+        for label, patterns in _COMPILED_RULES.items():
+            matches = sum(1 for field, pattern in patterns if pattern.search(fields[field]))
+            if matches:
+                post_votes[label] = matches
+        votes.append(post_votes)
+    return votes
+
+def _hashed_features(posts):
+    """
+    Hash the words and word pairs of posts into HASH_FEATURES columns
+
+    Returns:
+        tuple: (row indexes, column indexes, values) of the sparse feature matrix,
+        each row scaled to unit length
+    """
+    rows, columns = [], []
+    for row, post in enumerate(posts):
+        tokens = _TOKEN.findall(_text(post).lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for column in {zlib.crc32(gram.encode("utf-8")) % HASH_FEATURES for gram in grams}:
+            rows.append(row)
+            columns.append(column)
+    rows = np.asarray(rows, dtype=np.int64)
+    columns = np.asarray(columns, dtype=np.int64)
+    counts = np.bincount(rows, minlength=len(posts)).astype(np.float64)
+    values = 1.0 / np.sqrt(np.maximum(counts, 1.0))[rows]
+    return rows, columns, values
+
+def _logits(weights, bias, features, count):
+    """Multiply the sparse features by the weights"""
+    rows, columns, values = features
+    contributions = weights[columns] * values[:, None]
+    logits = np.column_stack([
+        np.bincount(rows, weights=contributions[:, label], minlength=count) for label in range(len(LABELS))
+    ])
+    return logits + bias
+
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+def _blend(probabilities, votes):
+    """
+    Mix the model's probabilities with the rule votes of each post
+
+    Returns:
+        ndarray: Blended label distribution per post
+    """
+    rules = np.zeros_like(probabilities)
+    for row, post_votes in enumerate(votes):
+        for label, matches in post_votes.items():
+            rules[row, LABELS.index(label)] = matches
+    has_votes = rules.sum(axis=1) > 0
+    rules[has_votes] /= rules[has_votes].sum(axis=1, keepdims=True)
+    return np.where(has_votes[:, None], (1 - RULE_WEIGHT) * probabilities + RULE_WEIGHT * rules, probabilities)
+
+class PreClassifier:
+    """
+    Rules plus a hashed-feature logistic regression over the classification labels
+    """
+
+    def __init__(self, threshold=PRE_CLASSIFIER_THRESHOLD, audit_percent=AUDIT_PERCENT):
+        self.threshold = threshold
+        self.audit_percent = audit_percent
+        self._weights = None
+        self._bias = None
+        self._trained_at = None
+        self._train_attempted_at = None
+        self._training = {}
+        self._lock = threading.Lock()
+        self._predictions = 0
+        self._accepted = 0
+        self._audited = 0
+        self._audit_agreements = 0
+
+    @property
+    def trained(self):
+        return self._weights is not None
+
+    def train(self, examples):
+        """
+        Fit the linear model on posts labeled by the LLM
+
+        Args:
+            examples (list): Posts with title, content and primary_classification
+
+        Returns:
+            dict: Training and holdout sizes and the holdout agreement with the
+            LLM labels, or None if numpy is missing or there are too few examples
+        """
+        examples = [post for post in examples if post.get("primary_classification") in LABELS]
+        if not NUMPY_AVAILABLE or len(examples) < MIN_TRAINING_SAMPLES:
+            logger.info(f"Not training the pre-classifier: {len(examples)} labeled posts, numpy available: {NUMPY_AVAILABLE}")
+            return None
+
+        # Deterministic split, so repeated training reports comparable numbers
+        holdout = [post for i, post in enumerate(examples) if i % int(1 / HOLDOUT_FRACTION) == 0]
+        training = [post for i, post in enumerate(examples) if i % int(1 / HOLDOUT_FRACTION) != 0]
+        weights, bias = self._fit(training)
+
+        holdout_labels = np.array([LABELS.index(post["primary_classification"]) for post in holdout])
+        probabilities = _blend(_softmax(_logits(weights, bias, _hashed_features(holdout), len(holdout))),
+                               rule_votes(holdout))
+        agreement = float((probabilities.argmax(axis=1) == holdout_labels).mean())
+        confident = probabilities.max(axis=1) >= self.threshold
+        confident_agreement = (
+            float((probabilities.argmax(axis=1)[confident] == holdout_labels[confident]).mean())
+            if confident.any() else None
+        )
+
+        # Refit on everything for serving
+        weights, bias = self._fit(examples)
+        with self._lock:
+            self._weights, self._bias = weights, bias
+            self._trained_at = time.time()
+            self._training = {
+                "training_samples": len(training),
+                "holdout_samples": len(holdout),
+                "holdout_agreement": round(agreement, 3),
+                "holdout_confident_share": round(float(confident.mean()), 3),
+                "holdout_confident_agreement": round(confident_agreement, 3) if confident_agreement is not None else None,
+            }
+        logger.info(f"Trained the pre-classifier on {len(examples)} posts: {self._training}")
+        return dict(self._training)
+
+    def maybe_train(self, load_examples):
+        """
+        Train on a background thread on first use and again every RETRAIN_INTERVAL
+        seconds; until the first model is ready the rules are only audited
+
+        Args:
+            load_examples (callable): Returns the labeled posts to train on
+        """
+        if not NUMPY_AVAILABLE:
+            return
+        now = time.time()
+        with self._lock:
+            if self._train_attempted_at is not None and now - self._train_attempted_at < RETRAIN_INTERVAL:
+                return
+            self._train_attempted_at = now
+        threading.Thread(target=self._train_from, args=(load_examples,), name="pre-classifier-training",
+                         daemon=True).start()
+
+    def _train_from(self, load_examples):
+        try:
+            self.train(load_examples())
+        except Exception as e:
+            logger.error(f"Error training the pre-classifier: {e}")
+
+    def _fit(self, examples):
+        """Full-batch gradient descent on the softmax cross-entropy"""
+        features = _hashed_features(examples)
+        rows, columns, values = features
+        labels = np.array([LABELS.index(post["primary_classification"]) for post in examples])
+        targets = np.zeros((len(examples), len(LABELS)))
+        targets[np.arange(len(examples)), labels] = 1.0
+        weights = np.zeros((HASH_FEATURES, len(LABELS)))
+        bias = np.log(targets.mean(axis=0) + 1e-6)
+        for _ in range(TRAINING_EPOCHS):
+            errors = (_softmax(_logits(weights, bias, features, len(examples))) - targets) / len(examples)
+            contributions = errors[rows] * values[:, None]
+            gradient = np.column_stack([
+                np.bincount(columns, weights=contributions[:, label], minlength=HASH_FEATURES)
+                for label in range(len(LABELS))
+            ])
+            weights -= LEARNING_RATE * (gradient + L2_PENALTY * weights)
+            bias -= LEARNING_RATE * errors.sum(axis=0)
+        return weights, bias
+
+    def predict(self, posts):
+        """
+        Label a batch of posts
+
+        Returns:
+            list: One (label, confidence) pair per post; confidence is 0 when
+            neither the rules nor the model have an opinion
+        """
+        votes = rule_votes(posts)
+        with self._lock:
+            weights, bias = self._weights, self._bias
+
+        if weights is not None and posts:
+            blended = _blend(_softmax(_logits(weights, bias, _hashed_features(posts), len(posts))), votes)
+            best = blended.argmax(axis=1)
+            decisions = [(LABELS[label], float(blended[row, label])) for row, label in enumerate(best)]
+        else:
+            # Rules alone only have an opinion when they point at a single label
+            decisions = []
+            for post_votes in votes:
+                if len(post_votes) == 1:
+                    label, matches = next(iter(post_votes.items()))
+                    decisions.append((label, 0.9 if matches >= 2 else 0.6))
+                else:
+                    decisions.append(("neutral", 0.0))
+
+        with self._lock:
+            self._predictions += len(posts)
+        return decisions
+
+    def confident(self, confidence):
+        """Whether a prediction is confident enough to skip the LLM once a model is trained"""
+        return confidence >= self.threshold
+
+    def in_audit(self, post):
+        """Whether a confident post is in the audit sample that the LLM still labels"""
+        key = str(post.get("id", post.get("title", "")))
+        return zlib.crc32(key.encode("utf-8")) % 100 < self.audit_percent
+
+    def record(self, accepted=0, audits=None):
+        """
+        Record labels used without the LLM and audit outcomes
+
+        Args:
+            accepted (int): Posts labeled locally
+            audits (list): For each audited post, whether the LLM agreed
+        """
+        audits = audits or []
+        with self._lock:
+            self._accepted += accepted
+            self._audited += len(audits)
+            self._audit_agreements += sum(1 for agreed in audits if agreed)
+
+    def stats(self):
+        """Get prediction counters, LLM calls avoided and agreement with the LLM"""
+        with self._lock:
+            return {
+                "trained": self.trained,
+                "trained_at": self._trained_at,
+                "threshold": self.threshold,
+                **self._training,
+                "predictions": self._predictions,
+                "labeled_locally": self._accepted,
+                "llm_calls_avoided": round(self._accepted / self._predictions, 3) if self._predictions else None,
+                "audited": self._audited,
+                "audit_agreement": round(self._audit_agreements / self._audited, 3) if self._audited else None,
+            }
+
+_pre_classifier = None
+_pre_classifier_lock = threading.Lock()
+
+def load_training_examples(limit=MAX_TRAINING_SAMPLES):
+    """Topics the LLM has labeled, newest first"""
+    import cursor_forum_db
+    return cursor_forum_db.get_classified_posts(limit=limit)
+
+def get_pre_classifier():
+    """
+    Return the shared pre-classifier, (re)training it on the labeled topics when due
+    """
+    global _pre_classifier
+    with _pre_classifier_lock:
+        if _pre_classifier is None:
+            _pre_classifier = PreClassifier()
+        _pre_classifier.maybe_train(load_training_examples)
+        return _pre_classifier
+
+if __name__ == "__main__":
+    result = PreClassifier().train(load_training_examples())
+    if result is None:
+        logger.info("Not enough labeled topics to train the pre-classifier")
+    else:
+        logger.info(f"Holdout agreement with the LLM: {result['holdout_agreement']:.1%}, "
+                    f"confident on {result['holdout_confident_share']:.1%} of posts "
+                    f"with {result['holdout_confident_agreement']} agreement")
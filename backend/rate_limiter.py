@@ -0,0 +1,200 @@
+"""
+Upstream Rate Limiter for Community Surf
+
+This module provides thread-safe token buckets, one per upstream service
+(Reddit API, old.reddit scraping, Discourse, Twitter, OpenAI requests and
+OpenAI tokens). Acquiring a token is
+O(1). Callers that have to wait reserve their token up front, so blocked
+requests are served in arrival order at the refill rate instead of racing.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Requests per minute allowed for each upstream
+UPSTREAM_LIMITS = {
+    "reddit_api": 60,
+    "old_reddit": 25,
+    "discourse": 60,
+    "twitter": 30,
+    "openai": int(os.getenv("OPENAI_REQUESTS_PER_MINUTE", 500)),
+    # Prompt plus completion tokens, taken per request by the classifier
+    "openai_tokens": int(os.getenv("OPENAI_TOKENS_PER_MINUTE", 60000)),
+}
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at rate_per_minute, holding at most burst tokens
+    """
+
+    def __init__(self, name, rate_per_minute, burst=None):
+        self.name = name
+        self.rate_per_minute = rate_per_minute
+        self.capacity = burst or rate_per_minute
+        self._rate = rate_per_minute / 60.0
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._acquired = 0
+        self._rejected = 0
+
+    def _refill(self, now):
+        """Add the tokens accumulated since the last update (caller holds the lock)"""
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def try_acquire(self, amount=1):
+        """
+        Take tokens only if they are available right now
+
+        Returns:
+            bool: True if the tokens were taken, False otherwise
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= amount:
+                self._tokens -= amount
+                self._acquired += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def reserve(self, amount=1, max_wait=None):
+        """
+        Reserve tokens, possibly ahead of time
+
+        Args:
+            amount (float): Number of tokens to take
+            max_wait (float, optional): Refuse the reservation if it would wait longer
+
+        Returns:
+            float: Seconds the caller must wait before using the tokens, or None if refused
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            wait = max(0.0, (amount - self._tokens) / self._rate)
+            if max_wait is not None and wait > max_wait:
+                self._rejected += 1
+                return None
+            # Going negative queues later callers behind this reservation
+            self._tokens -= amount
+            self._acquired += 1
+            return wait
+
+    def acquire(self, amount=1, timeout=None):
+        """
+        Block until tokens are available
+
+        Args:
+            amount (float): Number of tokens to take
+            timeout (float, optional): Maximum seconds to wait
+
+        Returns:
+            bool: True once the tokens are taken, False if the wait would exceed timeout
+        """
+        wait = self.reserve(amount, max_wait=timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            self._sleep(wait)
+        return True
+
+    async def acquire_async(self, amount=1, timeout=None):
+        """Asyncio variant of acquire that yields to the event loop while waiting"""
+        wait = self.reserve(amount, max_wait=timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            with self._lock:
+                self._waiting += 1
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                with self._lock:
+                    self._waiting -= 1
+        return True
+
+    def _sleep(self, seconds):
+        """Sleep while counted as a queued waiter"""
+        with self._lock:
+            self._waiting += 1
+        try:
+            time.sleep(seconds)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    def penalize_until(self, deadline):
+        """
+        Push acquisitions back until deadline unless the bucket is already paused past it
+
+        Concurrent callers reporting the same upstream 429 do not stack their
+        pauses: the latest deadline wins.
+
+        Args:
+            deadline (float): time.monotonic() value before which nothing is acquired
+
+        Returns:
+            bool: True if the pause was extended, False if it already lasted long enough
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            tokens = -(deadline - now) * self._rate
+            if self._tokens <= tokens:
+                return False
+            self._tokens = tokens
+        logger.warning(f"Rate limiter '{self.name}' paused for {deadline - now:.1f} seconds")
+        return True
+
+    def stats(self):
+        """Get the live state of the bucket"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "rate_per_minute": self.rate_per_minute,
+                "capacity": self.capacity,
+                "available_tokens": round(max(self._tokens, 0.0), 2),
+                "wait_seconds": round(max(0.0, -self._tokens / self._rate), 2),
+                "waiting": self._waiting,
+                "acquired": self._acquired,
+                "rejected": self._rejected,
+            }
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+def configure(name, rate_per_minute, burst=None):
+    """
+    Create or replace the limiter for an upstream
+
+    Returns:
+        TokenBucket: The new limiter
+    """
+    limiter = TokenBucket(name, rate_per_minute, burst)
+    with _limiters_lock:
+        _limiters[name] = limiter
+    return limiter
+
+def get_limiter(name):
+    """Return the limiter for an upstream, creating it from UPSTREAM_LIMITS on first use"""
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            limiter = TokenBucket(name, UPSTREAM_LIMITS[name])
+            _limiters[name] = limiter
+        return limiter
+
+def get_stats():
+    """Get the live state of every upstream limiter"""
+    with _limiters_lock:
+        names = sorted(set(UPSTREAM_LIMITS) | set(_limiters))
+    return {name: get_limiter(name).stats() for name in names}
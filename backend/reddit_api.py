@@ -0,0 +1,202 @@
+"""
+Reddit API Search for Community Surf
+
+This module searches subreddits through PRAW. Clients are created once and
+reused from a pool (a praw.Reddit instance is not safe to share between
+threads, so each concurrent search checks one out). Searches either fan out
+across subreddits on the shared fetch pool, or collapse them into multireddit
+queries such as r/a+b+c, each search taking a token from the Reddit API budget.
+Incremental searches report only posts that are new or changed since the last
+crawl of the same query.
+"""
+
+import logging
+import os
+import queue
+from contextlib import contextmanager
+
+import praw
+
+import rate_limiter
+from crawl_state import get_crawl_state
+from fetch_engine import fetch_all
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+USER_AGENT = os.getenv("REDDIT_USER_AGENT", "community-surf:v1.0.0 (by u/yourusername)")
+
+# 'concurrent' runs one search per subreddit in parallel, 'multireddit' combines them
+SEARCH_MODE = os.getenv("REDDIT_SEARCH_MODE", "concurrent").lower()
+MULTIREDDIT_MAX_SUBREDDITS = 15
+
+RATE_LIMITER_NAME = "reddit_api"
+RATE_LIMIT_WAIT_TIMEOUT = 10.0  # Skip a search rather than queue longer than this
+SEARCH_BATCH_TIMEOUT = 60
+CRAWL_SOURCE = "reddit_api"
+
+# Idle clients ready for reuse
+_client_pool = queue.LifoQueue()
+
+def credentials_available():
+    """Check whether Reddit API credentials are configured"""
+    return bool(os.getenv('REDDIT_CLIENT_ID') and os.getenv('REDDIT_CLIENT_SECRET'))
+
+def _create_client():
+    """Create a read-only PRAW client from the environment credentials"""
+    reddit = praw.Reddit(
+        client_id=os.getenv('REDDIT_CLIENT_ID'),
+        client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+        user_agent=USER_AGENT
+    )
+    reddit.read_only = True
+    return reddit
+
+@contextmanager
+def checkout_client():
+    """Borrow an idle PRAW client, creating one only when every client is busy"""
+    try:
+        reddit = _client_pool.get_nowait()
+    except queue.Empty:
+        reddit = _create_client()
+    try:
+        yield reddit
+    finally:
+        _client_pool.put(reddit)
+
+def format_submission(post):
+    """
+    Convert a PRAW submission to the post format used by the frontend
+
+    Args:
+        post (praw.models.Submission): Submission returned by a search
+
+    Returns:
+        dict: Formatted post
+    """
+    post_data = {
+        "id": post.id,
+        "title": post.title,
+        "content": post.selftext[:500] + "..." if len(post.selftext) > 500 else post.selftext,
+        "url": post.url,
+        "permalink": "https://reddit.com" + post.permalink,
+        "created_utc": post.created_utc,
+        "score": post.score,
+        "num_comments": post.num_comments,
+        "subreddit": post.subreddit.display_name,
+        "author": str(post.author) if post.author else "[deleted]",
+        "is_video": post.is_video,
+        # Calculate a relevance score for sorting
+        "relevance_score": (post.score * 1) + (post.num_comments * 2),
+        "source": "reddit"
+    }
+
+    # Add thumbnail if available and not a default one
+    if hasattr(post, 'thumbnail') and post.thumbnail not in ['self', 'default', '']:
+        post_data["image"] = post.thumbnail
+    elif hasattr(post, 'preview') and 'images' in post.preview:
+        post_data["image"] = post.preview['images'][0]['source']['url']
+    else:
+        post_data["image"] = None
+
+    return post_data
+
+def search_subreddit(subreddit_name, query, sort_by='new', time_filter='all', limit=50, incremental=False):
+    """
+    Run one search against a subreddit or a multireddit such as 'a+b+c'
+
+    Args:
+        subreddit_name (str): Subreddit display name, or several joined with '+'
+        query (str): Search query
+        sort_by (str): Sort method - 'hot', 'new', 'top', or 'relevance'
+        time_filter (str): Time filter for 'top' and 'relevance' sorts
+        limit (int): Maximum number of submissions to fetch
+        incremental (bool): Return only posts that are new or changed since the last crawl
+
+    Returns:
+        list: Formatted posts with some interaction
+
+    Raises:
+        RuntimeError: If the Reddit API budget is exhausted
+    """
+    if not rate_limiter.get_limiter(RATE_LIMITER_NAME).acquire(timeout=RATE_LIMIT_WAIT_TIMEOUT):
+        raise RuntimeError(f"Reddit API rate budget exhausted, skipping r/{subreddit_name}")
+
+    search_kwargs = {"sort": sort_by if sort_by in ('hot', 'new', 'top') else 'relevance', "limit": limit}
+    if search_kwargs["sort"] in ('top', 'relevance'):
+        search_kwargs["time_filter"] = time_filter
+
+    crawl_state = get_crawl_state()
+    # Newest-first listings stop at the first post crawled before, so no further pages are requested
+    known_ids = crawl_state.known_ids(CRAWL_SOURCE, subreddit_name, query, 'new') if incremental and sort_by == 'new' else None
+
+    with checkout_client() as reddit:
+        posts = []
+        # The listing is lazy; iterate while the client is checked out
+        for post in reddit.subreddit(subreddit_name).search(query, **search_kwargs):
+            if known_ids and post.id in known_ids:
+                break
+            # Skip posts with no interaction (no score, comments, or awards)
+            if post.score < 1 and post.num_comments < 1:
+                continue
+            posts.append(format_submission(post))
+
+    changed = crawl_state.record(CRAWL_SOURCE, subreddit_name, query, sort_by, posts)
+    return changed if incremental else posts
+
+def search_subreddits(subreddits, search_terms, sort_by='new', time_filter='all', limit=50,
+                      max_calls=None, mode=None, incremental=False):
+    """
+    Search several subreddits concurrently for any of the search terms
+
+    Args:
+        subreddits (list): Subreddit display names
+        search_terms (list): Terms combined into a single OR query
+        sort_by (str): Sort method - 'hot', 'new', 'top', or 'relevance'
+        time_filter (str): Time filter for 'top' and 'relevance' sorts
+        limit (int): Maximum number of submissions per search
+        max_calls (int, optional): Maximum number of API searches to make
+        mode (str, optional): 'concurrent' or 'multireddit', defaults to SEARCH_MODE
+        incremental (bool): Return only posts that are new or changed since the last crawl
+
+    Returns:
+        list: Posts sorted by recency then relevance, or None if every search failed
+    """
+    mode = mode or SEARCH_MODE
+    combined_search = " OR ".join([f'"{term}"' for term in search_terms])
+
+    if mode == 'multireddit':
+        # One search covers up to MULTIREDDIT_MAX_SUBREDDITS subreddits
+        targets = [
+            "+".join(subreddits[i:i + MULTIREDDIT_MAX_SUBREDDITS])
+            for i in range(0, len(subreddits), MULTIREDDIT_MAX_SUBREDDITS)
+        ]
+    else:
+        targets = list(subreddits)
+    if max_calls is not None:
+        targets = targets[:max_calls]
+
+    results = fetch_all(
+        search_subreddit,
+        [((target, combined_search),
+          {"sort_by": sort_by, "time_filter": time_filter, "limit": limit, "incremental": incremental})
+         for target in targets],
+        timeout=SEARCH_BATCH_TIMEOUT
+    )
+    if targets and all(result is None for result in results):
+        return None
+
+    # A post can match in more than one search; keep the first copy
+    all_posts = []
+    seen_ids = set()
+    for posts in results:
+        for post in posts or []:
+            if post["id"] not in seen_ids:
+                seen_ids.add(post["id"])
+                all_posts.append(post)
+
+    # Sort posts by recency first, then by relevance score
+    all_posts.sort(key=lambda x: (-x["created_utc"], -x.get("relevance_score", 0)))
+    logger.info(f"Reddit API returned {len(all_posts)} posts from {len(targets)} {mode} searches")
+    return all_posts
@@ -0,0 +1,214 @@
+"""
+Reddit Post Store for Community Surf
+
+This module persists Reddit posts from the API and the scraper in SQLite, so
+/api/posts can search, filter and sort them with indexed queries instead of
+refetching them from upstream. Posts are written in bulk upserts by the ingest
+job; a post seen again only has its engagement counters and text refreshed.
+"""
+
+import logging
+import os
+import time
+
+from sqlalchemy import create_engine, event, func, or_, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import scoped_session, sessionmaker
+
+from models.reddit_post import RedditPost, Base
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Database configuration
+DB_PATH = os.getenv("REDDIT_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reddit_posts.db'))
+engine = create_engine(f"sqlite:///{DB_PATH}")
+SessionLocal = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+# Rows per INSERT statement, kept under SQLite's bound-parameter limit
+UPSERT_CHUNK_SIZE = 500
+
+TIME_FILTER_SECONDS = {
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+    "month": 30 * 24 * 60 * 60,
+    "year": 365 * 24 * 60 * 60,
+}
+
+@event.listens_for(engine, "connect")
+def _enable_wal(dbapi_connection, connection_record):
+    """Let requests read while the ingest job writes"""
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
+def init_db():
+    """Initialize the database by creating tables if they don't exist"""
+    try:
+        Base.metadata.create_all(bind=engine)
+        logger.info("Reddit database tables created successfully")
+    except Exception as e:
+        logger.error(f"Error initializing Reddit database: {str(e)}")
+
+def _to_row(post):
+    """Map a fetched post dictionary to reddit_posts columns"""
+    return {
+        "post_id": str(post["id"]),
+        "title": post.get("title"),
+        "content": post.get("content"),
+        "url": post.get("url"),
+        "permalink": post.get("permalink"),
+        "image": post.get("image"),
+        "subreddit": post.get("subreddit"),
+        "author": post.get("author"),
+        "score": post.get("score", 0),
+        "num_comments": post.get("num_comments", 0),
+        "relevance_score": post.get("relevance_score", post.get("score", 0) + 2 * post.get("num_comments", 0)),
+        "is_video": bool(post.get("is_video", False)),
+        "source": post.get("source", "reddit"),
+        "created_utc": post.get("created_utc") or time.time(),
+    }
+
+def save_posts(posts):
+    """
+    Insert new posts and refresh the counters of known ones in bulk
+
+    Args:
+        posts (list): Post dictionaries from the Reddit API or the scraper
+
+    Returns:
+        int: Number of posts written (inserted or updated)
+    """
+    # Deduplicate on post_id, keeping the last copy of each post
+    rows = {}
+    for post in posts or []:
+        if post.get("id"):
+            rows[str(post["id"])] = _to_row(post)
+    if not rows:
+        return 0
+
+    rows = list(rows.values())
+    try:
+        with engine.begin() as conn:
+            for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+                stmt = sqlite_insert(RedditPost.__table__)
+                # created_utc and first_seen_at keep their first value
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["post_id"],
+                    set_={
+                        "title": stmt.excluded.title,
+                        "content": stmt.excluded.content,
+                        "image": func.coalesce(stmt.excluded.image, RedditPost.__table__.c.image),
+                        "score": stmt.excluded.score,
+                        "num_comments": stmt.excluded.num_comments,
+                        "relevance_score": stmt.excluded.relevance_score,
+                        "updated_at": func.current_timestamp(),
+                    }
+                )
+                conn.execute(stmt, rows[start:start + UPSERT_CHUNK_SIZE])
+        logger.info(f"Saved {len(rows)} Reddit posts to database")
+        return len(rows)
+    except Exception as e:
+        logger.error(f"Error saving Reddit posts to database: {str(e)}")
+        return 0
+
+def _filtered(query, subreddit=None, time_filter='all', search=None):
+    """Apply the subreddit, time window and search filters shared by reads and counts"""
+    if subreddit:
+        query = query.where(RedditPost.subreddit == subreddit)
+    if time_filter in TIME_FILTER_SECONDS:
+        query = query.where(RedditPost.created_utc >= time.time() - TIME_FILTER_SECONDS[time_filter])
+    if search:
+        search_term = f"%{search}%"
+        query = query.where(or_(RedditPost.title.like(search_term), RedditPost.content.like(search_term)))
+    return query
+
+def get_posts(subreddit=None, sort_by='hot', time_filter='all', search=None, limit=100, offset=0):
+    """
+    Get stored posts
+
+    Args:
+        subreddit (str, optional): Only posts from this subreddit
+        sort_by (str): 'new', 'top', or 'hot'/'relevance' (by engagement)
+        time_filter (str): 'all', 'day', 'week', 'month' or 'year'
+        search (str, optional): Term to match in the title or content
+        limit (int): Maximum number of posts to return
+        offset (int): Number of posts to skip
+
+    Returns:
+        list: List of post dictionaries
+    """
+    query = _filtered(select(RedditPost), subreddit, time_filter, search)
+    if sort_by == 'new':
+        query = query.order_by(RedditPost.created_utc.desc())
+    elif sort_by == 'top':
+        query = query.order_by(RedditPost.score.desc(), RedditPost.created_utc.desc())
+    else:
+        query = query.order_by(RedditPost.relevance_score.desc(), RedditPost.created_utc.desc())
+
+    session = SessionLocal()
+    try:
+        posts = session.execute(query.offset(offset).limit(limit)).scalars().all()
+        return [post.to_dict() for post in posts]
+    except Exception as e:
+        logger.error(f"Error fetching Reddit posts from database: {str(e)}")
+        return []
+    finally:
+        session.close()
+
+def get_feed_page(limit, after=None, since=None, search=None):
+    """
+    Get newest-first posts for the cross-source feed
+
+    Args:
+        limit (int): Maximum number of posts to return
+        after (list): (created_utc, id) of the last post already returned
+        since (float): Only posts created at or after this Unix timestamp
+        search (str, optional): Term to match in the title or content
+
+    Returns:
+        list: (post dictionary, [created_utc, id]) tuples
+    """
+    query = _filtered(select(RedditPost), search=search)
+    if since is not None:
+        query = query.where(RedditPost.created_utc >= since)
+    if after is not None:
+        query = query.where(tuple_(RedditPost.created_utc, RedditPost.id) < tuple_(*after))
+    query = query.order_by(RedditPost.created_utc.desc(), RedditPost.id.desc()).limit(limit)
+
+    session = SessionLocal()
+    try:
+        posts = session.execute(query).scalars().all()
+        return [(post.to_dict(), [post.created_utc, post.id]) for post in posts]
+    finally:
+        session.close()
+
+def get_post_count(subreddit=None, time_filter='all', search=None):
+    """
+    Get the number of stored posts matching the filters
+
+    Returns:
+        int: Number of matching posts
+    """
+    query = _filtered(select(func.count(RedditPost.id)), subreddit, time_filter, search)
+    try:
+        with engine.connect() as conn:
+            return conn.execute(query).scalar()
+    except Exception as e:
+        logger.error(f"Error counting Reddit posts: {str(e)}")
+        return 0
+
+_has_posts = False
+
+def has_posts():
+    """Check whether any post has been ingested yet"""
+    global _has_posts
+    if not _has_posts:
+        try:
+            with engine.connect() as conn:
+                _has_posts = conn.execute(select(RedditPost.id).limit(1)).first() is not None
+        except Exception as e:
+            logger.error(f"Error checking the Reddit post store: {str(e)}")
+    return _has_posts
+
+# Create the tables when the module is imported
+init_db()
@@ -0,0 +1,109 @@
+"""
+Reddit Ingest Job for Community Surf
+
+This module runs Reddit fetching outside of request handling. A background
+thread periodically crawls the monitored subreddits incrementally and upserts
+whatever is new or changed into the Reddit post store, which /api/posts reads.
+
+Usage:
+    python reddit_ingest.py  # Run one ingest pass and exit
+"""
+
+import logging
+import os
+import threading
+import time
+
+import reddit_db
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+INGEST_INTERVAL = int(os.getenv("REDDIT_INGEST_INTERVAL", 300))  # Seconds between ingest passes
+INGEST_SORTS = ['new', 'hot']  # 'new' finds new posts, 'hot' refreshes engagement on active ones
+
+class RedditIngestJob:
+    """
+    Periodically fetches Reddit posts and saves them to the post store
+    """
+
+    def __init__(self, fetch_fn, interval=INGEST_INTERVAL, sorts=INGEST_SORTS):
+        """
+        Args:
+            fetch_fn (callable): Called with a sort method; returns new or changed posts, or None on failure
+            interval (float): Seconds between ingest passes
+            sorts (list): Sort methods crawled on every pass
+        """
+        self.fetch_fn = fetch_fn
+        self.interval = interval
+        self.sorts = sorts
+        self._thread = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._runs = 0
+        self._failures = 0
+        self._posts_saved = 0
+        self._last_run_at = None
+        self._last_duration = None
+
+    def ensure_started(self):
+        """Start the ingest thread if it is not running yet"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="reddit-ingest", daemon=True)
+                self._thread.start()
+
+    def trigger(self):
+        """Run an ingest pass now instead of waiting for the interval"""
+        self.ensure_started()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error in Reddit ingest pass: {e}")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def run_once(self):
+        """
+        Fetch every configured sort and save the results
+
+        Returns:
+            int: Number of posts written to the store
+        """
+        started = time.time()
+        saved = 0
+        for sort_by in self.sorts:
+            posts = self.fetch_fn(sort_by)
+            if posts is None:
+                self._failures += 1
+                logger.warning(f"Reddit ingest fetch failed for sort '{sort_by}'")
+                continue
+            saved += reddit_db.save_posts(posts)
+
+        self._runs += 1
+        self._posts_saved += saved
+        self._last_run_at = started
+        self._last_duration = time.time() - started
+        logger.info(f"Reddit ingest pass saved {saved} posts in {self._last_duration:.1f}s")
+        return saved
+
+    def stats(self):
+        """Get run counters and timing of the last pass"""
+        return {
+            "running": self._thread is not None,
+            "interval_seconds": self.interval,
+            "runs": self._runs,
+            "failures": self._failures,
+            "posts_saved": self._posts_saved,
+            "last_run_at": self._last_run_at,
+            "last_duration_seconds": round(self._last_duration, 2) if self._last_duration is not None else None,
+        }
+
+if __name__ == "__main__":
+    from app import REDDIT_INGEST
+    REDDIT_INGEST.run_once()
@@ -0,0 +1,130 @@
+"""
+Reddit Search Page Parser for Community Surf
+
+This module extracts post data from old.reddit.com search result pages.
+parse_search_results evaluates precompiled lxml XPath expressions over the
+result nodes only; benchmarks/bench_reddit_parser.py keeps the original
+BeautifulSoup implementation it is verified against.
+"""
+
+import logging
+import re
+import time
+
+from lxml import etree
+from lxml import html as lxml_html
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+COMMENTS_COUNT_PATTERN = re.compile(r'(\d+)')
+
+def _has_class(class_name):
+    """XPath predicate matching elements whose class list contains class_name"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {class_name} ')"
+
+# Precompiled lookups mirroring the BeautifulSoup find() calls
+THINGS_XPATH = etree.XPath(f"//div[{_has_class('thing')}]")
+TITLE_XPATH = etree.XPath(f"(.//a[{_has_class('title')}])[1]")
+SCORE_XPATH = etree.XPath("(.//div[normalize-space(@class)='score unvoted'])[1]/@title")
+SNIPPET_XPATH = etree.XPath(f"(.//div[{_has_class('search-result-snippet')}])[1]")
+THUMBNAIL_IMG_XPATH = etree.XPath(f"(.//a[{_has_class('thumbnail')}])[1]/descendant::img[1]")
+AUTHOR_XPATH = etree.XPath(f"(.//a[{_has_class('author')}])[1]")
+COMMENTS_XPATH = etree.XPath(f"(.//a[{_has_class('comments')}])[1]")
+
+def _format_post(subreddit, post_id, title, permalink, score_title, content_preview,
+                 image_src, author, comments_text, now):
+    """Build a post dictionary from raw extracted fields"""
+    # Normalize the permalink
+    if permalink.startswith('http'):
+        # Extract the Reddit part of external links
+        if 'reddit.com' in permalink:
+            permalink = permalink.split('reddit.com')[1]
+        else:
+            # This is an external link, construct a permalink from post ID
+            permalink = f"/r/{subreddit}/comments/{post_id}/"
+
+    score = int(score_title) if score_title.isdigit() else 0
+
+    # Convert thumbnails to full images if possible
+    image_url = None
+    if image_src is not None and not image_src.endswith('self'):
+        image_url = image_src
+        if 'thumbnail' in image_url:
+            image_url = image_url.replace('thumbnail', 'preview')
+
+    search_result = COMMENTS_COUNT_PATTERN.search(comments_text)
+    num_comments = int(search_result.group(1)) if search_result else 0
+
+    return {
+        "id": post_id,
+        "title": title,
+        "content": content_preview,
+        "subreddit": subreddit,
+        "url": f"https://reddit.com{permalink}",
+        "image": image_url,
+        "score": score,
+        "num_comments": num_comments,
+        "created_utc": now,  # Use current time as fallback
+        "author": author
+    }
+
+def parse_search_results(html, subreddit, limit=25, now=None, stop_at=None):
+    """
+    Parse an old.reddit search results page with lxml XPath
+
+    Args:
+        html (str): Page HTML
+        subreddit (str): Subreddit the search was restricted to
+        limit (int): Maximum number of posts to return
+        now (int, optional): Timestamp used as created_utc, defaults to the current time
+        stop_at (set, optional): Post IDs already crawled; parsing stops at the first one
+
+    Returns:
+        list: List of formatted posts
+    """
+    now = int(time.time()) if now is None else now
+    try:
+        root = lxml_html.fromstring(html)
+    except ValueError:
+        # Unicode strings with an encoding declaration must be parsed as bytes
+        root = lxml_html.fromstring(html.encode('utf-8'))
+
+    things = THINGS_XPATH(root)
+    logger.info(f"Found {len(things)} posts in the HTML response")
+
+    formatted_posts = []
+    for thing in things[:limit]:
+        try:
+            post_id = thing.get('data-fullname', '').replace('t3_', '')
+            if not post_id:
+                continue
+            if stop_at and post_id in stop_at:
+                # Everything below a known post on a 'new' page was crawled before
+                break
+
+            title_elems = TITLE_XPATH(thing)
+            title_elem = title_elems[0] if title_elems else None
+            snippet_elems = SNIPPET_XPATH(thing)
+            img_elems = THUMBNAIL_IMG_XPATH(thing)
+            author_elems = AUTHOR_XPATH(thing)
+            comments_elems = COMMENTS_XPATH(thing)
+            score_titles = SCORE_XPATH(thing)
+
+            formatted_posts.append(_format_post(
+                subreddit,
+                post_id,
+                title=title_elem.text_content().strip() if title_elem is not None else 'No title',
+                permalink=title_elem.get('href', '') if title_elem is not None else '',
+                score_title=str(score_titles[0]) if score_titles else '',
+                content_preview=snippet_elems[0].text_content().strip() if snippet_elems else '',
+                image_src=img_elems[0].get('src') if img_elems else None,
+                author=author_elems[0].text_content().strip() if author_elems else '[deleted]',
+                comments_text=comments_elems[0].text_content().strip() if comments_elems else '0 comments',
+                now=now,
+            ))
+        except Exception as e:
+            logger.error(f"Error parsing post: {e}")
+
+    return formatted_posts
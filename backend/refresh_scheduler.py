@@ -0,0 +1,162 @@
+"""
+Stale-While-Revalidate Refresh Scheduler for Community Surf
+
+This module keeps popular cache keys warm. Request handlers only record that a
+key was read and always serve whatever copy the cache holds; a single
+background thread refreshes the hottest keys ahead of expiry, within an
+upstream budget, and forgets keys nobody has requested recently.
+"""
+
+import logging
+import threading
+import time
+
+from rate_limiter import TokenBucket
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class RefreshScheduler:
+    """
+    Refreshes tracked cache keys ahead of expiry, hottest first
+    """
+
+    def __init__(self, name, cache, refresh_fn, refresh_ahead=0.5, idle_timeout=30 * 60,
+                 refreshes_per_minute=6, interval=15, popularity_half_life=10 * 60):
+        """
+        Args:
+            name (str): Scheduler name used in logs and stats
+            cache (TTLCache): Cache holding the values being refreshed
+            refresh_fn (callable): Called with a key; fetches and stores a fresh value
+            refresh_ahead (float): Fraction of the cache TTL after which a key is due
+            idle_timeout (float): Seconds without reads after which a key is dropped
+            refreshes_per_minute (int): Upstream budget for background refreshes
+            interval (float): Seconds between scheduling passes
+            popularity_half_life (float): Seconds for a read's popularity weight to halve
+        """
+        self.name = name
+        self.cache = cache
+        self.refresh_fn = refresh_fn
+        self.refresh_ahead = refresh_ahead
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self.popularity_half_life = popularity_half_life
+        self._budget = TokenBucket(f"{name}_refresh", refreshes_per_minute)
+        # key -> {"popularity", "last_access", "last_refresh"}
+        self._keys = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._refreshes = 0
+        self._failures = 0
+        self._dropped = 0
+
+    def _decayed(self, info, now):
+        """Popularity of a key decayed to now"""
+        elapsed = now - info["last_access"]
+        return info["popularity"] * 0.5 ** (elapsed / self.popularity_half_life)
+
+    def record_access(self, key):
+        """Record a read of key, starting the scheduler thread on first use"""
+        now = time.time()
+        with self._lock:
+            info = self._keys.get(key)
+            if info is None:
+                self._keys[key] = {"popularity": 1.0, "last_access": now, "last_refresh": None}
+            else:
+                info["popularity"] = self._decayed(info, now) + 1.0
+                info["last_access"] = now
+        self._ensure_started()
+
+    def wake(self):
+        """Run a scheduling pass now, e.g. after a stale copy was served"""
+        self._wake.set()
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"{self.name}-refresh", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error in {self.name} refresh pass: {e}")
+
+    def queue(self):
+        """
+        Snapshot of tracked keys with their refresh state, most urgent first
+
+        Returns:
+            list: Dicts with key, age, popularity, idle time and whether it is due
+        """
+        now = time.time()
+        due_age = self.cache.default_ttl * self.refresh_ahead
+        with self._lock:
+            items = [(key, dict(info)) for key, info in self._keys.items()]
+
+        entries = []
+        for key, info in items:
+            age = self.cache.age(key)
+            last_refresh = info["last_refresh"]
+            # Keys whose refresh produced nothing are not retried before they would be due again
+            recently_tried = last_refresh is not None and now - last_refresh < due_age
+            entries.append({
+                "key": key,
+                "age_seconds": round(age, 1) if age is not None else None,
+                "popularity": round(self._decayed(info, now), 3),
+                "idle_seconds": round(now - info["last_access"], 1),
+                "due": (age is None or age >= due_age) and not recently_tried,
+            })
+        entries.sort(key=lambda e: (not e["due"], -e["popularity"]))
+        return entries
+
+    def run_once(self):
+        """
+        Drop idle keys and refresh due keys, hottest first, within the budget
+
+        Returns:
+            int: Number of keys refreshed
+        """
+        now = time.time()
+        with self._lock:
+            idle_keys = [k for k, info in self._keys.items() if now - info["last_access"] > self.idle_timeout]
+            for key in idle_keys:
+                del self._keys[key]
+            self._dropped += len(idle_keys)
+
+        refreshed = 0
+        for entry in self.queue():
+            if not entry["due"]:
+                break
+            if not self._budget.try_acquire():
+                logger.info(f"{self.name} refresh budget exhausted, deferring remaining keys")
+                break
+            with self._lock:
+                if entry["key"] in self._keys:
+                    self._keys[entry["key"]]["last_refresh"] = time.time()
+            try:
+                logger.info(f"Background refreshing cache for {entry['key']}")
+                self.refresh_fn(entry["key"])
+                refreshed += 1
+                self._refreshes += 1
+            except Exception as e:
+                self._failures += 1
+                logger.error(f"Error during background refresh for {entry['key']}: {e}")
+        return refreshed
+
+    def stats(self):
+        """Get counters, budget state and the current refresh queue"""
+        return {
+            "tracked_keys": len(self._keys),
+            "refreshes": self._refreshes,
+            "failures": self._failures,
+            "dropped_idle_keys": self._dropped,
+            "budget": self._budget.stats(),
+            "queue": self.queue(),
+        }
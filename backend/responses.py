@@ -0,0 +1,63 @@
+"""
+JSON Responses for Community Surf
+
+This module is the app's JSON encoding layer. It encodes with orjson when it
+is installed and with the standard library otherwise, and it is installed as
+the Flask JSON provider, so every jsonify call goes through it, including
+the /api/posts pages read from the Reddit post store.
+"""
+
+import json
+import logging
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+if not ORJSON_AVAILABLE:
+    logger.info("orjson not installed, encoding JSON with the standard library")
+
+def _default(value):
+    """Encode the types Flask's provider knows (dates, decimals, UUIDs, dataclasses) the way Flask does"""
+    return DefaultJSONProvider.default(value)
+
+if ORJSON_AVAILABLE:
+    # Dates go through _default so responses keep Flask's date format
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+def dumps(value, sort_keys=False):
+    """
+    Encode a value as JSON
+
+    Args:
+        value: Value to encode
+        sort_keys (bool): Sort object keys, as jsonify does
+
+    Returns:
+        bytes: UTF-8 encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        options = _ORJSON_OPTIONS | orjson.OPT_SORT_KEYS if sort_keys else _ORJSON_OPTIONS
+        return orjson.dumps(value, default=_default, option=options)
+    return json.dumps(value, default=_default, ensure_ascii=False, sort_keys=sort_keys,
+                      separators=(",", ":")).encode("utf-8")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that encodes with dumps, keeping jsonify's sorted keys
+    """
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, sort_keys=kwargs.get("sort_keys", self.sort_keys)).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys), mimetype=self.mimetype)
@@ -6,18 +6,24 @@ when the official Reddit API is unavailable or rate-limited.
 """
 
 import requests
-from bs4 import BeautifulSoup
 import logging
 import random
 import time
 import json
-import re
 import os
 from urllib.parse import quote_plus
-from functools import lru_cache
+from contextlib import contextmanager
 import datetime
 import threading
 
+import http_client
+import rate_limiter
+from cache import create_cache
+from singleflight import SingleFlight
+from fetch_engine import fetch_all
+from reddit_parser import parse_search_results
+from crawl_state import get_crawl_state
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -36,59 +42,85 @@ USER_AGENTS = [
     'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:90.0) Gecko/20100101 Firefox/90.0',
 ]
 
+# Base URL for old Reddit (overridable to point at a local server)
+OLD_REDDIT_BASE_URL = os.getenv("OLD_REDDIT_BASE_URL", "https://old.reddit.com")
+
+# Maximum seconds to wait for a whole batch of concurrent scrapes
+SCRAPE_BATCH_TIMEOUT = 60
+
 # Rate limiting variables
-REQUEST_TIMESTAMPS = []
-MAX_REQUESTS_PER_MINUTE = 25
+RATE_LIMITER_NAME = "old_reddit"
+RATE_LIMIT_WAIT_TIMEOUT = 30.0  # Give up on a scrape rather than queue longer than this
+MAX_RATE_LIMIT_RETRIES = 2
 CURRENT_BACKOFF_TIME = 1.0
 MAX_BACKOFF_TIME = 60.0
+BACKOFF_UNTIL = 0.0  # time.monotonic() deadline of the current pause
+BACKOFF_LOCK = threading.Lock()
 USER_AGENT_FAILURES = {}
 USER_AGENT_LOCKS = {}
 for ua in USER_AGENTS:
     USER_AGENT_FAILURES[ua] = 0
     USER_AGENT_LOCKS[ua] = threading.RLock()
 
+# Incremental crawling
+CRAWL_SOURCE = "old_reddit"
+SEARCH_PAGE_SIZE = 25  # Results per old.reddit search page
+INCREMENTAL_MAX_PAGES = 4
+
 # Cache for response data
-CACHE = {}
 CACHE_TIMEOUT = 10 * 60  # 10 minutes in seconds
+CACHE = create_cache("scraper", max_entries=512, default_ttl=CACHE_TIMEOUT)
+
+# Concurrent misses on the same cache key share one scrape
+SCRAPE_FLIGHT = SingleFlight("scraper")
 
 def get_best_user_agent():
     """Return the user agent with the least number of failures"""
     return min(USER_AGENT_FAILURES.items(), key=lambda x: x[1])[0]
 
-def track_request():
+@contextmanager
+def checkout_user_agent():
     """
-    Track request timestamps for rate limiting
-    Returns True if the request should proceed, False if it should be delayed
+    Lock and yield the least-failing user agent that is not already in use,
+    so concurrent scrapes spread across user agents instead of queueing on one
     """
-    global REQUEST_TIMESTAMPS
-    current_time = time.time()
-    
-    # Remove timestamps older than 1 minute
-    REQUEST_TIMESTAMPS = [ts for ts in REQUEST_TIMESTAMPS if current_time - ts < 60]
-    
-    # Check if we're over the limit
-    if len(REQUEST_TIMESTAMPS) >= MAX_REQUESTS_PER_MINUTE:
-        return False
+    for user_agent in sorted(USER_AGENT_FAILURES, key=USER_AGENT_FAILURES.get):
+        lock = USER_AGENT_LOCKS[user_agent]
+        if lock.acquire(blocking=False):
+            try:
+                yield user_agent
+            finally:
+                lock.release()
+            return
     
-    # Track this request
-    REQUEST_TIMESTAMPS.append(current_time)
-    return True
+    # Every user agent is busy, wait for the best one
+    user_agent = get_best_user_agent()
+    with USER_AGENT_LOCKS[user_agent]:
+        yield user_agent
 
 def handle_rate_limiting():
-    """Apply exponential backoff if rate limited"""
-    global CURRENT_BACKOFF_TIME
+    """Apply exponential backoff to every queued old.reddit request after a 429"""
+    global CURRENT_BACKOFF_TIME, BACKOFF_UNTIL
     
-    # Double the backoff time, but don't exceed the maximum
-    CURRENT_BACKOFF_TIME = min(CURRENT_BACKOFF_TIME * 2, MAX_BACKOFF_TIME)
+    with BACKOFF_LOCK:
+        now = time.monotonic()
+        # 429s of requests sent before the current pause started are one event, not several
+        if now >= BACKOFF_UNTIL:
+            # Double the backoff time, but don't exceed the maximum
+            CURRENT_BACKOFF_TIME = min(CURRENT_BACKOFF_TIME * 2, MAX_BACKOFF_TIME)
+            BACKOFF_UNTIL = now + CURRENT_BACKOFF_TIME
+        deadline = BACKOFF_UNTIL
     
-    # Sleep for the backoff period
-    logger.warning(f"Rate limiting detected. Backing off for {CURRENT_BACKOFF_TIME:.1f} seconds")
-    time.sleep(CURRENT_BACKOFF_TIME)
+    # Pause the shared bucket instead of sleeping in the calling thread; the
+    # pause is extended to the deadline, never added to
+    if rate_limiter.get_limiter(RATE_LIMITER_NAME).penalize_until(deadline):
+        logger.warning(f"Rate limiting detected. Backing off for {deadline - now:.1f} seconds")
 
 def reset_backoff():
     """Reset the backoff time after successful requests"""
     global CURRENT_BACKOFF_TIME
-    CURRENT_BACKOFF_TIME = 1.0
+    with BACKOFF_LOCK:
+        CURRENT_BACKOFF_TIME = 1.0
 
 def get_cache_key(subreddit, search_term, sort, time_filter):
     """Generate a cache key for a request"""
@@ -96,19 +128,16 @@ def get_cache_key(subreddit, search_term, sort, time_filter):
 
 def get_from_cache(cache_key):
     """Get data from cache if valid"""
-    if cache_key in CACHE:
-        timestamp, data = CACHE[cache_key]
-        if time.time() - timestamp < CACHE_TIMEOUT:
-            logger.info(f"Cache hit for {cache_key}")
-            return data
-    return None
+    data = CACHE.get(cache_key)
+    if data is not None:
+        logger.info(f"Cache hit for {cache_key}")
+    return data
 
 def store_in_cache(cache_key, data):
     """Store data in cache"""
-    CACHE[cache_key] = (time.time(), data)
+    CACHE.set(cache_key, data)
 
-@lru_cache(maxsize=32)
-def scrape_reddit_subreddit(subreddit, search_term, sort='hot', time_filter='all', limit=25):
+def scrape_reddit_subreddit(subreddit, search_term, sort='hot', time_filter='all', limit=25, incremental=False):
     """
     Scrape posts from a specific subreddit with a search term
     
@@ -118,36 +147,108 @@ def scrape_reddit_subreddit(subreddit, search_term, sort='hot', time_filter='all
         sort (str): Sort method - 'hot', 'new', 'top', or 'relevance'
         time_filter (str): Time filter for 'top' sort - 'all', 'day', 'week', 'month', 'year'
         limit (int): Maximum number of posts to fetch
+        incremental (bool): Return only posts that are new or changed since the last crawl
         
     Returns:
-        list: List of formatted posts
+        list: List of formatted posts, or None if an incremental crawl failed
     """
     logger.info(f"Scraping r/{subreddit} for term '{search_term}' (sort: {sort}, time: {time_filter})")
     
-    # Check cache first
     cache_key = get_cache_key(subreddit, search_term, sort, time_filter)
+    if incremental:
+        return SCRAPE_FLIGHT.do(f"{cache_key}:delta", _crawl_new_posts, subreddit, search_term, sort, time_filter, limit)
+    
+    # Check cache first
     cached_data = get_from_cache(cache_key)
     if cached_data:
         return cached_data
     
-    # Apply rate limiting
-    if not track_request():
-        handle_rate_limiting()
-        # Try again after backoff
-        return scrape_reddit_subreddit(subreddit, search_term, sort, time_filter, limit)
+    return SCRAPE_FLIGHT.do(cache_key, _scrape_search_page, subreddit, search_term, sort, time_filter, limit, cache_key)
+
+def _scrape_search_page(subreddit, search_term, sort, time_filter, limit, cache_key):
+    """Fetch, parse and cache one search page"""
+    html = _fetch_search_html(subreddit, search_term, sort, time_filter)
+    if html is None:
+        return []
+    
+    # Extract the posts from the result nodes
+    formatted_posts = parse_search_results(html, subreddit, limit)
+    logger.info(f"Scraped {len(formatted_posts)} posts from r/{subreddit}")
+    
+    # Remember what this search returned so later crawls can be incremental
+    get_crawl_state().record(CRAWL_SOURCE, subreddit, search_term, sort, formatted_posts)
+    
+    # Store in cache
+    store_in_cache(cache_key, formatted_posts)
+    
+    return formatted_posts
+
+def _crawl_new_posts(subreddit, search_term, sort, time_filter, limit):
+    """
+    Crawl a search incrementally, returning only new or changed posts
+    
+    Results sorted by 'new' are paginated until a page reaches a post crawled
+    before; the page is cut at the high-water mark and parsing stops at the
+    first known post. Other sorts are not chronological, so a single page is
+    fetched and only its unchanged posts are dropped.
+    """
+    crawl_state = get_crawl_state()
+    paginate = sort == 'new'
+    known_ids = crawl_state.known_ids(CRAWL_SOURCE, subreddit, search_term, sort) if paginate else None
+    mark = crawl_state.get_mark(CRAWL_SOURCE, subreddit, search_term, sort) if paginate else None
+    newest_marker = f'data-fullname="t3_{mark["newest_id"]}"' if mark and mark["newest_id"] else None
+    
+    posts = []
+    after = None
+    max_pages = INCREMENTAL_MAX_PAGES if paginate else 1
+    for page in range(max_pages):
+        html = _fetch_search_html(subreddit, search_term, sort, time_filter, after=after, count=len(posts))
+        if html is None:
+            if page == 0:
+                return None
+            break
+        
+        # Drop the already-crawled tail of the page before building the tree
+        if newest_marker:
+            cut_at = html.rfind('<div', 0, max(html.find(newest_marker), 0))
+            if cut_at > 0:
+                html = html[:cut_at]
+        
+        page_posts = parse_search_results(html, subreddit, SEARCH_PAGE_SIZE, stop_at=known_ids)
+        posts.extend(page_posts)
+        
+        # A short page means we reached known content or the end of the results
+        if len(page_posts) < SEARCH_PAGE_SIZE or len(posts) >= limit:
+            break
+        after = f"t3_{page_posts[-1]['id']}"
+    
+    changed = crawl_state.record(CRAWL_SOURCE, subreddit, search_term, sort, posts[:limit])
+    logger.info(f"Incremental crawl of r/{subreddit} for '{search_term}': {len(changed)} new or changed posts")
+    return changed
+
+def _fetch_search_html(subreddit, search_term, sort, time_filter, after=None, count=0, retry=0):
+    """
+    Fetch one search results page, retrying a bounded number of times on 429
+    
+    Returns:
+        str: Page HTML, or None if the request failed or the budget was exhausted
+    """
+    # Wait for our turn in the shared old.reddit budget
+    if not rate_limiter.get_limiter(RATE_LIMITER_NAME).acquire(timeout=RATE_LIMIT_WAIT_TIMEOUT):
+        logger.warning(f"Request budget exhausted, skipping r/{subreddit} for '{search_term}'")
+        return None
     
     # Format the search URL
     encoded_search = quote_plus(search_term)
-    base_url = f"https://old.reddit.com/r/{subreddit}/search"
+    base_url = f"{OLD_REDDIT_BASE_URL}/r/{subreddit}/search"
     url = f"{base_url}?q={encoded_search}&restrict_sr=on&sort={sort}&t={time_filter}"
+    if after:
+        url += f"&count={count}&after={after}"
     
     logger.info(f"Search URL: {url}")
     
-    # Select the best user agent based on previous success rates
-    user_agent = get_best_user_agent()
-    
-    # Lock this user agent while in use
-    with USER_AGENT_LOCKS[user_agent]:
+    # Select and lock the best free user agent based on previous success rates
+    with checkout_user_agent() as user_agent:
         headers = {
             'User-Agent': user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -163,14 +264,17 @@ def scrape_reddit_subreddit(subreddit, search_term, sort='hot', time_filter='all
             # Add a small random delay to avoid patterns
             time.sleep(random.uniform(0.2, 0.5))
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = http_client.get(url, headers=headers, timeout=10)
             
             # Check status code first
             if response.status_code == 429:
                 # Rate limited - increase failure count for this user agent
                 USER_AGENT_FAILURES[user_agent] += 5
                 handle_rate_limiting()
-                return scrape_reddit_subreddit(subreddit, search_term, sort, time_filter, limit)
+                if retry >= MAX_RATE_LIMIT_RETRIES:
+                    logger.error(f"Still rate limited after {retry} retries for r/{subreddit}")
+                    return None
+                return _fetch_search_html(subreddit, search_term, sort, time_filter, after, count, retry + 1)
                 
             elif response.status_code != 200:
                 logger.error(f"HTTP Error: {response.status_code} - {response.reason}")
@@ -186,117 +290,18 @@ def scrape_reddit_subreddit(subreddit, search_term, sort='hot', time_filter='all
             
             logger.info(f"Received response from Reddit (status: {response.status_code}, content length: {len(response.text)} bytes)")
             
-            # Parse the HTML
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Find all post divs
-            posts = soup.find_all('div', class_='thing')
-            logger.info(f"Found {len(posts)} posts in the HTML response")
-            
-            # Limit the number of posts
-            posts = posts[:limit]
-            
-            # Extract post information
-            formatted_posts = []
-            for post in posts:
-                try:
-                    # Extract post ID
-                    post_id = post.get('data-fullname', '').replace('t3_', '')
-                    
-                    # Skip if no valid ID
-                    if not post_id:
-                        continue
-                    
-                    # Extract title
-                    title_elem = post.find('a', class_='title')
-                    title = title_elem.text.strip() if title_elem else 'No title'
-                    
-                    # Extract permalink
-                    permalink = title_elem.get('href', '') if title_elem else ''
-                    if permalink.startswith('/r/'):
-                        permalink = permalink
-                    elif permalink.startswith('http'):
-                        # Extract the Reddit part of external links
-                        if 'reddit.com' in permalink:
-                            permalink = permalink.split('reddit.com')[1]
-                        else:
-                            # This is an external link, construct a permalink from post ID
-                            permalink = f"/r/{subreddit}/comments/{post_id}/"
-                    
-                    # Extract score
-                    score_elem = post.find('div', class_='score unvoted')
-                    score = int(score_elem.get('title', '0')) if score_elem and score_elem.get('title', '').isdigit() else 0
-                    
-                    # Extract post content
-                    # Note: Full content isn't available on search results page, just a preview
-                    content_elem = post.find('a', class_='search-link')
-                    content_preview = ''
-                    
-                    # Try to get content from the search snippet
-                    if not content_preview:
-                        snippet_elem = post.find('div', class_='search-result-snippet')
-                        if snippet_elem:
-                            content_preview = snippet_elem.text.strip()
-                    
-                    # Extract image if present
-                    thumbnail_elem = post.find('a', class_='thumbnail')
-                    image_url = None
-                    if thumbnail_elem:
-                        img = thumbnail_elem.find('img')
-                        if img and 'src' in img.attrs and not img['src'].endswith('self'):
-                            image_url = img['src']
-                            # Convert thumbnails to full images if possible
-                            if 'thumbnail' in image_url:
-                                image_url = image_url.replace('thumbnail', 'preview')
-                    
-                    # Author information
-                    author_elem = post.find('a', class_='author')
-                    author = author_elem.text.strip() if author_elem else '[deleted]'
-                    
-                    # Comments count
-                    comments_elem = post.find('a', class_='comments')
-                    comments_text = comments_elem.text.strip() if comments_elem else '0 comments'
-                    
-                    # Use uma única chamada para re.search e verifique o resultado
-                    search_result = re.search(r'(\d+)', comments_text)
-                    num_comments = int(search_result.group(1)) if search_result else 0
-                    
-                    # Create the post object
-                    post_data = {
-                        "id": post_id,
-                        "title": title,
-                        "content": content_preview,
-                        "subreddit": subreddit,
-                        "url": f"https://reddit.com{permalink}",
-                        "image": image_url,
-                        "score": score,
-                        "num_comments": num_comments,
-                        "created_utc": int(time.time()),  # Use current time as fallback
-                        "author": author
-                    }
-                    
-                    formatted_posts.append(post_data)
-                    
-                except Exception as e:
-                    logger.error(f"Error parsing post: {e}")
-            
-            logger.info(f"Scraped {len(formatted_posts)} posts from r/{subreddit}")
-            
-            # Store in cache
-            store_in_cache(cache_key, formatted_posts)
-            
-            return formatted_posts
+            return response.text
             
         except requests.exceptions.RequestException as e:
             USER_AGENT_FAILURES[user_agent] += 3
             logger.error(f"Request error when scraping r/{subreddit}: {e}")
-            return []
+            return None
         except Exception as e:
             USER_AGENT_FAILURES[user_agent] += 1
             logger.error(f"General error when scraping r/{subreddit}: {e}")
-            return []
+            return None
 
-def scrape_reddit_multiple_subreddits(subreddits, search_terms, sort='hot', time_filter='all', limit=5):
+def scrape_reddit_multiple_subreddits(subreddits, search_terms, sort='hot', time_filter='all', limit=5, incremental=False):
     """
     Scrape posts from multiple subreddits with multiple search terms
     
@@ -306,18 +311,27 @@ def scrape_reddit_multiple_subreddits(subreddits, search_terms, sort='hot', time
         sort (str): Sort method - 'hot', 'new', 'top', or 'relevance'
         time_filter (str): Time filter for 'top' sort - 'all', 'day', 'week', 'month', 'year'
         limit (int): Maximum number of posts to fetch per subreddit and search term
+        incremental (bool): Return only posts that are new or changed since the last crawl
         
     Returns:
-        list: List of formatted posts
+        list: List of formatted posts, or None if every incremental crawl failed
     """
     # Define a combined cache key for the entire operation
     cache_key = f"multiple:{','.join(subreddits)}:{','.join(search_terms)}:{sort}:{time_filter}:{limit}"
     
+    # Deltas are never cached; the caller merges them into its own copy
+    if incremental:
+        return SCRAPE_FLIGHT.do(f"{cache_key}:delta", _scrape_combinations, subreddits, search_terms, sort, time_filter, limit, None, True)
+    
     # Check cache first
     cached_data = get_from_cache(cache_key)
     if cached_data:
         return cached_data
-        
+    
+    return SCRAPE_FLIGHT.do(cache_key, _scrape_combinations, subreddits, search_terms, sort, time_filter, limit, cache_key)
+
+def _scrape_combinations(subreddits, search_terms, sort, time_filter, limit, cache_key, incremental=False):
+    """Scrape a sample of (subreddit, term) combinations concurrently and cache the merged posts"""
     all_posts = []
     
     # Prioritize the most relevant combinations
@@ -335,16 +349,18 @@ def scrape_reddit_multiple_subreddits(subreddits, search_terms, sort='hot', time
     max_combinations = min(len(combinations), 10)
     selected_combinations = combinations[:max_combinations]
     
-    for subreddit, term in selected_combinations:
+    # Fetch every combination concurrently; the batch takes as long as the slowest fetch
+    results = fetch_all(
+        scrape_reddit_subreddit,
+        [((subreddit, term), {"sort": sort, "time_filter": time_filter, "limit": limit, "incremental": incremental})
+         for subreddit, term in selected_combinations],
+        timeout=SCRAPE_BATCH_TIMEOUT
+    )
+    if incremental and all(posts is None for posts in results):
+        return None
+    
+    for (subreddit, term), posts in zip(selected_combinations, results):
         try:
-            posts = scrape_reddit_subreddit(
-                subreddit, 
-                term, 
-                sort=sort, 
-                time_filter=time_filter, 
-                limit=limit
-            )
-            
             if posts:
                 # Only add posts with some interaction
                 posts_with_interaction = [
@@ -364,7 +380,8 @@ def scrape_reddit_multiple_subreddits(subreddits, search_terms, sort='hot', time
     all_posts.sort(key=lambda x: (-x["created_utc"], -x.get("relevance_score", 0)))
     
     # Store in cache
-    store_in_cache(cache_key, all_posts)
+    if cache_key:
+        store_in_cache(cache_key, all_posts)
     
     return all_posts
 
@@ -411,28 +428,27 @@ def fetch_windsurf_ai_posts_by_scraping(subreddit=None, sort_by='new', time_filt
     if cached_data and not background:
         return cached_data
     
-    # Fetch the posts
-    posts = scrape_reddit_multiple_subreddits(
-        subreddits_to_search, 
-        search_terms, 
-        sort=sort_by, 
-        time_filter=time_filter, 
-        limit=limit
-    )
-    
-    # Cache the results
-    store_in_cache(cache_key, posts)
+    def fetch_and_cache():
+        # Fetch the posts
+        posts = scrape_reddit_multiple_subreddits(
+            subreddits_to_search, 
+            search_terms, 
+            sort=sort_by, 
+            time_filter=time_filter, 
+            limit=limit
+        )
+        
+        # Cache the results
+        store_in_cache(cache_key, posts)
+        return posts
     
-    return posts
+    return SCRAPE_FLIGHT.do(cache_key, fetch_and_cache)
 
 # Clean expired cache entries periodically
 def clean_cache():
     """Remove expired cache entries"""
-    current_time = time.time()
-    expired_keys = [k for k, (timestamp, _) in CACHE.items() if current_time - timestamp > CACHE_TIMEOUT]
-    for key in expired_keys:
-        del CACHE[key]
-    logger.info(f"Cleaned {len(expired_keys)} expired cache entries")
+    removed = CACHE.purge_expired()
+    logger.info(f"Cleaned {removed} expired cache entries")
 
 # Example usage
 if __name__ == "__main__":
@@ -38,26 +38,17 @@ def search_tweets():
     logger.info(f"Searching tweets for query: '{query}', sort: {sort_by}")
     
     try:
-        # Get all tweets from the local database
-        all_tweets = twitter_db.get_all_tweets(sort_by=sort_by)
+        if query:
+            tweets = twitter_db.search_local_tweets(query, limit=50, sort_by=sort_by)
+        else:
+            tweets = twitter_db.get_all_tweets(sort_by=sort_by)
         
-        # If we have tweets and a query, filter them
-        if all_tweets and query:
-            filtered_tweets = [t for t in all_tweets if query.lower() in t.get('content', '').lower()]
-            logger.info(f"Found {len(filtered_tweets)} tweets in local database matching query: '{query}'")
+        if tweets:
+            logger.info(f"Found {len(tweets)} tweets in local database matching query: '{query}'")
             return jsonify({
-                "posts": filtered_tweets,
+                "posts": tweets,
                 "source": "local_db",
-                "total": len(filtered_tweets)
-            })
-        
-        # If we have tweets and no query, return all
-        elif all_tweets:
-            logger.info(f"Returning all {len(all_tweets)} tweets from local database")
-            return jsonify({
-                "posts": all_tweets,
-                "source": "local_db",
-                "total": len(all_tweets)
+                "total": len(tweets)
             })
     except Exception as e:
         logger.error(f"Error retrieving tweets from local database: {e}")
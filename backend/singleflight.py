@@ -0,0 +1,75 @@
+"""
+Single-Flight Request Coalescing for Community Surf
+
+This module makes concurrent cache misses for the same key share one upstream
+fetch: the first caller runs the fetch, later callers wait for its result
+instead of hitting Reddit or the scraper again.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._executions = 0
+        self._coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) unless a call for key is already in flight
+
+        Args:
+            key (str): Coalescing key, usually the cache key of the result
+            fn (callable): Function producing the result
+
+        Returns:
+            The result of the single execution, shared by every caller for key
+
+        Raises:
+            Exception: Whatever the shared execution raised
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._executions += 1
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            logger.info(f"Waiting on in-flight fetch for {key}")
+            return future.result()
+
+        try:
+            result = fn(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    def stats(self):
+        """Get execution and coalescing counters"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self._executions,
+                "coalesced": self._coalesced,
+            }
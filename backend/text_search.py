@@ -0,0 +1,183 @@
+"""
+Full-Text Search for Community Surf
+
+This module holds the SQLite FTS5 setup and queries shared by the Cursor Forum
+and Twitter databases. Each source gets an external-content FTS5 table over its
+text columns, kept in sync by triggers, so a search looks matching rows up in
+the index instead of scanning the table with LIKE '%term%'.
+
+The functions here only build SQL; cursor_forum_db and twitter_db run it on
+their own connections. Queries use '?' placeholders, which both sqlite3 and
+SQLAlchemy's exec_driver_sql accept.
+"""
+
+import logging
+import re
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+SOURCES = {
+    "cursor_forum": {
+        "table": "cursor_posts",
+        "fts_table": "cursor_posts_fts",
+        "columns": ("title", "content"),
+        "weights": (10.0, 1.0),  # A match in the title outranks one in the body
+        "fields": {
+            "id": "t.post_id",
+            "title": "t.title",
+            "author": "t.author",
+            "url": "t.url",
+            "created_at": "t.created_at",
+        },
+    },
+    "twitter": {
+        "table": "twitter_posts",
+        "fts_table": "twitter_posts_fts",
+        "columns": ("content",),
+        "weights": (1.0,),
+        "fields": {
+            "id": "t.external_id",
+            "title": "'Post by @' || t.author",
+            "author": "t.author",
+            "url": "t.url",
+            "created_at": "t.created_at",
+        },
+    },
+}
+
+SNIPPET_TOKENS = 16  # Tokens of context around the match in a snippet
+SNIPPET_START = "<mark>"
+SNIPPET_END = "</mark>"
+
+def fts5_available(conn):
+    """Check whether the SQLite library was compiled with FTS5"""
+    try:
+        options = {row[0] for row in conn.execute("PRAGMA compile_options")}
+        return "ENABLE_FTS5" in options
+    except Exception:
+        return False
+
+def create_index_sql(source):
+    """
+    Get the statements creating a source's FTS5 table and sync triggers and
+    indexing the rows already in the table
+
+    Args:
+        source (str): Key of SOURCES
+
+    Returns:
+        list: SQL statements, to be run in order
+    """
+    config = SOURCES[source]
+    table, fts = config["table"], config["fts_table"]
+    columns = ", ".join(config["columns"])
+    new_values = ", ".join(f"new.{c}" for c in config["columns"])
+    old_values = ", ".join(f"old.{c}" for c in config["columns"])
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{columns}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+        # Only text changes reindex a row; engagement upserts leave the index alone
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        f"INSERT INTO {fts} ({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts} (rowid, {columns}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+def match_expression(term):
+    """
+    Turn user input into an FTS5 MATCH expression
+
+    Every word must match; the last one also matches as a prefix, so results
+    show up while the user is still typing. Words are quoted, so FTS5 syntax
+    characters in the input are searched for literally instead of being parsed.
+
+    Args:
+        term (str): Search text as typed by the user
+
+    Returns:
+        str: MATCH expression, or None if the input has no searchable words
+    """
+    words = re.findall(r"\w+", term or "", re.UNICODE)
+    if not words:
+        return None
+    quoted = [f'"{word}"' for word in words]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+def matching_ids_sql(source, placeholder="?"):
+    """
+    Get a subquery selecting the row IDs that match a MATCH expression
+
+    Args:
+        source (str): Key of SOURCES
+        placeholder (str): Bound parameter for the match expression, e.g. ':match' for SQLAlchemy text()
+
+    Returns:
+        str: SQL selecting the matching row IDs
+    """
+    fts = SOURCES[source]["fts_table"]
+    return f"SELECT rowid FROM {fts} WHERE {fts} MATCH {placeholder}"
+
+def count_sql(source, term):
+    """
+    Get a query counting the rows matching a search
+
+    Returns:
+        tuple: (sql, params), or None if the term has no searchable words
+    """
+    expression = match_expression(term)
+    if expression is None:
+        return None
+    fts = SOURCES[source]["fts_table"]
+    return f"SELECT count(*) FROM {fts} WHERE {fts} MATCH ?", (expression,)
+
+def search_sql(source, term, limit=20, offset=0):
+    """
+    Get a query returning the rows matching a search, best match first, with
+    a highlighted snippet of the matching text
+
+    Args:
+        source (str): Key of SOURCES
+        term (str): Search text as typed by the user
+        limit (int): Maximum number of rows
+        offset (int): Number of rows to skip
+
+    Returns:
+        tuple: (sql, params), or None if the term has no searchable words
+    """
+    expression = match_expression(term)
+    if expression is None:
+        return None
+    config = SOURCES[source]
+    fts = config["fts_table"]
+    fields = ", ".join(f"{column} AS {name}" for name, column in config["fields"].items())
+    weights = ", ".join(str(weight) for weight in config["weights"])
+    sql = (
+        f"SELECT {fields}, "
+        f"snippet({fts}, -1, '{SNIPPET_START}', '{SNIPPET_END}', '…', {SNIPPET_TOKENS}) AS snippet, "
+        f"bm25({fts}, {weights}) AS rank "
+        f"FROM {fts} JOIN {config['table']} t ON t.id = {fts}.rowid "
+        f"WHERE {fts} MATCH ? ORDER BY rank LIMIT ? OFFSET ?"
+    )
+    return sql, (expression, int(limit), int(offset))
+
+def to_results(source, rows):
+    """
+    Convert rows from search_sql into result dictionaries
+
+    Returns:
+        list: Dictionaries with the SOURCES fields plus snippet, rank and source
+    """
+    names = list(SOURCES[source]["fields"]) + ["snippet", "rank"]
+    results = []
+    for row in rows:
+        result = dict(zip(names, tuple(row)))
+        result["source"] = source
+        results.append(result)
+    return results
@@ -1,4 +1,5 @@
-import requests
+import http_client
+import rate_limiter
 import os
 import json
 from dotenv import load_dotenv
@@ -53,7 +54,12 @@ def fetch_recent_tweets(query="windsurf OR codeium", max_results=25):
         print(f"Token Bearer: {BEARER_TOKEN[:10]}...{BEARER_TOKEN[-10:] if BEARER_TOKEN else 'None'}")
         print(f"Parâmetros: {json.dumps(params, indent=2)}")
         
-        response = requests.get(url, headers=headers, params=params, timeout=30)
+        # Queue for the shared Twitter request budget
+        if not rate_limiter.get_limiter("twitter").acquire(timeout=30):
+            logger.warning("Twitter request budget exhausted, skipping fetch")
+            return []
+        
+        response = http_client.get(url, headers=headers, params=params, timeout=30)
         
         if response.status_code == 200:
             data = response.json()
@@ -3,11 +3,16 @@ import sys
 import logging
 import sqlite3
 import datetime
+import threading
 from pathlib import Path
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+import migrations
+import text_search
+from hot_score import tweet_hot_score
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -16,7 +21,8 @@ logger = logging.getLogger(__name__)
 try:
     # Try to import SQLAlchemy models
     from models.twitter_post import TwitterPost, Base
-    from sqlalchemy import create_engine, desc, func, or_
+    from sqlalchemy import create_engine, desc, func, literal_column, or_, select, text
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
     from sqlalchemy.orm import sessionmaker
     from sqlalchemy.ext.declarative import declarative_base
     USING_ORM = True
@@ -32,8 +38,8 @@ def setup_database():
     if USING_ORM:
         try:
             # Create database using SQLAlchemy ORM
-            engine = create_engine(f"sqlite:///{DB_PATH}")
-            Base.metadata.create_all(engine)
+            get_engine()
+            migrations.migrate("twitter", DB_PATH)
             logger.info("Database setup complete using SQLAlchemy ORM.")
             return True
         except Exception as e:
@@ -45,7 +51,7 @@ def setup_database():
 def setup_database_sqlite():
     """Set up database using direct SQLite connection."""
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = get_connection()
         cursor = conn.cursor()
         
         # Create TwitterPost table
@@ -64,6 +70,7 @@ def setup_database_sqlite():
             replies INTEGER DEFAULT 0,
             url TEXT NOT NULL,
             media_url TEXT,
+            hot_score REAL DEFAULT 0.0,
             subreddit TEXT DEFAULT 'twitter',
             source TEXT DEFAULT 'twitter',
             created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -72,126 +79,244 @@ def setup_database_sqlite():
         ''')
         
         conn.commit()
-        conn.close()
+        migrations.migrate("twitter", DB_PATH)
         logger.info("Database setup complete using direct SQLite.")
         return True
     except Exception as e:
         logger.error(f"Error setting up database with SQLite: {e}")
         return False
 
-def save_tweets(tweets):
-    """Save a list of tweets to the database."""
-    if not tweets:
+# Insert new tweets and refresh engagement counts of known ones in one statement per batch
+UPSERT_SQL = '''
+INSERT INTO twitter_posts (
+    external_id, author_id, author, author_name, profile_image,
+    content, created_at, likes, retweets, replies, url, media_url, hot_score
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(external_id) DO UPDATE SET
+    likes = excluded.likes,
+    retweets = excluded.retweets,
+    replies = excluded.replies,
+    hot_score = excluded.hot_score,
+    updated = CURRENT_TIMESTAMP
+'''
+
+# Tweets per upsert batch
+SAVE_CHUNK_SIZE = 500
+
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+_local = threading.local()
+
+def get_engine():
+    """Return the process-wide SQLAlchemy engine, creating the tables on first use."""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine(f"sqlite:///{DB_PATH}")
+            Base.metadata.create_all(_engine)
+            _session_factory = sessionmaker(bind=_engine)
+        return _engine
+
+def get_session():
+    """Open a session on the shared engine."""
+    get_engine()
+    return _session_factory()
+
+def get_connection():
+    """Return this thread's reusable SQLite connection."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        _local.conn = conn
+    return conn
+
+def _parse_created_at(created_at):
+    """Turn an ISO timestamp from the Twitter API into a datetime."""
+    if isinstance(created_at, str):
+        try:
+            return datetime.datetime.fromisoformat(created_at.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            logger.warning(f"Unparseable tweet created_at: {created_at}")
+            return None
+    return created_at
+
+def _tweet_rows(tweets):
+    """Map tweets to upsert rows keyed by external_id, skipping tweets without an ID."""
+    rows = {}
+    for tweet in tweets:
+        external_id = tweet.get('id')
+        if not external_id:
+            logger.warning(f"Tweet missing ID, skipping: {tweet}")
+            continue
+        created_at = _parse_created_at(tweet.get('created_at')) or datetime.datetime.utcnow()
+        rows[str(external_id)] = {
+            "external_id": str(external_id),
+            "author_id": tweet.get('author_id', ''),
+            "author": tweet.get('author', ''),
+            "author_name": tweet.get('author_name', ''),
+            "profile_image": tweet.get('profile_image', ''),
+            "content": tweet.get('content', ''),
+            "created_at": created_at,
+            "likes": tweet.get('likes', 0),
+            "retweets": tweet.get('retweets', 0),
+            "replies": tweet.get('replies', 0),
+            "url": tweet.get('url', ''),
+            "media_url": tweet.get('media_url', ''),
+            "hot_score": tweet_hot_score(tweet.get('likes', 0), tweet.get('retweets', 0), created_at)
+        }
+    return list(rows.values())
+
+def upsert_tweets(tweets):
+    """
+    Save tweets, inserting new ones and refreshing likes, retweets and replies of known ones.
+
+    Returns:
+        dict: Number of tweets inserted and updated
+    """
+    rows = _tweet_rows(tweets or [])
+    if not rows:
         logger.info("No tweets to save")
-        return 0
-        
+        return {"inserted": 0, "updated": 0}
+
     if USING_ORM:
-        return save_tweets_orm(tweets)
+        try:
+            counts = upsert_tweets_orm(rows)
+        except Exception as e:
+            logger.error(f"Error saving tweets with ORM: {e}")
+            counts = upsert_tweets_sqlite(rows)
     else:
-        return save_tweets_sqlite(tweets)
+        counts = upsert_tweets_sqlite(rows)
 
-def save_tweets_orm(tweets):
-    """Save tweets using SQLAlchemy ORM."""
-    try:
-        engine = create_engine(f"sqlite:///{DB_PATH}")
-        Base.metadata.create_all(engine)
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        
-        saved_count = 0
-        for tweet_data in tweets:
-            # Check if tweet already exists
-            external_id = tweet_data.get('id')
-            if not external_id:
-                logger.warning(f"Tweet missing ID, skipping: {tweet_data}")
-                continue
-                
-            existing = session.query(TwitterPost).filter_by(external_id=external_id).first()
-            if existing:
-                logger.debug(f"Tweet {external_id} already exists, skipping")
-                continue
-                
-            # Map tweet data to TwitterPost attributes
-            tweet_obj = TwitterPost(
-                external_id=external_id,
-                author_id=tweet_data.get('author_id', ''),
-                author=tweet_data.get('author', ''),
-                author_name=tweet_data.get('author_name', ''),
-                profile_image=tweet_data.get('profile_image', ''),
-                content=tweet_data.get('content', ''),
-                created_at=tweet_data.get('created_at'),
-                likes=tweet_data.get('likes', 0),
-                retweets=tweet_data.get('retweets', 0),
-                replies=tweet_data.get('replies', 0),
-                url=tweet_data.get('url', ''),
-                media_url=tweet_data.get('media_url', '')
+    logger.info(f"Saved tweets to database: {counts['inserted']} inserted, {counts['updated']} updated")
+    return counts
+
+def save_tweets(tweets):
+    """Save a list of tweets to the database, returning the number of new tweets."""
+    return upsert_tweets(tweets)["inserted"]
+
+def _existing_tweets_query(external_ids):
+    """Build the statement counting the tweets of a batch that are already stored."""
+    table = TwitterPost.__table__
+    return select(func.count()).select_from(table).where(table.c.external_id.in_(external_ids))
+
+def upsert_tweets_orm(rows):
+    """Upsert tweet rows in batches on the shared SQLAlchemy engine."""
+    table = TwitterPost.__table__
+    inserted = 0
+    with get_engine().begin() as conn:
+        for start in range(0, len(rows), SAVE_CHUNK_SIZE):
+            chunk = rows[start:start + SAVE_CHUNK_SIZE]
+            existing = conn.execute(_existing_tweets_query([row["external_id"] for row in chunk])).scalar()
+            inserted += len(chunk) - existing
+
+            stmt = sqlite_insert(table)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["external_id"],
+                set_={
+                    "likes": stmt.excluded.likes,
+                    "retweets": stmt.excluded.retweets,
+                    "replies": stmt.excluded.replies,
+                    "hot_score": stmt.excluded.hot_score,
+                    "updated": func.current_timestamp(),
+                }
             )
-            
-            session.add(tweet_obj)
-            saved_count += 1
-        
-        session.commit()
-        session.close()
-        logger.info(f"Saved {saved_count} tweets to database using ORM")
-        return saved_count
-    except Exception as e:
-        logger.error(f"Error saving tweets with ORM: {e}")
-        return save_tweets_sqlite(tweets)
+            conn.execute(stmt, chunk)
+    return {"inserted": inserted, "updated": len(rows) - inserted}
 
-def save_tweets_sqlite(tweets):
-    """Save tweets using direct SQLite connection."""
+def upsert_tweets_sqlite(rows):
+    """Upsert tweet rows in batches on this thread's SQLite connection."""
+    conn = get_connection()
+    inserted = 0
     try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        
-        saved_count = 0
-        for tweet in tweets:
-            # Check if tweet already exists
-            external_id = tweet.get('id')
-            if not external_id:
-                logger.warning(f"Tweet missing ID, skipping: {tweet}")
-                continue
-                
-            cursor.execute("SELECT 1 FROM twitter_posts WHERE external_id = ?", (external_id,))
-            if cursor.fetchone():
-                logger.debug(f"Tweet {external_id} already exists, skipping")
-                continue
-                
-            # Convert datetime to string if needed
-            created_at = tweet.get('created_at')
-            if isinstance(created_at, datetime.datetime):
-                created_at = created_at.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Insert tweet into database
-            cursor.execute('''
-            INSERT INTO twitter_posts (
-                external_id, author_id, author, author_name, profile_image, 
-                content, created_at, likes, retweets, replies, url, media_url
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                external_id,
-                tweet.get('author_id', ''),
-                tweet.get('author', ''),
-                tweet.get('author_name', ''),
-                tweet.get('profile_image', ''),
-                tweet.get('content', ''),
-                created_at,
-                tweet.get('likes', 0),
-                tweet.get('retweets', 0),
-                tweet.get('replies', 0),
-                tweet.get('url', ''),
-                tweet.get('media_url', '')
-            ))
-            saved_count += 1
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Saved {saved_count} tweets to database using SQLite")
-        return saved_count
+        with conn:
+            for start in range(0, len(rows), SAVE_CHUNK_SIZE):
+                chunk = rows[start:start + SAVE_CHUNK_SIZE]
+                ids = [row["external_id"] for row in chunk]
+                existing = conn.execute(
+                    f"SELECT COUNT(*) FROM twitter_posts WHERE external_id IN ({','.join('?' * len(ids))})",
+                    ids
+                ).fetchone()[0]
+                inserted += len(chunk) - existing
+
+                conn.executemany(UPSERT_SQL, [(
+                    row["external_id"], row["author_id"], row["author"], row["author_name"],
+                    row["profile_image"], row["content"], row["created_at"].strftime('%Y-%m-%d %H:%M:%S'),
+                    row["likes"], row["retweets"], row["replies"], row["url"], row["media_url"],
+                    row["hot_score"]
+                ) for row in chunk])
+        return {"inserted": inserted, "updated": len(rows) - inserted}
     except Exception as e:
         logger.error(f"Error saving tweets with SQLite: {e}")
+        return {"inserted": 0, "updated": 0}
+
+_search_index = None
+
+def search_index_available():
+    """Check once whether the full-text index exists (it needs SQLite with FTS5)."""
+    global _search_index
+    if _search_index is None:
+        try:
+            _search_index = get_connection().execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                (text_search.SOURCES["twitter"]["fts_table"],)
+            ).fetchone() is not None
+        except Exception as e:
+            logger.error(f"Error checking the tweet search index: {e}")
+            return False
+    return _search_index
+
+def search_tweets(query, limit=20, offset=0):
+    """
+    Full-text search of tweets, best match first.
+
+    Returns:
+        tuple: (list of result dictionaries with a highlighted snippet, total number of matches)
+    """
+    search_query = text_search.search_sql("twitter", query, limit, offset)
+    if search_query is None or not search_index_available():
+        return [], 0
+    try:
+        conn = get_connection()
+        results = text_search.to_results("twitter", conn.execute(*search_query).fetchall())
+        total = conn.execute(*text_search.count_sql("twitter", query)).fetchone()[0]
+        return results, total
+    except Exception as e:
+        logger.error(f"Error searching tweets: {e}")
+        return [], 0
+
+def count_local_tweets(query=None):
+    """Count the tweets matching a search query, or all tweets without one."""
+    try:
+        conn = get_connection()
+        expression = text_search.match_expression(query) if query else None
+        if expression is not None and search_index_available():
+            return conn.execute(*text_search.count_sql("twitter", query)).fetchone()[0]
+        if query:
+            return conn.execute("SELECT COUNT(*) FROM twitter_posts WHERE content LIKE ?", (f"%{query}%",)).fetchone()[0]
+        return conn.execute("SELECT COUNT(*) FROM twitter_posts").fetchone()[0]
+    except Exception as e:
+        logger.error(f"Error counting tweets: {e}")
         return 0
 
+def _tweet_dict(row):
+    """Convert a twitter_posts row read with direct SQLite into a tweet dictionary."""
+    return {
+        "id": row['external_id'],
+        "author": row['author'],
+        "author_name": row['author_name'],
+        "profile_image": row['profile_image'],
+        "content": row['content'],
+        "created_at": row['created_at'],
+        "likes": row['likes'],
+        "retweets": row['retweets'],
+        "replies": row['replies'],
+        "url": row['url'],
+        "media_url": row['media_url'],
+        "source": "twitter"
+    }
+
 def search_local_tweets(query, limit=20, sort_by='new'):
     """Search for tweets in the local database that match the query."""
     if USING_ORM:
@@ -199,57 +324,58 @@ def search_local_tweets(query, limit=20, sort_by='new'):
     else:
         return search_local_tweets_sqlite(query, limit, sort_by)
 
+def _tweets_query(query, limit, sort_by='new'):
+    """Build the ORM statement listing tweets, optionally only those matching a search query."""
+    tweets_query = select(TwitterPost)
+    
+    # Apply search filter if query is provided
+    if query:
+        expression = text_search.match_expression(query)
+        if expression is not None and search_index_available():
+            matching_ids = text(text_search.matching_ids_sql("twitter", ":match")).bindparams(match=expression)
+            tweets_query = tweets_query.where(TwitterPost.id.in_(matching_ids.columns(literal_column("rowid"))))
+        else:
+            tweets_query = tweets_query.where(TwitterPost.content.like(f"%{query}%"))
+    
+    # Apply sorting
+    if sort_by == 'new':
+        tweets_query = tweets_query.order_by(desc(TwitterPost.created_at))
+    elif sort_by == 'top':
+        tweets_query = tweets_query.order_by(desc(TwitterPost.likes))
+    elif sort_by == 'hot':
+        # Stored combination of recency and engagement, see hot_score.py
+        tweets_query = tweets_query.order_by(desc(TwitterPost.hot_score))
+    
+    # Apply limit
+    return tweets_query.limit(limit)
+
 def search_local_tweets_orm(query, limit=20, sort_by='new'):
     """Search for tweets using SQLAlchemy ORM."""
     try:
-        engine = create_engine(f"sqlite:///{DB_PATH}")
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        
-        # Build query
-        tweets_query = session.query(TwitterPost)
+        with get_session() as session:
+            tweets = session.scalars(_tweets_query(query, limit, sort_by)).all()
         
-        # Apply search filter if query is provided
-        if query:
-            tweets_query = tweets_query.filter(TwitterPost.content.like(f"%{query}%"))
+            # Convert to dictionary
+            result = []
+            for tweet in tweets:
+                tweet_dict = {
+                    "id": tweet.external_id,
+                    "author": tweet.author,
+                    "author_name": tweet.author_name,
+                    "profile_image": tweet.profile_image,
+                    "content": tweet.content,
+                    "created_at": tweet.created_at.isoformat() if tweet.created_at is not None else None,
+                    "likes": tweet.likes,
+                    "retweets": tweet.retweets,
+                    "replies": tweet.replies,
+                    "url": tweet.url,
+                    "media_url": tweet.media_url,
+                    "source": "twitter"
+                }
+                result.append(tweet_dict)
         
-        # Apply sorting
-        if sort_by == 'new':
-            tweets_query = tweets_query.order_by(desc(TwitterPost.created_at))
-        elif sort_by == 'top':
-            tweets_query = tweets_query.order_by(desc(TwitterPost.likes))
-        elif sort_by == 'hot':
-            # For 'hot', consider a combination of recency and engagement
-            # This is a simplified version
-            tweets_query = tweets_query.order_by(
-                desc((TwitterPost.likes + TwitterPost.retweets) * 0.7 + 
-                     func.julianday('now') - func.julianday(TwitterPost.created_at))
-            )
-        
-        # Apply limit
-        tweets = tweets_query.limit(limit).all()
-        
-        # Convert to dictionary
-        result = []
-        for tweet in tweets:
-            tweet_dict = {
-                "id": tweet.external_id,
-                "author": tweet.author,
-                "author_name": tweet.author_name,
-                "profile_image": tweet.profile_image,
-                "content": tweet.content,
-                "created_at": tweet.created_at.isoformat() if tweet.created_at is not None else None,
-                "likes": tweet.likes,
-                "retweets": tweet.retweets,
-                "replies": tweet.replies,
-                "url": tweet.url,
-                "media_url": tweet.media_url,
-                "source": "twitter"
-            }
-            result.append(tweet_dict)
-        
-        logger.info(f"Found {len(result)} tweets in database using ORM matching query: '{query}'")
-        return result
+            logger.info(f"Found {len(result)} tweets in database using ORM matching query: '{query}'")
+            return result
     except Exception as e:
         logger.error(f"Error searching tweets with ORM: {e}")
         return search_local_tweets_sqlite(query, limit, sort_by)
@@ -257,9 +383,7 @@ def search_local_tweets_orm(query, limit=20, sort_by='new'):
 def search_local_tweets_sqlite(query, limit=20, sort_by='new'):
     """Search for tweets using direct SQLite connection."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
         
         # Build query
         sql = "SELECT * FROM twitter_posts"
@@ -267,8 +391,13 @@ def search_local_tweets_sqlite(query, limit=20, sort_by='new'):
         
         # Apply search filter if query is provided
         if query:
-            sql += " WHERE content LIKE ?"
-            params.append(f"%{query}%")
+            expression = text_search.match_expression(query)
+            if expression is not None and search_index_available():
+                sql += f" WHERE id IN ({text_search.matching_ids_sql('twitter')})"
+                params.append(expression)
+            else:
+                sql += " WHERE content LIKE ?"
+                params.append(f"%{query}%")
         
         # Apply sorting
         if sort_by == 'new':
@@ -276,8 +405,8 @@ def search_local_tweets_sqlite(query, limit=20, sort_by='new'):
         elif sort_by == 'top':
             sql += " ORDER BY likes DESC"
         elif sort_by == 'hot':
-            # For 'hot', consider a combination of recency and engagement
-            sql += " ORDER BY (likes + retweets) * 0.7 + (julianday('now') - julianday(created_at)) DESC"
+            # Stored combination of recency and engagement, see hot_score.py
+            sql += " ORDER BY hot_score DESC"
         
         # Apply limit
         sql += f" LIMIT {int(limit)}"
@@ -289,23 +418,8 @@ def search_local_tweets_sqlite(query, limit=20, sort_by='new'):
         # Convert to dictionary
         result = []
         for tweet in tweets:
-            tweet_dict = {
-                "id": tweet['external_id'],
-                "author": tweet['author'],
-                "author_name": tweet['author_name'],
-                "profile_image": tweet['profile_image'],
-                "content": tweet['content'],
-                "created_at": tweet['created_at'],
-                "likes": tweet['likes'],
-                "retweets": tweet['retweets'],
-                "replies": tweet['replies'],
-                "url": tweet['url'],
-                "media_url": tweet['media_url'],
-                "source": "twitter"
-            }
-            result.append(tweet_dict)
+            result.append(_tweet_dict(tweet))
         
-        conn.close()
         logger.info(f"Found {len(result)} tweets in database using SQLite matching query: '{query}'")
         return result
     except Exception as e:
@@ -322,48 +436,30 @@ def get_all_tweets(limit=50, sort_by='new'):
 def get_all_tweets_orm(limit=50, sort_by='new'):
     """Get all tweets using SQLAlchemy ORM."""
     try:
-        engine = create_engine(f"sqlite:///{DB_PATH}")
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        
-        # Build query
-        tweets_query = session.query(TwitterPost)
-        
-        # Apply sorting
-        if sort_by == 'new':
-            tweets_query = tweets_query.order_by(desc(TwitterPost.created_at))
-        elif sort_by == 'top':
-            tweets_query = tweets_query.order_by(desc(TwitterPost.likes))
-        elif sort_by == 'hot':
-            tweets_query = tweets_query.order_by(
-                desc((TwitterPost.likes + TwitterPost.retweets) * 0.7 + 
-                     func.julianday('now') - func.julianday(TwitterPost.created_at))
-            )
-        
-        # Apply limit
-        tweets = tweets_query.limit(limit).all()
+        with get_session() as session:
+            tweets = session.scalars(_tweets_query(None, limit, sort_by)).all()
         
-        # Convert to dictionary
-        result = []
-        for tweet in tweets:
-            tweet_dict = {
-                "id": tweet.external_id,
-                "author": tweet.author,
-                "author_name": tweet.author_name,
-                "profile_image": tweet.profile_image,
-                "content": tweet.content,
-                "created_at": tweet.created_at.isoformat() if tweet.created_at is not None else None,
-                "likes": tweet.likes,
-                "retweets": tweet.retweets,
-                "replies": tweet.replies,
-                "url": tweet.url,
-                "media_url": tweet.media_url,
-                "source": "twitter"
-            }
-            result.append(tweet_dict)
+            # Convert to dictionary
+            result = []
+            for tweet in tweets:
+                tweet_dict = {
+                    "id": tweet.external_id,
+                    "author": tweet.author,
+                    "author_name": tweet.author_name,
+                    "profile_image": tweet.profile_image,
+                    "content": tweet.content,
+                    "created_at": tweet.created_at.isoformat() if tweet.created_at is not None else None,
+                    "likes": tweet.likes,
+                    "retweets": tweet.retweets,
+                    "replies": tweet.replies,
+                    "url": tweet.url,
+                    "media_url": tweet.media_url,
+                    "source": "twitter"
+                }
+                result.append(tweet_dict)
         
-        logger.info(f"Retrieved {len(result)} tweets from database using ORM")
-        return result
+            logger.info(f"Retrieved {len(result)} tweets from database using ORM")
+            return result
     except Exception as e:
         logger.error(f"Error retrieving tweets with ORM: {e}")
         return get_all_tweets_sqlite(limit, sort_by)
@@ -371,9 +467,7 @@ def get_all_tweets_orm(limit=50, sort_by='new'):
 def get_all_tweets_sqlite(limit=50, sort_by='new'):
     """Get all tweets using direct SQLite connection."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        cursor = get_connection().cursor()
         
         # Build query
         sql = "SELECT * FROM twitter_posts"
@@ -384,7 +478,7 @@ def get_all_tweets_sqlite(limit=50, sort_by='new'):
         elif sort_by == 'top':
             sql += " ORDER BY likes DESC"
         elif sort_by == 'hot':
-            sql += " ORDER BY (likes + retweets) * 0.7 + (julianday('now') - julianday(created_at)) DESC"
+            sql += " ORDER BY hot_score DESC"
         
         # Apply limit
         sql += f" LIMIT {int(limit)}"
@@ -396,29 +490,49 @@ def get_all_tweets_sqlite(limit=50, sort_by='new'):
         # Convert to dictionary
         result = []
         for tweet in tweets:
-            tweet_dict = {
-                "id": tweet['external_id'],
-                "author": tweet['author'],
-                "author_name": tweet['author_name'],
-                "profile_image": tweet['profile_image'],
-                "content": tweet['content'],
-                "created_at": tweet['created_at'],
-                "likes": tweet['likes'],
-                "retweets": tweet['retweets'],
-                "replies": tweet['replies'],
-                "url": tweet['url'],
-                "media_url": tweet['media_url'],
-                "source": "twitter"
-            }
-            result.append(tweet_dict)
+            result.append(_tweet_dict(tweet))
         
-        conn.close()
         logger.info(f"Retrieved {len(result)} tweets from database using SQLite")
         return result
     except Exception as e:
         logger.error(f"Error retrieving tweets with SQLite: {e}")
         return []
 
+def get_feed_page(limit, after=None, since=None, search=None):
+    """
+    Get newest-first tweets for the cross-source feed.
+
+    Args:
+        limit (int): Maximum number of tweets to return
+        after (list): (created_at, id) of the last tweet already returned, as stored
+        since (datetime.datetime): Only tweets created at or after this time (UTC)
+        search (str): Search query
+
+    Returns:
+        list: (tweet dictionary, [created_at, id]) tuples
+    """
+    sql = "SELECT * FROM twitter_posts WHERE 1 = 1"
+    params = []
+    if search:
+        expression = text_search.match_expression(search)
+        if expression is not None and search_index_available():
+            sql += f" AND id IN ({text_search.matching_ids_sql('twitter')})"
+            params.append(expression)
+        else:
+            sql += " AND content LIKE ?"
+            params.append(f"%{search}%")
+    if since is not None:
+        sql += " AND created_at >= ?"
+        params.append(since.strftime('%Y-%m-%d %H:%M:%S'))
+    if after is not None:
+        sql += " AND (created_at, id) < (?, ?)"
+        params.extend(after)
+    sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+    params.append(int(limit))
+
+    rows = get_connection().execute(sql, params).fetchall()
+    return [(_tweet_dict(row), [row['created_at'], row['id']]) for row in rows]
+
 def get_recent_tweets(limit=20):
     """Get the most recent tweets from the database."""
     return get_all_tweets(limit=limit, sort_by='new')